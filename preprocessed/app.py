@@ -7,6 +7,9 @@ import pandas as pd
 import streamlit as st
 from pathlib import Path
 
+from name_index import search_names
+from ner_metrics import canonical_filter, entity_totals, load_graph_metrics, top_entity_counts
+
 DB_PATH = Path("./epstein_files/epstein.db")
 BASE_DIR = Path("./epstein_files")
 
@@ -24,6 +27,7 @@ def get_db():
 def main():
     st.set_page_config(page_title="Epstein Files DB", layout="wide")
     conn = get_db()
+    node_metrics = load_graph_metrics(conn)
 
     # Header stats
     total_files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
@@ -61,13 +65,8 @@ def main():
                 'virginia roberts', 'virginia giuffre',
             }
 
-            # Get top PERSON entities
-            top_entities = conn.execute("""
-                SELECT normalized, entity_label, SUM(count) as total, COUNT(DISTINCT file_id) as files
-                FROM entities WHERE entity_label = 'PERSON'
-                GROUP BY normalized HAVING files >= ?
-                ORDER BY files DESC LIMIT ?
-            """, (min_weight, max_nodes)).fetchall()
+            # Top entities, aliases counted under the canonical names the edges use
+            top_entities = top_entity_counts(conn, min_weight, max_nodes)
 
             entity_set = {e[0] for e in top_entities}
             entity_info = {e[0]: (e[1], e[2], e[3]) for e in top_entities}
@@ -75,14 +74,10 @@ def main():
             # Force-add VIPs
             for vip in vip_names:
                 if vip not in entity_set:
-                    row = conn.execute("""
-                        SELECT normalized, entity_label, SUM(count), COUNT(DISTINCT file_id)
-                        FROM entities WHERE normalized = ?
-                        GROUP BY normalized
-                    """, (vip,)).fetchone()
+                    row = entity_totals(conn, vip)
                     if row:
-                        entity_set.add(row[0])
-                        entity_info[row[0]] = (row[1], row[2], row[3])
+                        entity_set.add(vip)
+                        entity_info[vip] = row
 
             # Get edges
             edges = conn.execute("""
@@ -130,8 +125,11 @@ def main():
                             shape = "star"
                         else:
                             color, size, shape = "#e74c3c", min(8 + files * 2, 50), "dot"
+                        title = f"{node}\n{files} files, {tot} mentions"
+                        if node in node_metrics:
+                            title += f"\ncommunity {node_metrics[node]['community'] + 1}"
                         net.add_node(node, label=node, color=color, size=size, shape=shape,
-                                     title=f"{node}\n{files} files, {tot} mentions")
+                                     title=title)
                         added.add(node)
                 if a in added and b in added:
                     net.add_edge(a, b, value=w, title=f"{w} shared files")
@@ -166,16 +164,21 @@ def main():
 
             if selected_person:
                 # Stats
-                stats = conn.execute("""
-                    SELECT SUM(count), COUNT(DISTINCT file_id)
-                    FROM entities WHERE normalized = ?
-                """, (selected_person,)).fetchone()
-                mentions, file_count = stats if stats[0] else (0, 0)
+                totals = entity_totals(conn, selected_person)
+                _, mentions, file_count = totals if totals else (None, 0, 0)
 
                 col1, col2 = st.columns(2)
                 col1.metric("Total mentions", f"{mentions:,}")
                 col2.metric("Files appeared in", f"{file_count:,}")
 
+                # Precomputed by scripts/graph_metrics.py --ner-db
+                m = node_metrics.get(selected_person)
+                if m:
+                    col3, col4, col5 = st.columns(3)
+                    col3.metric("Community", m['community'] + 1)
+                    col4.metric("Betweenness", f"{m['betweenness']:.4f}")
+                    col5.metric("Eigenvector", f"{m['eigenvector']:.4f}")
+
                 # Connections
                 st.subheader(f"Connections: {selected_person}")
                 df_connections = pd.read_sql_query("""
@@ -195,13 +198,15 @@ def main():
 
                 # Files
                 st.subheader(f"Files mentioning {selected_person}")
-                df_files = pd.read_sql_query("""
+                alias_join, condition, params = canonical_filter(conn, selected_person)
+                df_files = pd.read_sql_query(f"""
                     SELECT f.filename as File, f.dataset as DS, e.count as Mentions, f.rel_path as Path
                     FROM entities e JOIN files f ON f.id = e.file_id
-                    WHERE e.normalized = ?
+                    {alias_join}
+                    WHERE {condition}
                     ORDER BY e.count DESC
                     LIMIT 100
-                """, conn, params=[selected_person])
+                """, conn, params=params)
 
                 if not df_files.empty:
                     st.dataframe(df_files, width='stretch', hide_index=True, height=400)
@@ -217,20 +222,24 @@ def main():
             if person_query:
                 query_lower = person_query.lower().strip()
 
-                # Find matching entities
-                df_matches = pd.read_sql_query("""
-                    SELECT normalized as Name, SUM(count) as Mentions, COUNT(DISTINCT file_id) as Files
-                    FROM entities WHERE entity_label = 'PERSON' AND normalized LIKE ?
-                    GROUP BY normalized ORDER BY Files DESC LIMIT 20
-                """, conn, params=[f"%{query_lower}%"])
+                # Find matching entities (trigram index from name_index.py, typo-tolerant)
+                df_matches = pd.DataFrame(
+                    search_names(conn, query_lower, person_only=True, limit=20),
+                    columns=['Name', 'Mentions', 'Files', 'Canonical'],
+                )
 
                 if df_matches.empty:
                     st.warning(f"No person matching '{person_query}' found in entities.")
                 else:
+                    # Canonical names come from entity_resolution.py; hide the column when unused
+                    if (df_matches['Canonical'] == df_matches['Name']).all():
+                        df_matches = df_matches.drop(columns=['Canonical'])
                     st.dataframe(df_matches, width='stretch', hide_index=True)
 
                     # Pick the top match for relationship display
                     top_match = df_matches.iloc[0]['Name']
+                    # Co-occurrence edges are keyed by canonical name once aliases exist
+                    rel_name = df_matches.iloc[0].get('Canonical', top_match)
                     st.subheader(f"Relationships: {top_match}")
 
                     df_rels = pd.read_sql_query("""
@@ -241,7 +250,7 @@ def main():
                         WHERE entity_a = ? OR entity_b = ?
                         ORDER BY file_count DESC
                         LIMIT 50
-                    """, conn, params=[top_match, top_match, top_match])
+                    """, conn, params=[rel_name, rel_name, rel_name])
 
                     if not df_rels.empty:
                         # Pie chart of connections
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Fuzzy entity resolution for NER names (e.g. "Ghislaine", "G. Maxwell",
+"Ghislane Maxwel" -> "ghislaine maxwell").
+
+Every distinct normalized name gets a MinHash signature over character
+trigrams. Candidate pairs come from LSH buckets (bands of the signature)
+and from blocking keys (first initial + surname, email local part); only
+candidates are scored, so the run is near-linear in the number of names.
+Accepted pairs are merged with union-find and each cluster's most
+frequent name becomes the canonical one. Results go to entity_aliases
+(alias -> canonical), which ner_extract.py uses when building
+co-occurrence edges.
+
+Usage:
+    python entity_resolution.py resolve [--label PERSON] [--threshold 0.85]
+    python entity_resolution.py show NAME    # Show the cluster of a name
+"""
+
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from collections import defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path("./epstein_files")
+DB_PATH = BASE_DIR / "epstein.db"
+
+SHINGLE_SIZE = 3
+NUM_PERM = 100
+BANDS = 20                  # 20 bands x 5 rows: pairs at Jaccard 0.7 collide ~97% of the time, at 0.3 ~5%
+MAX_BUCKET = 50             # larger buckets are linked as a star, not all pairs
+MERSENNE_PRIME = (1 << 61) - 1
+SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv'}
+# OCR confusions folded before shingling
+OCR_FOLD = str.maketrans({'0': 'o', '1': 'l', '|': 'l', '5': 's', '$': 's'})
+
+
+def get_db():
+    conn = sqlite3.connect(str(DB_PATH))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def init_tables(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS entity_aliases (
+            alias TEXT NOT NULL,
+            label TEXT NOT NULL,
+            canonical TEXT NOT NULL,
+            score REAL,
+            PRIMARY KEY (alias, label)
+        );
+        CREATE INDEX IF NOT EXISTS idx_aliases_canonical ON entity_aliases(canonical);
+    """)
+    conn.commit()
+
+
+def clean_name(name):
+    """Lowercase, fold OCR confusions, drop punctuation and collapse spaces."""
+    name = name.lower().translate(OCR_FOLD)
+    name = re.sub(r"[^\w\s'-]", ' ', name)
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def name_tokens(cleaned):
+    """Return (tokens without suffixes, suffix or None)."""
+    tokens = cleaned.replace('-', ' ').split()
+    suffix = None
+    if len(tokens) > 1 and tokens[-1] in SUFFIXES:
+        suffix = tokens.pop()
+    return tokens, suffix
+
+
+def minhash_signatures(names, num_perm=NUM_PERM, seed=1, chunk_shingles=200_000):
+    """MinHash signatures (len(names) x num_perm, uint64) over character shingles."""
+    rng = np.random.default_rng(seed)
+    # (a * h + b) mod p with a, b < p; the uint64 product wraps, which still
+    # scrambles the order of the 32-bit shingle hashes differently per permutation
+    a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(names), num_perm), dtype=np.uint64)
+    start = 0
+    while start < len(names):
+        hashes = []
+        offsets = []
+        end = start
+        while end < len(names) and len(hashes) < chunk_shingles:
+            padded = f" {names[end]} "
+            offsets.append(len(hashes))
+            hashes.extend({zlib.crc32(padded[i:i + SHINGLE_SIZE].encode())
+                           for i in range(max(len(padded) - SHINGLE_SIZE + 1, 1))})
+            end += 1
+        values = (np.asarray(hashes, dtype=np.uint64)[:, None] * a + b) % MERSENNE_PRIME & 0xFFFFFFFF
+        signatures[start:end] = np.minimum.reduceat(values, np.asarray(offsets), axis=0)
+        start = end
+    return signatures
+
+
+def lsh_candidates(signatures, bands=BANDS, rank=None):
+    """
+    Yield candidate index pairs that share at least one LSH band. Buckets
+    larger than MAX_BUCKET are linked to their highest-ranked member only.
+    """
+    rows = signatures.shape[1] // bands
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        _, bucket = np.unique(keys, return_inverse=True)
+        order = np.argsort(bucket, kind='stable')
+        sorted_buckets = bucket[order]
+        bounds = np.flatnonzero(np.diff(sorted_buckets)) + 1
+        for members in np.split(order, bounds):
+            if len(members) < 2:
+                continue
+            if len(members) <= MAX_BUCKET:
+                for i in range(len(members)):
+                    for j in range(i + 1, len(members)):
+                        yield int(members[i]), int(members[j])
+            else:
+                hub = int(members[0] if rank is None else members[np.argmin(rank[members])])
+                for m in members:
+                    if m != hub:
+                        yield hub, int(m)
+
+
+def blocking_keys(tokens, email=None):
+    """Blocking keys: first initial + surname, first name + surname initial, email local part."""
+    keys = []
+    if len(tokens) >= 2:
+        keys.append(f"{tokens[0][0]}|{tokens[-1]}")
+        keys.append(f"{tokens[0]}|{tokens[-1][0]}")
+    if email and '@' in email:
+        keys.append('@' + email.split('@')[0].lower())
+    return keys
+
+
+def token_score(tokens_a, tokens_b):
+    """
+    0.9 when first and last names agree, one of them possibly abbreviated
+    ("j. epstein", "jeffrey e." ~ "jeffrey epstein").
+    """
+    if len(tokens_a) < 2 or len(tokens_b) < 2:
+        return 0.0
+    pairs = ((tokens_a[0], tokens_b[0]), (tokens_a[-1], tokens_b[-1]))
+    if any(x == y for x, y in pairs) and all(x.startswith(y) or y.startswith(x) for x, y in pairs):
+        return 0.9
+    return 0.0
+
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+def resolve_names(names, files, mentions=None, emails=None, threshold=0.85):
+    """
+    Cluster spelling variants. `names` are distinct names, `files` and
+    `mentions` their document/mention counts, `emails` optional addresses.
+    A candidate pair scores the best of its MinHash Jaccard estimate, its
+    edit similarity (catches OCR typos in short names, where one wrong
+    letter breaks several trigrams) and token_score(), and merges only if
+    the two clusters' canonical names match as well. Names with initials
+    and lone names never merge clusters: each joins the one full-name
+    cluster it fits, or stays on its own when several fit.
+    Returns (canonical name, score vs canonical) per input name.
+    """
+    n = len(names)
+    mentions = mentions or files
+    cleaned = [clean_name(name) for name in names]
+    tokens, suffixes = zip(*(name_tokens(c) for c in cleaned)) if n else ((), ())
+    # Rank 0 = most files, then most mentions, then longest name
+    order = sorted(range(n), key=lambda i: (-files[i], -mentions[i], -len(names[i]), names[i]))
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+
+    signatures = minhash_signatures(cleaned)
+    uf = UnionFind(n)
+    # Initials and lone names fit several people ("j epstein", "epstein"), so
+    # they never link clusters; they attach below once full names are merged
+    full = [len(t) >= 2 and len(t[0]) > 1 and len(t[-1]) > 1 for t in tokens]
+    head = list(range(n))   # root -> highest-ranked member (the cluster's canonical)
+
+    def pair_score(i, j):
+        if suffixes[i] != suffixes[j]:
+            return 0.0  # "Donald Trump" and "Donald Trump Jr" are different people
+        score = max(token_score(tokens[i], tokens[j]),
+                    np.count_nonzero(signatures[i] == signatures[j]) / signatures.shape[1])
+        if score < threshold:
+            matcher = SequenceMatcher(None, cleaned[i], cleaned[j])
+            # real_quick_ratio / quick_ratio are cheap upper bounds of ratio
+            if matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold:
+                score = max(score, matcher.ratio())
+        return score
+
+    def merge(i, j):
+        ri, rj = uf.find(i), uf.find(j)
+        first = min(head[ri], head[rj], key=lambda m: rank[m])
+        uf.union(ri, rj)
+        head[uf.find(ri)] = first
+
+    def consider(i, j):
+        # Pairs repeat across LSH bands and blocks; skip already merged ones
+        if not (full[i] and full[j]):
+            return
+        ri, rj = uf.find(i), uf.find(j)
+        if ri == rj or pair_score(i, j) < threshold:
+            return
+        # The canonicals must match too, or A~B, B~C would chain A to C
+        hi, hj = head[ri], head[rj]
+        if (hi, hj) != (i, j) and pair_score(hi, hj) < threshold:
+            return
+        merge(i, j)
+
+    for i, j in lsh_candidates(signatures, rank=rank):
+        consider(i, j)
+
+    blocks = defaultdict(list)
+    for i in range(n):
+        for key in blocking_keys(tokens[i], emails[i] if emails else None):
+            blocks[key].append(i)
+    for members in blocks.values():
+        if len(members) > MAX_BUCKET:
+            members = sorted(members, key=lambda m: rank[m])
+            for m in members[1:]:
+                consider(members[0], m)
+        else:
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    consider(members[x], members[y])
+
+    # An abbreviated name ("j epstein", "jeffrey e") joins the only full-name
+    # cluster that fits it; a lone first or last name the only one using it
+    fits = defaultdict(set)
+    token_roots = defaultdict(set)
+    for i in range(n):
+        if full[i]:
+            first, last = tokens[i][0], tokens[i][-1]
+            root = uf.find(i)
+            for key in ((first[0], last, suffixes[i]), (first, last[0], suffixes[i]),
+                        (first[0], last[0], suffixes[i])):
+                fits[key].add(root)
+            token_roots[first].add(root)
+            token_roots[last].add(root)
+    same_form = {}
+    for i in order:
+        if full[i]:
+            continue
+        if len(tokens[i]) >= 2:
+            roots = fits.get((tokens[i][0], tokens[i][-1], suffixes[i]), ())
+        else:
+            roots = token_roots.get(tokens[i][0], ()) if tokens[i] else ()
+        if len(roots) == 1:
+            merge(i, next(iter(roots)))
+        else:
+            # Unresolved spellings of the same form still share one entry
+            key = (tuple(tokens[i]), suffixes[i])
+            if key in same_form:
+                merge(i, same_form[key])
+            else:
+                same_form[key] = i
+
+    best = {}
+    for i in order:
+        best.setdefault(uf.find(i), i)
+    result = []
+    for i in range(n):
+        c = best[uf.find(i)]
+        result.append((names[c], 1.0 if c == i else round(float(pair_score(i, c)), 3)))
+    return result
+
+
+def resolve_entities(conn, label="PERSON", threshold=0.85):
+    """Resolve the distinct `normalized` names of one entity label into entity_aliases."""
+    init_tables(conn)
+    start = time.time()
+    rows = conn.execute("""
+        SELECT normalized, COUNT(DISTINCT file_id) AS files, SUM(count) AS mentions
+        FROM entities
+        WHERE entity_label = ?
+        GROUP BY normalized
+    """, (label,)).fetchall()
+    print(f"Resolving {len(rows)} distinct {label} names...")
+    if not rows:
+        return
+
+    names = [r[0] for r in rows]
+    resolved = resolve_names(names, [r[1] for r in rows], [r[2] for r in rows], threshold=threshold)
+
+    conn.execute("DELETE FROM entity_aliases WHERE label = ?", (label,))
+    conn.executemany(
+        "INSERT INTO entity_aliases (alias, label, canonical, score) VALUES (?, ?, ?, ?)",
+        ((name, label, canonical, score) for name, (canonical, score) in zip(names, resolved))
+    )
+    if label == "PERSON" and conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='entity_names'").fetchone():
+        # Keep the search index (name_index.py) pointing at the new canonical names
+        conn.execute("""
+            UPDATE entity_names SET canonical = COALESCE(
+                (SELECT canonical FROM entity_aliases WHERE alias = entity_names.name AND label = 'PERSON'),
+                name)
+        """)
+    conn.commit()
+
+    merged = sum(1 for name, (canonical, _) in zip(names, resolved) if name != canonical)
+    clusters = len({canonical for canonical, _ in resolved})
+    print(f"  {merged} aliases merged into {clusters} canonical names in {time.time() - start:.1f}s")
+
+
+def show_cluster(conn, name):
+    init_tables(conn)
+    row = conn.execute("SELECT canonical FROM entity_aliases WHERE alias = ?", (name.lower(),)).fetchone()
+    if not row:
+        print(f"No alias entry for '{name}' (run: python entity_resolution.py resolve)")
+        return
+    print(f"Canonical: {row[0]}")
+    for alias, label, score in conn.execute(
+            "SELECT alias, label, score FROM entity_aliases WHERE canonical = ? ORDER BY score DESC",
+            (row[0],)):
+        print(f"  {score:.2f}  {alias} ({label})")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    conn = get_db()
+    command = sys.argv[1].lower()
+
+    if command == "resolve":
+        label = sys.argv[sys.argv.index("--label") + 1] if "--label" in sys.argv else "PERSON"
+        threshold = float(sys.argv[sys.argv.index("--threshold") + 1]) if "--threshold" in sys.argv else 0.85
+        resolve_entities(conn, label=label, threshold=threshold)
+    elif command == "show" and len(sys.argv) > 2:
+        show_cluster(conn, " ".join(sys.argv[2:]))
+    else:
+        print(f"Unknown command: {command}")
+        print(__doc__)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Trigram name index for the person search in app.py / app_lite.py.
+
+entity_names holds one row per distinct normalized entity name with its
+mention and file counts precomputed (over all labels and over PERSON
+only), plus its canonical name from entity_aliases when
+entity_resolution.py has run. entity_names_fts is an FTS5 index over the
+names with the trigram tokenizer, so substring lookups ("wexner",
+"ghislaine m") use the index instead of scanning entities, and typo'd
+queries can fall back to ranking names by shared trigrams.
+
+Usage:
+    python name_index.py build [DB]     # Build the index (default: epstein_files/epstein.db)
+    python name_index.py search QUERY   # Try a lookup from the command line
+"""
+
+import sqlite3
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+BASE_DIR = Path("./epstein_files")
+DB_PATH = BASE_DIR / "epstein.db"
+
+FUZZY_CANDIDATES = 200      # names ranked by trigram overlap before re-scoring
+
+
+def get_db(db_path=DB_PATH):
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def has_table(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+    ).fetchone() is not None
+
+
+def build_name_index(conn):
+    """(Re)build entity_names and its trigram FTS index from entities."""
+    start = time.time()
+    print("Building name index...")
+    canonical = "COALESCE(a.canonical, n.name)" if has_table(conn, "entity_aliases") else "n.name"
+    alias_join = ("LEFT JOIN entity_aliases a ON a.alias = n.name AND a.label = 'PERSON'"
+                  if has_table(conn, "entity_aliases") else "")
+
+    conn.executescript("""
+        DROP TABLE IF EXISTS entity_names_fts;
+        DROP TABLE IF EXISTS entity_names;
+        CREATE TABLE entity_names (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            mentions INTEGER NOT NULL,
+            files INTEGER NOT NULL,
+            person_mentions INTEGER NOT NULL,
+            person_files INTEGER NOT NULL,
+            canonical TEXT NOT NULL
+        );
+    """)
+    conn.execute(f"""
+        INSERT INTO entity_names (name, mentions, files, person_mentions, person_files, canonical)
+        SELECT n.name, n.mentions, n.files, n.person_mentions, n.person_files, {canonical}
+        FROM (
+            SELECT normalized AS name,
+                   SUM(count) AS mentions,
+                   COUNT(DISTINCT file_id) AS files,
+                   COALESCE(SUM(count) FILTER (WHERE entity_label = 'PERSON'), 0) AS person_mentions,
+                   COUNT(DISTINCT file_id) FILTER (WHERE entity_label = 'PERSON') AS person_files
+            FROM entities
+            GROUP BY normalized
+        ) n
+        {alias_join}
+    """)
+    conn.execute("CREATE INDEX idx_entity_names_files ON entity_names(person_files)")
+    conn.execute("CREATE INDEX idx_entity_names_canonical ON entity_names(canonical)")
+
+    try:
+        conn.executescript("""
+            CREATE VIRTUAL TABLE entity_names_fts USING fts5(
+                name, content='entity_names', content_rowid='id', tokenize='trigram'
+            );
+            INSERT INTO entity_names_fts (rowid, name) SELECT id, name FROM entity_names;
+        """)
+    except sqlite3.OperationalError as e:
+        # SQLite older than 3.34 has no trigram tokenizer; lookups then use
+        # LIKE over entity_names, which is still far smaller than entities
+        print(f"  FTS5 trigram index unavailable ({e}); using LIKE over entity_names")
+    conn.commit()
+
+    count = conn.execute("SELECT COUNT(*) FROM entity_names").fetchone()[0]
+    print(f"  Indexed {count} distinct names in {time.time() - start:.1f}s")
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def search_names(conn, query, person_only=True, limit=20):
+    """
+    Look up names containing `query`; if none do, return the closest names
+    by trigram overlap (typo tolerance). Returns rows of
+    (name, mentions, files, canonical) ordered by files. Without the index
+    (name_index.py build not run) this falls back to scanning entities.
+    """
+    # LIKE wildcards are dropped rather than escaped: FTS5 only serves
+    # LIKE without an ESCAPE clause from the trigram index
+    query = " ".join(query.lower().replace("%", " ").replace("_", " ").split())
+    if not has_table(conn, "entity_names"):
+        label_filter = "entity_label = 'PERSON' AND" if person_only else ""
+        return conn.execute(f"""
+            SELECT normalized, SUM(count), COUNT(DISTINCT file_id) AS files, normalized
+            FROM entities WHERE {label_filter} normalized LIKE ?
+            GROUP BY normalized ORDER BY files DESC LIMIT ?
+        """, (f"%{query}%", limit)).fetchall()
+
+    mentions, files = ("person_mentions", "person_files") if person_only else ("mentions", "files")
+    where = f"n.{files} > 0"
+    has_fts = has_table(conn, "entity_names_fts")
+
+    # The trigram tokenizer answers LIKE from the index for 3+ characters
+    source = ("entity_names_fts f JOIN entity_names n ON n.id = f.rowid WHERE f.name"
+              if has_fts and len(query) >= 3 else "entity_names n WHERE n.name")
+    rows = conn.execute(f"""
+        SELECT n.name, n.{mentions}, n.{files}, n.canonical
+        FROM {source} LIKE ? AND {where}
+        ORDER BY n.{files} DESC LIMIT ?
+    """, (f"%{query}%", limit)).fetchall()
+    if rows or not has_fts or len(query) < 4:
+        return rows
+
+    # Typo tolerance: names sharing the most trigrams, re-scored by edit similarity
+    grams = trigrams(query)
+    match = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+    candidates = conn.execute(f"""
+        SELECT n.name, n.{mentions}, n.{files}, n.canonical
+        FROM entity_names_fts f JOIN entity_names n ON n.id = f.rowid
+        WHERE entity_names_fts MATCH ? AND {where}
+        ORDER BY rank LIMIT ?
+    """, (match, FUZZY_CANDIDATES)).fetchall()
+
+    def score(row):
+        name = row[0]
+        overlap = len(grams & trigrams(name)) / len(grams)
+        return max(overlap, SequenceMatcher(None, query, name).ratio())
+
+    scored = [(score(row), row) for row in candidates]
+    scored = [(s, row) for s, row in scored if s >= 0.6]
+    scored.sort(key=lambda item: (-item[0], -item[1][2]))
+    return [row for _, row in scored[:limit]]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    command = sys.argv[1].lower()
+
+    if command == "build":
+        conn = get_db(Path(sys.argv[2]) if len(sys.argv) > 2 else DB_PATH)
+        build_name_index(conn)
+    elif command == "search" and len(sys.argv) > 2:
+        conn = get_db()
+        start = time.time()
+        rows = search_names(conn, " ".join(sys.argv[2:]))
+        for name, mentions, files, canonical in rows:
+            alias = f"  (= {canonical})" if canonical != name else ""
+            print(f"  {files:>6} files  {mentions:>7} mentions  {name}{alias}")
+        print(f"{len(rows)} matches in {(time.time() - start) * 1000:.1f} ms")
+    else:
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        return
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Extract named entities from Epstein file text cache using spaCy NER.
 
 Usage:
     python ner_extract.py extract     # Run NER on all text_cache entries
+    python ner_extract.py cooccur     # Rebuild co-occurrence (uses entity_aliases if present)
     python ner_extract.py status      # Show entity stats
     python ner_extract.py graph       # Generate co-occurrence graph HTML
 """
@@ -17,6 +18,9 @@ from itertools import combinations
 
 import spacy
 
+from name_index import build_name_index
+from ner_metrics import alias_sql
+
 BASE_DIR = Path("./epstein_files")
 DB_PATH = BASE_DIR / "epstein.db"
 OUTPUT_DIR = BASE_DIR / "output"
@@ -164,12 +168,15 @@ def build_cooccurrence(conn, min_docs=2):
     conn.execute("DELETE FROM entity_cooccurrence")
     conn.commit()
 
+    name_expr, alias_join = alias_sql(conn)
+
     # Get entities grouped by file, only PERSON entities with 2+ mentions
-    rows = conn.execute("""
-        SELECT file_id, normalized, entity_label
-        FROM entities
-        WHERE entity_label = 'PERSON' AND count >= 1
-        ORDER BY file_id
+    rows = conn.execute(f"""
+        SELECT e.file_id, {name_expr}, e.entity_label
+        FROM entities e
+        {alias_join}
+        WHERE e.entity_label = 'PERSON' AND e.count >= 1
+        ORDER BY e.file_id
     """).fetchall()
 
     # Group by file
@@ -242,17 +249,27 @@ def show_status(conn):
 
 
 def generate_graph(conn, min_edge_weight=3, max_nodes=150):
-    """Generate interactive HTML graph with pyvis."""
+    """
+    Generate interactive HTML graph with pyvis. Node positions are computed
+    here with the ForceAtlas2 engine in scripts/layout.py (warm-started from
+    the previous run) and the page ships with physics off.
+    """
+    import networkx as nx
     from pyvis.network import Network
 
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+    import layout
+
     init_tables(conn)
 
-    # Get top entities by file count
-    top_entities = conn.execute("""
-        SELECT normalized, entity_label, SUM(count) as total, COUNT(DISTINCT file_id) as files
-        FROM entities
-        WHERE entity_label IN ('PERSON', 'ORG')
-        GROUP BY normalized
+    # Get top entities by file count, under the canonical names the edges use
+    name_expr, alias_join = alias_sql(conn)
+    top_entities = conn.execute(f"""
+        SELECT {name_expr} AS name, e.entity_label, SUM(e.count) as total, COUNT(DISTINCT e.file_id) as files
+        FROM entities e
+        {alias_join}
+        WHERE e.entity_label IN ('PERSON', 'ORG')
+        GROUP BY name
         HAVING files >= ?
         ORDER BY files DESC
         LIMIT ?
@@ -268,23 +285,31 @@ def generate_graph(conn, min_edge_weight=3, max_nodes=150):
         WHERE file_count >= ?
         ORDER BY file_count DESC
     """, (min_edge_weight,)).fetchall()
+    edges = [(a, b, w) for a, b, w in edges if a in entity_set and b in entity_set]
+
+    # Precompute the layout
+    G = nx.Graph()
+    G.add_weighted_edges_from(edges)
+    positions_path = OUTPUT_DIR / "entity_graph_positions.json"
+    positions = layout.forceatlas2(G, pos=layout.load_positions(positions_path))
+    layout.save_positions(positions_path, positions)
+    screen = layout.to_screen(positions)
 
     net = Network(height="800px", width="100%", bgcolor="#1a1a2e", font_color="white")
-    net.barnes_hut(gravity=-3000, central_gravity=0.3, spring_length=200)
+    net.toggle_physics(False)
 
     # Color by type
     colors = {"PERSON": "#e74c3c", "ORG": "#3498db", "GPE": "#2ecc71", "NORP": "#f39c12"}
 
     added_nodes = set()
     for a, b, weight in edges:
-        if a not in entity_set or b not in entity_set:
-            continue
         for node in (a, b):
             if node not in added_nodes:
                 label_type, total, files = entity_info.get(node, ("PERSON", 1, 1))
                 color = colors.get(label_type, "#95a5a6")
                 size = min(8 + files * 2, 50)
-                net.add_node(node, label=node, color=color, size=size,
+                x, y = screen[node]
+                net.add_node(node, label=node, color=color, size=size, x=x, y=y, physics=False,
                            title=f"{node}\n{label_type}\n{files} files, {total} mentions")
                 added_nodes.add(node)
         net.add_edge(a, b, value=weight, title=f"{weight} shared files")
@@ -293,7 +318,7 @@ def generate_graph(conn, min_edge_weight=3, max_nodes=150):
     out_path = OUTPUT_DIR / "entity_graph.html"
     net.save_graph(str(out_path))
     print(f"\nGraph saved to {out_path}")
-    print(f"  Nodes: {len(added_nodes)}, Edges: {len([e for e in edges if e[0] in entity_set and e[1] in entity_set])}")
+    print(f"  Nodes: {len(added_nodes)}, Edges: {len(edges)}")
 
 
 def main():
@@ -307,6 +332,7 @@ def main():
     if command == "extract":
         extract_entities(conn)
         build_cooccurrence(conn)
+        build_name_index(conn)
     elif command == "cooccur":
         min_docs = int(sys.argv[2]) if len(sys.argv) > 2 else 2
         build_cooccurrence(conn, min_docs=min_docs)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Read-side helpers for app.py / app_lite.py, without importing spaCy,
+networkx or the metrics pipeline: entity counts under the canonical names
+that entity_resolution.py assigns (the names entity_cooccurrence is keyed
+by, shared with ner_extract.py) and the node metrics of the newest NER run
+of scripts/graph_metrics.py.
+"""
+
+
+def alias_sql(conn):
+    """
+    (name expression, join) selecting an entity's canonical name from
+    entities e: spelling variants count as one entity once
+    entity_resolution.py has run.
+    """
+    has_aliases = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='entity_aliases'"
+    ).fetchone()
+    if not has_aliases:
+        return "e.normalized", ""
+    return ("COALESCE(a.canonical, e.normalized)",
+            "LEFT JOIN entity_aliases a ON a.alias = e.normalized AND a.label = e.entity_label")
+
+
+def canonical_filter(conn, name):
+    """
+    (join, condition, params) selecting the rows of entities e counted under
+    canonical name `name`, i.e. the name and its aliases. The IN list keeps
+    the index on entities.normalized in use.
+    """
+    name_expr, alias_join = alias_sql(conn)
+    if not alias_join:
+        return "", "e.normalized = ?", [name]
+    return (alias_join,
+            f"""e.normalized IN (SELECT alias FROM entity_aliases WHERE canonical = ? UNION SELECT ?)
+            AND {name_expr} = ?""",
+            [name, name, name])
+
+
+def top_entity_counts(conn, min_files, limit, label="PERSON"):
+    """
+    (name, label, mentions, files) of the entities in the most files (of
+    one label, or all with label=None), aliases counted under their
+    canonical name.
+    """
+    name_expr, alias_join = alias_sql(conn)
+    where = "WHERE e.entity_label = ?" if label else ""
+    return conn.execute(f"""
+        SELECT {name_expr} AS name, e.entity_label, SUM(e.count) AS total, COUNT(DISTINCT e.file_id) AS files
+        FROM entities e
+        {alias_join}
+        {where}
+        GROUP BY name HAVING files >= ?
+        ORDER BY files DESC, name LIMIT ?
+    """, ([label] if label else []) + [min_files, limit]).fetchall()
+
+
+def entity_totals(conn, name):
+    """(label, mentions, files) of canonical name `name` and its aliases, or None if unknown."""
+    alias_join, condition, params = canonical_filter(conn, name)
+    row = conn.execute(f"""
+        SELECT e.entity_label, SUM(e.count), COUNT(DISTINCT e.file_id)
+        FROM entities e
+        {alias_join}
+        WHERE {condition}
+    """, params).fetchone()
+    return row if row[1] is not None else None
+
+
+def load_graph_metrics(conn):
+    """
+    Node metrics of the newest NER run of scripts/graph_metrics.py
+    (--ner-db) as {name: row}, or {} when it has not been run.
+    """
+    has_runs = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='metrics_runs'").fetchone()
+    if not has_runs:
+        return {}
+    cursor = conn.execute("""
+        SELECT node, degree, betweenness, eigenvector, community FROM node_metrics
+        WHERE version = (SELECT MAX(version) FROM metrics_runs WHERE source = 'ner')
+    """)
+    columns = [d[0] for d in cursor.description]
+    return {row[0]: dict(zip(columns, row)) for row in cursor}
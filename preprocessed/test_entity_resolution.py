@@ -0,0 +1,45 @@
+"""Tests for entity_resolution.resolve_names (run: python -m pytest preprocessed)."""
+
+from entity_resolution import resolve_names
+
+
+def resolve(names, files):
+    return dict(zip(names, (canonical for canonical, _ in resolve_names(names, files))))
+
+
+def test_initials_and_surnames_do_not_chain_people():
+    names = ["jeffrey epstein", "jane epstein", "j epstein", "mark epstein", "m epstein", "epstein"]
+    result = resolve(names, [50, 10, 30, 5, 3, 20])
+    assert result["jeffrey epstein"] == "jeffrey epstein"
+    assert result["jane epstein"] == "jane epstein"
+    assert result["mark epstein"] == "mark epstein"
+    # "j" fits both Jeffrey and Jane, "epstein" all three: left on their own
+    assert result["j epstein"] == "j epstein"
+    assert result["epstein"] == "epstein"
+    # "m" fits only Mark
+    assert result["m epstein"] == "mark epstein"
+
+
+def test_abbreviations_join_the_only_fitting_person():
+    names = ["ghislaine maxwell", "g maxwell", "ghislane maxwel", "maxwell", "jeffrey e", "jeffrey epstein"]
+    result = resolve(names, [40, 10, 3, 8, 2, 50])
+    assert result["g maxwell"] == "ghislaine maxwell"
+    assert result["ghislane maxwel"] == "ghislaine maxwell"
+    assert result["maxwell"] == "ghislaine maxwell"
+    assert result["jeffrey e"] == "jeffrey epstein"
+
+
+def test_candidates_are_checked_against_the_canonical():
+    # Each neighbour is one edit apart, the ends are not
+    names = ["anna smith", "anne smith", "anne smyth", "anny smyth"]
+    result = resolve(names, [10, 5, 3, 1])
+    assert result["anna smith"] == "anna smith"
+    assert result["anne smith"] == "anna smith"
+    assert result["anne smyth"] != "anna smith"
+    assert result["anny smyth"] != "anna smith"
+
+
+def test_suffixes_stay_apart():
+    result = resolve(["donald trump", "donald trump jr", "d trump"], [30, 10, 5])
+    assert result["donald trump jr"] == "donald trump jr"
+    assert result["d trump"] == "donald trump"
@@ -0,0 +1,62 @@
+"""Tests for the canonical-name counts in ner_metrics (run: python -m pytest preprocessed)."""
+
+import sqlite3
+
+import pytest
+
+from ner_metrics import canonical_filter, entity_totals, top_entity_counts
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE files (id INTEGER PRIMARY KEY, filename TEXT);
+        CREATE TABLE entities (file_id INTEGER, entity_text TEXT, entity_label TEXT,
+                               normalized TEXT, count INTEGER);
+        CREATE TABLE entity_aliases (alias TEXT, label TEXT, canonical TEXT, score REAL);
+        INSERT INTO files VALUES (1, 'a.pdf'), (2, 'b.pdf'), (3, 'c.pdf'), (4, 'd.pdf');
+        INSERT INTO entities VALUES
+            (1, 'Jeffrey Epstein', 'PERSON', 'jeffrey epstein', 4),
+            (2, 'J. Epstein', 'PERSON', 'j. epstein', 2),
+            (3, 'J. Epstein', 'PERSON', 'j. epstein', 1),
+            (3, 'Jeffrey Epstein', 'PERSON', 'jeffrey epstein', 1),
+            (1, 'Les Wexner', 'PERSON', 'les wexner', 1),
+            (2, 'Les Wexner', 'PERSON', 'les wexner', 1),
+            (4, 'Epstein', 'ORG', 'j. epstein', 5);
+        INSERT INTO entity_aliases VALUES
+            ('jeffrey epstein', 'PERSON', 'jeffrey epstein', 1.0),
+            ('j. epstein', 'PERSON', 'jeffrey epstein', 0.9),
+            ('les wexner', 'PERSON', 'les wexner', 1.0);
+    """)
+    yield conn
+    conn.close()
+
+
+def test_alias_counts_roll_up_to_canonical(conn):
+    top = top_entity_counts(conn, min_files=3, limit=10)
+    # Neither spelling alone is in 3 files; together they are
+    assert top == [("jeffrey epstein", "PERSON", 8, 3)]
+
+
+def test_entity_totals_include_aliases(conn):
+    assert entity_totals(conn, "jeffrey epstein") == ("PERSON", 8, 3)
+    assert entity_totals(conn, "les wexner") == ("PERSON", 2, 2)
+    # A PERSON alias no longer counts on its own; the ORG spelled the same does
+    assert entity_totals(conn, "j. epstein") == ("ORG", 5, 1)
+    assert entity_totals(conn, "nobody") is None
+
+
+def test_canonical_filter_selects_alias_rows(conn):
+    alias_join, condition, params = canonical_filter(conn, "jeffrey epstein")
+    files = {fid for (fid,) in conn.execute(
+        f"SELECT e.file_id FROM entities e {alias_join} WHERE {condition}", params)}
+    # The ORG row spelled like the alias keeps its own name
+    assert files == {1, 2, 3}
+
+
+def test_without_aliases_names_are_their_own(conn):
+    conn.execute("DROP TABLE entity_aliases")
+    assert entity_totals(conn, "jeffrey epstein") == ("PERSON", 5, 2)
+    assert top_entity_counts(conn, min_files=2, limit=10) == [
+        ("j. epstein", "PERSON", 3, 2), ("jeffrey epstein", "PERSON", 5, 2), ("les wexner", "PERSON", 2, 2)]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Offline ingest source over Arrow / Parquet files.
+
+Reads the Hugging Face datasets cache (Arrow IPC files) or a local Parquet
+export through memory maps, one record batch at a time, so ingest needs no
+network and only one batch of rows is decoded into Python objects at once.
+An ArrowSource is just file paths plus a row range, so pool workers can be
+handed contiguous shards that they memory-map themselves.
+"""
+
+import hashlib
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Columns parse_item() and thread_hash() read; others are never decoded
+COLUMNS = ('thread_id', 'source_file', 'subject', 'messages')
+
+
+def cached_arrow_files(dataset_name, split='train', cache_dir=None):
+    """
+    Return the Arrow files of `split` in the most recently written cache
+    version of `dataset_name` (the cache does not record the revision).
+    """
+    from datasets import config
+
+    root = Path(cache_dir or config.HF_DATASETS_CACHE) / dataset_name.replace('/', '___')
+    files = list(root.glob(f"**/*-{split}.arrow")) + list(root.glob(f"**/*-{split}-*-of-*.arrow"))
+    if not files:
+        raise FileNotFoundError(
+            f"No cached Arrow files for {dataset_name} ({split}) under {root}; "
+            "run once online or pass a Parquet export with --source"
+        )
+    latest = max({f.parent for f in files}, key=lambda d: d.stat().st_mtime)
+    return sorted(f for f in files if f.parent == latest)
+
+
+def resolve_paths(path):
+    """Expand a file or a directory into its .parquet / .arrow files."""
+    path = Path(path)
+    if path.is_dir():
+        files = sorted(path.glob("*.parquet")) or sorted(path.glob("*.arrow"))
+        if not files:
+            raise FileNotFoundError(f"No .parquet or .arrow files in {path}")
+        return files
+    if not path.exists():
+        raise FileNotFoundError(path)
+    return [path]
+
+
+def open_ipc(path):
+    """Open an Arrow file (IPC file or stream format) over a memory map."""
+    source = pa.memory_map(str(path))
+    try:
+        reader = pa.ipc.open_file(source)
+        return (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        # The datasets cache writes the streaming format
+        source.seek(0)
+        return iter(pa.ipc.open_stream(source))
+
+
+class ArrowSource:
+    """
+    Rows [start, stop) of one or more Arrow / Parquet files, iterated as
+    dicts like a datasets.Dataset.
+    """
+
+    def __init__(self, paths, start=0, stop=None, batch_rows=10_000):
+        self.paths = [Path(p) for p in paths]
+        self.batch_rows = batch_rows
+        self._file_rows = [self._count_rows(p) for p in self.paths]
+        total = sum(self._file_rows)
+        self.start = min(start, total)
+        self.stop = total if stop is None else min(stop, total)
+        # Same attribute as datasets.Dataset, recorded in ingest_meta
+        digest = hashlib.sha1()
+        for p in self.paths:
+            stat = p.stat()
+            digest.update(f"{p.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        self._fingerprint = digest.hexdigest()
+
+    @classmethod
+    def from_path(cls, path, **kwargs):
+        return cls(resolve_paths(path), **kwargs)
+
+    @staticmethod
+    def _count_rows(path):
+        if path.suffix == '.parquet':
+            return pq.ParquetFile(str(path)).metadata.num_rows
+        return sum(batch.num_rows for batch in open_ipc(path))
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def shard(self, num_shards, index, contiguous=True):
+        """Contiguous shard `index` of `num_shards`, as datasets.Dataset.shard."""
+        if not contiguous:
+            raise ValueError("ArrowSource only supports contiguous shards")
+        size, extra = divmod(len(self), num_shards)
+        start = self.start + index * size + min(index, extra)
+        stop = start + size + (1 if index < extra else 0)
+        shard = object.__new__(ArrowSource)
+        shard.__dict__.update(self.__dict__, start=start, stop=stop)
+        return shard
+
+    def iter_batches(self):
+        """Yield the record batches (sliced to the row range) in file order."""
+        offset = 0
+        for path, num_rows in zip(self.paths, self._file_rows):
+            if offset < self.stop and offset + num_rows > self.start:
+                skipped, batches = self._open(path, self.start - offset)
+                batch_offset = offset + skipped
+                for batch in batches:
+                    lo = max(self.start - batch_offset, 0)
+                    hi = min(self.stop - batch_offset, batch.num_rows)
+                    batch_offset += batch.num_rows
+                    if lo < hi:
+                        yield batch.slice(lo, hi - lo)
+                    if batch_offset >= self.stop:
+                        break
+            offset += num_rows
+
+    def _open(self, path, first_row):
+        """
+        Return (rows skipped, batch iterator) for one file. Parquet row
+        groups that end before `first_row` are not read at all.
+        """
+        if path.suffix != '.parquet':
+            return 0, (batch.select([c for c in COLUMNS if c in batch.schema.names])
+                       for batch in open_ipc(path))
+
+        parquet = pq.ParquetFile(str(path), memory_map=True)
+        columns = [c for c in COLUMNS if c in parquet.schema_arrow.names]
+        skipped = 0
+        row_groups = []
+        for i in range(parquet.metadata.num_row_groups):
+            group_rows = parquet.metadata.row_group(i).num_rows
+            if not row_groups and skipped + group_rows <= first_row:
+                skipped += group_rows
+            else:
+                row_groups.append(i)
+        return skipped, parquet.iter_batches(batch_size=self.batch_rows,
+                                             row_groups=row_groups, columns=columns)
+
+    def __iter__(self):
+        for batch in self.iter_batches():
+            names = batch.schema.names
+            columns = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+            for values in zip(*columns):
+                yield dict(zip(names, values))
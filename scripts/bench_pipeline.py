@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark the email pipeline on synthetic corpora.
+
+For each corpus size a synthetic dump is generated (synth_emails.py, cached
+by size and seed), then every stage runs in its own process against a
+scratch database:
+
+  ingest          process_emails.py --bulk --source <corpus>
+  build_graph     build_graph.py (network, 3D embedding, exports, summary)
+  expand_analysis expand_analysis.py without topic embeddings
+
+Reports wall time, threads/s, peak RSS (the largest single process,
+including pool workers) and the database size after the stage, plus the
+per-stage timings build_graph.py records (extraction, export, network,
+embedding, summary). Results can be saved as JSON and compared against an
+earlier run.
+"""
+
+import argparse
+import contextlib
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from synth_emails import generate, parse_size
+
+PROJECT_ROOT = Path(__file__).parent.parent
+BENCH_DIR = PROJECT_ROOT / "data" / "bench"
+STAGES = ("ingest", "build_graph", "expand_analysis")
+# Slowdown (relative to --compare) reported as a regression
+REGRESSION_THRESHOLD = 0.20
+
+
+def run_stage(stage, db_path, source, workdir, workers):
+    """
+    Run one stage in this process (called in a child by bench()). Returns
+    a dict of sub-stage timings in seconds, empty if the stage has none.
+    """
+    if stage == "ingest":
+        import process_emails
+        process_emails.DB_PATH = db_path
+        process_emails.process_dataset(bulk=True, workers=workers, source=str(source))
+    elif stage == "build_graph":
+        import build_graph
+        build_graph.DB_PATH = db_path
+        build_graph.OUTPUT_DIR = build_graph.DATA_DIR = workdir
+        build_graph.main([])
+        return dict(build_graph.STAGE_TIMINGS)
+    elif stage == "expand_analysis":
+        import expand_analysis
+        expand_analysis.DB_PATH = db_path
+        expand_analysis.OUTPUT_DIR = workdir
+        # Embeddings load a language model; that cost does not scale with the corpus
+        expand_analysis.generate_embeddings = lambda snippets, **kwargs: None
+        expand_analysis.main()
+    else:
+        raise ValueError(f"Unknown stage {stage}")
+    return {}
+
+
+def peak_rss_kib():
+    """
+    Peak RSS of this process and its reaped children, in KiB. VmHWM is used
+    for this process because ru_maxrss survives exec and would include the
+    parent's memory at fork time.
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        with open("/proc/self/status") as f:
+            own = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        pass
+    return max(own, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def child_main(args):
+    """Run a stage with its output sent to a log and print one JSON line."""
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with open(workdir / f"{args.stage}.log", "w") as log, contextlib.redirect_stdout(log):
+        substages = run_stage(args.stage, Path(args.db), args.source, workdir, args.workers)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_rss_kib() / 1024, "substages": substages}))
+
+
+def bench(sizes, seed=0, workers=1, stages=STAGES, bench_dir=BENCH_DIR):
+    """Run the stages for every corpus size and return a list of result dicts."""
+    results = []
+    for threads in sizes:
+        corpus = bench_dir / f"emails_{threads}_{seed}.parquet"
+        if not corpus.exists():
+            print(f"Generating {threads:,} synthetic threads...")
+            generate(corpus, threads, seed=seed)
+        workdir = bench_dir / f"run_{threads}_{seed}"
+        workdir.mkdir(parents=True, exist_ok=True)
+        db_path = workdir / "epstein_emails.db"
+        if "ingest" in stages and db_path.exists():
+            db_path.unlink()
+
+        for stage in stages:
+            print(f"[{threads:,} threads] {stage}...")
+            proc = subprocess.run(
+                [sys.executable, __file__, "--run-stage", stage, "--db", str(db_path),
+                 "--source", str(corpus), "--workdir", str(workdir), "--workers", str(workers)],
+                capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                print(proc.stderr)
+                print(f"  {stage} failed (log: {workdir / (stage + '.log')})")
+                if stage == "ingest":
+                    break
+                continue
+            measured = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append({
+                "threads": threads,
+                "stage": stage,
+                "seconds": round(measured["seconds"], 3),
+                "threads_per_sec": round(threads / max(measured["seconds"], 1e-9), 1),
+                "peak_rss_mb": round(measured["peak_rss_mb"], 1),
+                "db_mb": round(db_path.stat().st_size / 1e6, 1) if db_path.exists() else None,
+                "substages": {name: round(seconds, 3) for name, seconds in measured["substages"].items()},
+            })
+    return results
+
+
+def print_report(results, baseline=None):
+    previous = {(r["threads"], r["stage"]): r for r in baseline or []}
+    print(f"\n{'threads':>10} {'stage':16} {'seconds':>9} {'threads/s':>10} {'peak RSS MB':>12} {'DB MB':>8}"
+          + ("   vs baseline" if baseline else ""))
+    regressions = []
+    for r in results:
+        line = (f"{r['threads']:>10,} {r['stage']:16} {r['seconds']:9.2f} {r['threads_per_sec']:10.0f} "
+                f"{r['peak_rss_mb']:12.1f} {r['db_mb'] if r['db_mb'] is not None else '-':>8}")
+        old = previous.get((r["threads"], r["stage"]))
+        if old:
+            change = r["seconds"] / max(old["seconds"], 1e-9) - 1
+            line += f"   {change:+.0%} time, {r['peak_rss_mb'] - old['peak_rss_mb']:+.0f} MB"
+            if change > REGRESSION_THRESHOLD:
+                line += "  REGRESSION"
+                regressions.append(r)
+        print(line)
+        old_substages = old.get("substages", {}) if old else {}
+        for name, seconds in r.get("substages", {}).items():
+            line = f"{'':>10}   {name:14} {seconds:9.2f}"
+            if name in old_substages:
+                line += f"{'':>33}   {seconds / max(old_substages[name], 1e-9) - 1:+.0%} time"
+            print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", nargs="+", type=parse_size, default=[10_000],
+                        help="corpus sizes, e.g. 10k 100k 1m")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="ingest worker processes")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--bench-dir", type=Path, default=BENCH_DIR)
+    parser.add_argument("--save", type=Path, default=None, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, default=None,
+                        help="JSON results of an earlier run; exits 1 on a regression")
+    # Internal: run a single stage in this process
+    parser.add_argument("--run-stage", choices=STAGES, dest="stage", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        child_main(args)
+        return
+
+    results = bench(args.threads, seed=args.seed, workers=args.workers,
+                    stages=args.stages, bench_dir=args.bench_dir)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    regressions = print_report(results, baseline)
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+        print(f"\nSaved results to {args.save}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark compressed message storage.
+Copies epstein_emails.db, compresses the copy with email_store.compress_bodies
+and compares file size and full-scan time before and after.
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from email_store import compress_bodies, connect
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DB_PATH = PROJECT_ROOT / "preprocessed" / "epstein_emails.db"
+
+
+def scan(db_path):
+    """Read and decode every thread and message body; return (seconds, chars)."""
+    conn = connect(db_path)
+    start = time.perf_counter()
+    chars = 0
+    for (messages_json,) in conn.execute("SELECT body_text(messages_json) FROM emails"):
+        chars += len(json.dumps(json.loads(messages_json))) if messages_json else 0
+    for (body,) in conn.execute("SELECT body_text(body) FROM messages"):
+        chars += len(body or "")
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="database to benchmark (left untouched)")
+    parser.add_argument("--level", type=int, default=9, help="zstd compression level")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = Path(tmp) / "plain.db"
+        packed = Path(tmp) / "compressed.db"
+        shutil.copyfile(args.db, plain)
+        shutil.copyfile(args.db, packed)
+
+        conn = connect(plain)
+        conn.execute("VACUUM")
+        conn.close()
+
+        conn = connect(packed)
+        start = time.perf_counter()
+        compressed = compress_bodies(conn, level=args.level)
+        conn.execute("VACUUM")
+        compress_time = time.perf_counter() - start
+        conn.close()
+
+        results = []
+        for label, path in (("plain", plain), ("compressed", packed)):
+            scan_time, chars = scan(path)
+            results.append((label, path.stat().st_size, scan_time, chars))
+
+    print(f"Compressed {compressed:,} values in {compress_time:.1f}s (level {args.level})")
+    print(f"{'storage':12} {'size (MB)':>10} {'scan (s)':>9}")
+    for label, size, scan_time, _ in results:
+        print(f"{label:12} {size / 1e6:10.1f} {scan_time:9.2f}")
+    if results[0][3] != results[1][3]:
+        print("WARNING: scans returned different amounts of text")
+    print(f"Size ratio: {results[0][1] / max(results[1][1], 1):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,28 @@ Build Epstein Email relationship graph visualizations.
 Uses preprocessed email data from the epstein_emails.db database.
 """
 
-import sqlite3
+import argparse
 import json
 import os
 import sys
-from collections import defaultdict
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import networkx as nx
+from pyvis.edge import Edge
 from pyvis.network import Network
 
+import embedding as embedding_lib
+import graph_csr
+import graph_metrics
+import layout
+import lod_export
+from email_store import connect, has_table
+
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
 DB_PATH = PROJECT_ROOT / "preprocessed" / "epstein_emails.db"
@@ -25,195 +35,123 @@ DATA_DIR = PROJECT_ROOT / "data" / "processed"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-# Name normalization mapping - merge variations of the same person
-NAME_CANONICALIZATION = {
-    # Jeffrey Epstein variations
-    'jeffrey e.': 'jeffrey epstein',
-    'jeffrey epstein': 'jeffrey epstein',
-    'jeevacation': 'jeffrey epstein',
-    'j': 'jeffrey epstein',
-    'jeff epstein': 'jeffrey epstein',
-    'jeff': 'jeffrey epstein',
-    'je': 'jeffrey epstein',
-    'ee': 'jeffrey epstein',
-    
-    # Ghislaine Maxwell
-    'ghislaine': 'ghislaine maxwell',
-    'maxwell': 'ghislaine maxwell',
-    'g.maxwell': 'ghislaine maxwell',
-    
-    # Reid Weingarten variations
-    'weingarten': 'reid weingarten',
-    'weingarten, reid': 'reid weingarten',
-    'reid': 'reid weingarten',
-    
-    # Common variations
-    'unknown': None,  # Exclude
-}
-
-# Emails that identify the same person
-EMAIL_CANONICALIZATION = {
-    'jeevacation@gmail.com': 'jeffrey epstein',
-}
+# Seconds per stage of the last main() run (read by bench_pipeline.py)
+STAGE_TIMINGS = {}
 
 
-def get_db_connection():
-    """Get SQLite database connection."""
-    return sqlite3.connect(str(DB_PATH))
+@contextmanager
+def timed(stage):
+    """Record the wall time of a build stage in STAGE_TIMINGS."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_TIMINGS[stage] = time.perf_counter() - start
 
 
-def normalize_name(name, email=None):
-    """Normalize and canonicalize name."""
-    if not name:
-        return None
-    
-    name_lower = name.lower().strip()
-    
-    # Check email canonicalization first
-    if email and email.lower() in EMAIL_CANONICALIZATION:
-        return EMAIL_CANONICALIZATION[email.lower()]
-    
-    # Check name canonicalization
-    if name_lower in NAME_CANONICALIZATION:
-        return NAME_CANONICALIZATION[name_lower]
-    
-    # Filter out noise
-    if name_lower in ('unknown', 'none', 'n/a', '', 'redacted'):
-        return None
-    
-    # Return cleaned name
-    return name_lower
+def get_db_connection():
+    """Get SQLite database connection (compressed message text readable via body_text())."""
+    return connect(DB_PATH)
 
 
 def extract_person_entities(conn, min_threads=3):
-    """Extract person entities with minimum thread threshold, merged by canonical name."""
+    """
+    Extract canonical persons (name variants merged at ingest) with at
+    least `min_threads` threads.
+    """
     query = """
-    SELECT p.id, p.name, p.email, p.total_threads
-    FROM people p
-    WHERE p.total_threads >= ?
-    ORDER BY p.total_threads DESC
+    SELECT id AS canonical_id, name AS normalized, total_threads AS total, emails
+    FROM canonical_person
+    WHERE total_threads >= ?
+    ORDER BY total_threads DESC, id
     """
     
-    cursor = conn.execute(query, (min_threads,))
-    
-    # Merge by canonical name
-    canonical_data = defaultdict(lambda: {'total_threads': 0, 'ids': [], 'emails': set()})
-    
-    for row in cursor:
-        person_id, name, email, total_threads = row
-        canonical = normalize_name(name, email)
-        
-        if canonical is None:
-            continue
-        
-        canonical_data[canonical]['total_threads'] += total_threads
-        canonical_data[canonical]['ids'].append(person_id)
-        if email:
-            canonical_data[canonical]['emails'].add(email)
-    
-    # Convert to DataFrame format
-    rows = []
-    for canonical, data in canonical_data.items():
-        rows.append({
-            'normalized': canonical,
-            'total': data['total_threads'],
-            'file_count': data['total_threads'],  # Use threads as file count
-            'person_ids': data['ids'],
-            'emails': list(data['emails'])
-        })
-    
-    df = pd.DataFrame(rows)
-    df = df.sort_values('total', ascending=False).reset_index(drop=True)
-    
-    return df
+    df = pd.read_sql_query(query, conn, params=(min_threads,))
+    df['file_count'] = df['total']  # Use threads as file count
+    df['emails'] = [sorted(json.loads(emails)) if emails else [] for emails in df['emails']]
+    return df[['canonical_id', 'normalized', 'total', 'file_count', 'emails']]
 
 
 def extract_cooccurrences(conn, person_df, min_cooccur=2):
-    """Extract co-occurrences between persons, using canonical names."""
-    # Build mapping from person_id to canonical name
-    id_to_canonical = {}
-    for _, row in person_df.iterrows():
-        for pid in row['person_ids']:
-            id_to_canonical[pid] = row['normalized']
-    
-    # Get all co-occurrences
-    query = """
-    SELECT person_a, person_b, thread_count 
-    FROM person_cooccurrence 
-    WHERE thread_count >= 1
-    """
-    
-    cursor = conn.execute(query)
-    
-    # Merge by canonical pairs
-    canonical_cooccur = defaultdict(int)
-    
-    for row in cursor:
-        p_a, p_b, count = row
-        
-        canonical_a = id_to_canonical.get(p_a)
-        canonical_b = id_to_canonical.get(p_b)
-        
-        if canonical_a is None or canonical_b is None:
-            continue
-        if canonical_a == canonical_b:
-            continue  # Skip self-loops
-        
-        # Ensure consistent ordering
-        pair = tuple(sorted([canonical_a, canonical_b]))
-        canonical_cooccur[pair] += count
-    
-    # Convert to DataFrame
-    rows = []
-    for (a, b), count in canonical_cooccur.items():
-        if count >= min_cooccur:
-            rows.append({
-                'entity_a': a,
-                'entity_b': b,
-                'file_count': count
-            })
-    
-    df = pd.DataFrame(rows)
-    if len(df) > 0:
-        df = df.sort_values('file_count', ascending=False).reset_index(drop=True)
+    """Extract co-occurrences (summed over name variants) between the persons in person_df."""
+    pairs = pd.read_sql_query(
+        "SELECT canonical_a, canonical_b, thread_count AS file_count "
+        "FROM canonical_cooccurrence WHERE thread_count >= ?",
+        conn, params=(min_cooccur,)
+    )
     
-    return df
+    # Map canonical ids to names; the inner merges keep only persons in person_df
+    names = person_df[['canonical_id', 'normalized']]
+    pairs = (pairs
+             .merge(names.rename(columns={'canonical_id': 'canonical_a', 'normalized': 'name_a'}))
+             .merge(names.rename(columns={'canonical_id': 'canonical_b', 'normalized': 'name_b'})))
+    
+    # Ensure consistent ordering, and merge pairs that end up with the same names
+    swap = pairs['name_a'] > pairs['name_b']
+    pairs['entity_a'] = pairs['name_a'].where(~swap, pairs['name_b'])
+    pairs['entity_b'] = pairs['name_b'].where(~swap, pairs['name_a'])
+    merged = pairs.groupby(['entity_a', 'entity_b'], as_index=False, sort=False)['file_count'].sum()
+    
+    return (merged
+            .sort_values(['file_count', 'entity_a', 'entity_b'], ascending=[False, True, True], kind='stable')
+            .reset_index(drop=True)[['entity_a', 'entity_b', 'file_count']])
 
 
-def build_network_graph(persons_df, cooccur_df, output_path, top_n=150):
-    """Build and save force-directed network graph."""
-    print(f"Building network graph with top {top_n} people...")
-    
+def network_graph(persons_df, cooccur_df, top_n=150):
+    """NetworkX graph of the top_n people and their co-occurrences, isolates removed."""
     # Create NetworkX graph
     G = nx.Graph()
     
     # Get top N persons by thread count (excluding Epstein himself for cleaner viz)
-    top_persons = set(persons_df.head(top_n)['normalized'].tolist())
+    top = persons_df.head(top_n)
+    names = top['normalized'].tolist()
+    titles = top['normalized'].str.title().tolist()
     
     # Add nodes
-    for _, row in persons_df.iterrows():
-        name = row['normalized']
-        if name in top_persons:
-            G.add_node(name, 
-                      size=min(50, 10 + row['total'] / 50),
-                      title=f"{name.title()}\nThreads: {row['total']}\nEmails: {', '.join(row.get('emails', [])[:3])}",
-                      label=name.title()[:25])
+    sizes = np.minimum(50, 10 + top['total'].to_numpy() / 50).tolist()
+    emails = [', '.join(e[:3]) for e in top['emails']]
+    G.add_nodes_from(
+        (name, {'size': size,
+                'title': f"{title}\nThreads: {total}\nEmails: {email}",
+                'label': title[:25]})
+        for name, title, size, total, email in zip(names, titles, sizes, top['total'].tolist(), emails)
+    )
     
     # Add edges
-    for _, row in cooccur_df.iterrows():
-        a, b = row['entity_a'], row['entity_b']
-        if a in top_persons and b in top_persons and a != b:
-            G.add_edge(a, b, weight=row['file_count'], 
-                      title=f"Co-occur in {row['file_count']} threads")
+    top_set = top['normalized']
+    edges = cooccur_df[cooccur_df['entity_a'].isin(top_set) & cooccur_df['entity_b'].isin(top_set)
+                       & (cooccur_df['entity_a'] != cooccur_df['entity_b'])]
+    G.add_edges_from(
+        (a, b, {'weight': w, 'title': f"Co-occur in {w} threads"})
+        for a, b, w in zip(edges['entity_a'], edges['entity_b'], edges['file_count'].tolist())
+    )
     
     # Remove isolated nodes
     G.remove_nodes_from(list(nx.isolates(G)))
+    return G
+
+
+def build_network_graph(persons_df, cooccur_df, output_path, top_n=150, positions_path=None):
+    """
+    Build and save force-directed network graph. The layout is computed
+    here (layout.forceatlas2) and shipped with physics off; it warm-starts
+    from, and is saved back to, `positions_path` when given.
+    """
+    print(f"Building network graph with top {top_n} people...")
+    G = network_graph(persons_df, cooccur_df, top_n)
     
     print(f"Graph has {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
     
-    # Create PyVis network
+    # Precompute the layout (warm start from the previous build)
+    previous = layout.load_positions(positions_path) if positions_path else {}
+    positions = layout.forceatlas2(G, pos=previous)
+    if positions_path:
+        layout.save_positions(positions_path, positions)
+    screen = layout.to_screen(positions)
+    
+    # Create PyVis network; positions are fixed, so the browser does not simulate
     net = Network(height="900px", width="100%", bgcolor="#222222", font_color="white")
-    net.barnes_hut(gravity=-30000, central_gravity=0.3, spring_length=200)
+    net.toggle_physics(False)
     
     # Add nodes with colors based on degree
     degrees = dict(G.degree())
@@ -231,14 +169,19 @@ def build_network_graph(persons_df, cooccur_df, output_path, top_n=150):
                     label=node.title()[:25],
                     title=G.nodes[node].get('title', node),
                     size=G.nodes[node].get('size', 15),
-                    color=color)
-    
-    # Add edges
-    for u, v, data in G.edges(data=True):
-        weight = data.get('weight', 1)
-        net.add_edge(u, v, 
-                    value=weight,
-                    title=data.get('title', ''))
+                    color=color,
+                    x=screen[node][0],
+                    y=screen[node][1],
+                    physics=False)
+    
+    # Add edges. Network.add_edge() scans every existing edge for a
+    # duplicate, and add_edges() drops value and title; G cannot hold
+    # duplicates, so build the edge dicts directly (relies on pyvis
+    # internals, hence the pin in preprocessed/requirements.txt)
+    net.edges.extend(
+        Edge(u, v, value=data.get('weight', 1), title=data.get('title', '')).options
+        for u, v, data in G.edges(data=True)
+    )
     
     # Save
     net.save_graph(str(output_path))
@@ -247,50 +190,34 @@ def build_network_graph(persons_df, cooccur_df, output_path, top_n=150):
     return G
 
 
-def build_3d_embedding(persons_df, cooccur_df, output_path, top_n=200):
-    """Build 3D embedding visualization using UMAP."""
+def build_3d_embedding(persons_df, cooccur_df, output_path, top_n=200, method="umap"):
+    """
+    Build 3D embedding visualization. `method` is one of embedding.METHODS:
+    "umap" runs UMAP on the dense matrix; the sparse methods scale to
+    tens of thousands of people.
+    """
     import plotly.graph_objects as go
-    from sklearn.preprocessing import normalize
     
-    print(f"Building 3D embedding with top {top_n} people...")
+    print(f"Building 3D embedding with top {top_n} people ({method})...")
     
     # Get top persons DataFrame
     top_persons_df = persons_df.head(top_n)
     top_persons = top_persons_df['normalized'].tolist()
     person_idx = {p: i for i, p in enumerate(top_persons)}
     
-    # Build co-occurrence matrix
-    n = len(top_persons)
-    cooccur_matrix = np.zeros((n, n))
-    
-    for _, row in cooccur_df.iterrows():
-        a, b = row['entity_a'], row['entity_b']
-        if a in person_idx and b in person_idx:
-            i, j = person_idx[a], person_idx[b]
-            cooccur_matrix[i, j] = row['file_count']
-            cooccur_matrix[j, i] = row['file_count']
-    
-    # Add self-connections based on thread count
-    for _, row in top_persons_df.iterrows():
-        name = row['normalized']
-        if name in person_idx:
-            i = person_idx[name]
-            cooccur_matrix[i, i] = row['total']
+    # Build sparse log1p co-occurrence matrix, self-connections from thread count
+    i = cooccur_df['entity_a'].map(person_idx)
+    j = cooccur_df['entity_b'].map(person_idx)
+    keep = (i.notna() & j.notna()).to_numpy()
+    cooccur_matrix = embedding_lib.cooccurrence_matrix(
+        len(top_persons),
+        i[keep].astype(int).to_numpy(), j[keep].astype(int).to_numpy(),
+        cooccur_df['file_count'].to_numpy()[keep],
+        diagonal=top_persons_df['total'].to_numpy(),
+    )
     
-    # Normalize
-    cooccur_matrix = np.log1p(cooccur_matrix)
-    
-    # Use UMAP for dimensionality reduction
-    try:
-        import umap
-        reducer = umap.UMAP(n_components=3, n_neighbors=15, min_dist=0.1, 
-                          metric='cosine', random_state=42)
-        embedding = reducer.fit_transform(cooccur_matrix)
-    except Exception as e:
-        print(f"UMAP failed: {e}, using PCA fallback")
-        from sklearn.decomposition import PCA
-        pca = PCA(n_components=3)
-        embedding = pca.fit_transform(cooccur_matrix)
+    # Reduce to 3D
+    embedding = embedding_lib.embed(cooccur_matrix, method)
     
     # Get metadata for hover
     mentions = top_persons_df.set_index('normalized')['total'].to_dict()
@@ -299,7 +226,7 @@ def build_3d_embedding(persons_df, cooccur_df, output_path, top_n=200):
     sizes = [min(30, 5 + mentions.get(p, 0) / 100) for p in top_persons]
     
     # Color based on connectivity
-    connectivity = cooccur_matrix.sum(axis=1)
+    connectivity = np.asarray(cooccur_matrix.sum(axis=1)).ravel()
     
     # Create hover text
     hover_text = [
@@ -346,8 +273,13 @@ def build_3d_embedding(persons_df, cooccur_df, output_path, top_n=200):
     return embedding
 
 
-def generate_summary(persons_df, cooccur_df, G, conn, output_path):
-    """Generate summary report."""
+def generate_summary(persons_df, cooccur_df, G, conn, output_path, metrics_version=None):
+    """
+    Generate summary report. Bridge people and communities are read from
+    graph_metrics version `metrics_version` (computed if None), so they
+    describe the metrics graph (the top METRICS_TOP_N people, betweenness
+    sampled at its epsilon), not the 150-node network G; the report says so.
+    """
     print("Generating summary report...")
     
     # Get total email count
@@ -391,29 +323,35 @@ def generate_summary(persons_df, cooccur_df, G, conn, output_path):
     for i, (name, degree) in enumerate(top_connected, 1):
         summary.append(f"| {i} | {name.title()} | {degree} |")
     
+    # Centrality and communities come from the graph_metrics stage
+    if metrics_version is None:
+        metrics_version = graph_metrics.ensure_metrics(conn, workers=os.cpu_count() or 1)
+    node_metrics = graph_metrics.load_node_metrics(conn, metrics_version)
+    node_count, edge_count, params = conn.execute(
+        "SELECT node_count, edge_count, params FROM metrics_runs WHERE version = ?", (metrics_version,)
+    ).fetchone()
+    epsilon = json.loads(params)['epsilon']
+    # graph_metrics stores --epsilon 0 (exact) as None
+    method = "exact betweenness" if epsilon is None else f"betweenness with epsilon {epsilon}"
+    summary.append(f"\nBridge people and communities below are computed on the graph_metrics graph "
+                   f"({node_count} nodes, {edge_count} edges; {method}), "
+                   f"not the {G.number_of_nodes()}-node network above.")
+    
     # Betweenness centrality (bridge nodes)
-    try:
-        betweenness = nx.betweenness_centrality(G)
-        top_bridges = sorted(betweenness.items(), key=lambda x: -x[1])[:15]
-        summary.append("\n### Key Bridge People (high betweenness centrality)\n")
-        summary.append("These people connect otherwise separate groups.\n")
-        summary.append("| Rank | Name | Centrality |")
-        summary.append("|------|------|------------|")
-        for i, (name, score) in enumerate(top_bridges, 1):
-            summary.append(f"| {i} | {name.title()} | {score:.4f} |")
-    except:
-        pass
+    top_bridges = sorted(node_metrics.values(), key=lambda m: (-m['betweenness'], m['node']))[:15]
+    summary.append("\n### Key Bridge People (high betweenness centrality)\n")
+    summary.append("These people connect otherwise separate groups.\n")
+    summary.append("| Rank | Name | Centrality |")
+    summary.append("|------|------|------------|")
+    for i, m in enumerate(top_bridges, 1):
+        summary.append(f"| {i} | {m['node'].title()} | {m['betweenness']:.4f} |")
     
     # Community detection
-    try:
-        communities = list(nx.community.louvain_communities(G, seed=42))
-        summary.append(f"\n### Detected Communities: {len(communities)}\n")
-        for i, comm in enumerate(sorted(communities, key=len, reverse=True)[:7], 1):
-            members = sorted(comm, key=lambda x: -degrees.get(x, 0))[:8]
-            members_str = ", ".join([m.title() for m in members])
-            summary.append(f"**Cluster {i}** ({len(comm)} members): {members_str}...")
-    except:
-        pass
+    communities = graph_metrics.load_communities(conn, metrics_version)
+    summary.append(f"\n### Detected Communities: {len(communities)}\n")
+    for i, comm in enumerate(communities[:7], 1):
+        members_str = ", ".join([m.title() for m in comm['top_members']])
+        summary.append(f"**Cluster {i}** ({comm['size']} members): {members_str}...")
     
     # Interesting email threads
     summary.append("\n## Notable Email Threads\n")
@@ -451,34 +389,82 @@ def generate_summary(persons_df, cooccur_df, G, conn, output_path):
 
 
 def export_data(persons_df, cooccur_df, data_dir):
-    """Export processed data to JSON/JSONL files."""
+    """Export processed data to JSON/JSONL files and a binary CSR graph."""
     # Export names with document references
     names_path = data_dir / "names.jsonl"
-    with open(names_path, 'w') as f:
-        for _, row in persons_df.iterrows():
-            entry = {
-                'name': row['normalized'],
-                'mentions': int(row['total']),
-                'file_count': int(row['file_count']),
-                'emails': row.get('emails', [])
-            }
-            f.write(json.dumps(entry) + '\n')
+    names = persons_df[['normalized', 'total', 'file_count', 'emails']].rename(
+        columns={'normalized': 'name', 'total': 'mentions'})
+    names.to_json(names_path, orient='records', lines=True)
     print(f"Names exported to {names_path}")
     
     # Export edges
     edges_path = data_dir / "edges.jsonl"
-    with open(edges_path, 'w') as f:
-        for _, row in cooccur_df.iterrows():
-            edge = {
-                'source': row['entity_a'],
-                'target': row['entity_b'],
-                'weight': int(row['file_count'])
-            }
-            f.write(json.dumps(edge) + '\n')
+    edges = cooccur_df[['entity_a', 'entity_b', 'file_count']].set_axis(['source', 'target', 'weight'], axis=1)
+    edges.to_json(edges_path, orient='records', lines=True)
     print(f"Edges exported to {edges_path}")
+    
+    # Same graph as memory-mappable CSR arrays (graph_csr.load_csr)
+    graph_csr.write_csr(persons_df, cooccur_df, data_dir / "graph")
+
+
+# Visualization artifacts, in build (and worker submission) order
+ARTIFACTS = ("network", "embedding", "lod", "summary")
+
+
+def build_artifact(artifact, persons_df, cooccur_df, output_dir, data_dir, db_path, options):
+    """
+    Build one visualization artifact. Returns {stage: seconds}, so the
+    caller can merge it into STAGE_TIMINGS whether it ran here or in a
+    worker process.
+    """
+    timings = {}
+    start = time.perf_counter()
+    if artifact == "network":
+        # Force-directed network
+        build_network_graph(persons_df, cooccur_df, output_dir / "epstein_network.html", top_n=150,
+                            positions_path=data_dir / "network_positions.json")
+    elif artifact == "embedding":
+        # 3D embedding
+        build_3d_embedding(persons_df, cooccur_df, output_dir / "epstein_3d_embedding.html",
+                           top_n=options['embedding_top_n'], method=options['embedding'])
+    elif artifact == "lod":
+        # Level-of-detail export of everyone, expanded community by community
+        lod_export.export_lod(lod_export.build_full_graph(persons_df, cooccur_df), output_dir / "lod",
+                              max_nodes=options['lod_max_nodes'])
+    elif artifact == "summary":
+        # Node metrics and communities (shared with build_threejs_graph.py), then the report
+        conn = connect(db_path)
+        try:
+            metrics_version = graph_metrics.ensure_metrics(conn, workers=os.cpu_count() or 1)
+            timings["metrics"] = time.perf_counter() - start
+            start = time.perf_counter()
+            G = network_graph(persons_df, cooccur_df, top_n=150)
+            generate_summary(persons_df, cooccur_df, G, conn, output_dir / "summary.md", metrics_version)
+        finally:
+            conn.close()
+    else:
+        raise ValueError(f"Unknown artifact '{artifact}' (expected one of {', '.join(ARTIFACTS)})")
+    timings[artifact] = time.perf_counter() - start
+    return timings
+
+
+def _build_from_snapshot(artifact, snapshot_dir, output_dir, data_dir, db_path, options):
+    """Worker entry point: rebuild the frames from the memory-mapped CSR export, then build."""
+    persons_df, cooccur_df = graph_csr.load_csr(snapshot_dir).to_frames()
+    return build_artifact(artifact, persons_df, cooccur_df, output_dir, data_dir, db_path, options)
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embedding", choices=embedding_lib.METHODS, default="umap",
+                        help="3D embedding method (sparse methods scale to large --embedding-top-n)")
+    parser.add_argument("--embedding-top-n", type=int, default=200)
+    parser.add_argument("--lod-max-nodes", type=int, default=lod_export.LOD_MAX_NODES,
+                        help="nodes per level-of-detail file (0 = skip the LOD export)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="worker processes for the visualization artifacts (1 = sequential, 0 = one per artifact)")
+    args = parser.parse_args(argv)
+    
     print("=" * 60)
     print("Epstein Emails Relationship Graph Builder")
     print("=" * 60)
@@ -489,38 +475,62 @@ def main():
         sys.exit(1)
     
     conn = get_db_connection()
+    if not has_table(conn, "canonical_person"):
+        print(f"ERROR: {DB_PATH} has no canonical_person table")
+        print("Re-run scripts/process_emails.py to rebuild the database.")
+        sys.exit(1)
+    
+    STAGE_TIMINGS.clear()
     
     # Extract data
     print("\nExtracting and normalizing person entities...")
-    persons_df = extract_person_entities(conn, min_threads=3)
+    with timed("persons"):
+        persons_df = extract_person_entities(conn, min_threads=3)
     print(f"Found {len(persons_df)} unique people (normalized) with 3+ threads")
     
     print("\nExtracting co-occurrences...")
-    cooccur_df = extract_cooccurrences(conn, persons_df, min_cooccur=2)
+    with timed("cooccurrences"):
+        cooccur_df = extract_cooccurrences(conn, persons_df, min_cooccur=2)
     print(f"Found {len(cooccur_df)} co-occurrence pairs (2+ threads)")
     
     # Export data
     print("\nExporting processed data...")
-    export_data(persons_df, cooccur_df, DATA_DIR)
+    with timed("export"):
+        export_data(persons_df, cooccur_df, DATA_DIR)
+    
+    conn.close()
     
     # Build visualizations
     print("\n" + "=" * 60)
     print("Building Visualizations")
     print("=" * 60)
     
-    # Force-directed network
     network_path = OUTPUT_DIR / "epstein_network.html"
-    G = build_network_graph(persons_df, cooccur_df, network_path, top_n=150)
-    
-    # 3D embedding
     embedding_path = OUTPUT_DIR / "epstein_3d_embedding.html"
-    embedding = build_3d_embedding(persons_df, cooccur_df, embedding_path, top_n=200)
-    
-    # Summary report
+    lod_dir = OUTPUT_DIR / "lod"
     summary_path = OUTPUT_DIR / "summary.md"
-    generate_summary(persons_df, cooccur_df, G, conn, summary_path)
-    
-    conn.close()
+    options = {'embedding': args.embedding, 'embedding_top_n': args.embedding_top_n,
+               'lod_max_nodes': args.lod_max_nodes}
+    artifacts = [a for a in ARTIFACTS if a != "lod" or args.lod_max_nodes]
+    
+    if args.jobs == 1:
+        for artifact in artifacts:
+            STAGE_TIMINGS.update(build_artifact(artifact, persons_df, cooccur_df, OUTPUT_DIR,
+                                                DATA_DIR, DB_PATH, options))
+    else:
+        # One process per artifact, each reading the CSR snapshot export_data() just wrote
+        jobs = args.jobs or len(artifacts)
+        print(f"Building {len(artifacts)} artifacts in {jobs} worker processes")
+        with timed("artifacts"), ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_build_from_snapshot, artifact, DATA_DIR / "graph", OUTPUT_DIR,
+                                   DATA_DIR, DB_PATH, options)
+                       for artifact in artifacts]
+            for future in futures:
+                STAGE_TIMINGS.update(future.result())
+    
+    print("\nStage timings:")
+    for stage, seconds in STAGE_TIMINGS.items():
+        print(f"  {stage:14} {seconds:8.3f}s")
     
     print("\n" + "=" * 60)
     print("COMPLETE!")
@@ -531,6 +541,9 @@ def main():
     print(f"  3. Summary:       {summary_path}")
     print(f"  4. Names data:    {DATA_DIR / 'names.jsonl'}")
     print(f"  5. Edges data:    {DATA_DIR / 'edges.jsonl'}")
+    print(f"     CSR graph:     {DATA_DIR / 'graph'}")
+    if args.lod_max_nodes:
+        print(f"  6. LOD export:    {lod_dir / 'index.html'}")
 
 
 if __name__ == "__main__":
@@ -2,168 +2,159 @@
 """
 Build Three.js visualization data for Epstein Email network.
 Uses the epstein_emails.db database.
+
+The page no longer inlines the graph as a JSON literal that the browser
+has to parse before anything renders. The exporter writes typed arrays
+next to it, which the page fetches straight into BufferGeometry /
+InstancedMesh attributes:
+
+  output/threejs/manifest.json    counts, buffer files, labels for tooltips
+  output/threejs/positions.f32    Float32[n * 3]  node x, y, z (3D ForceAtlas2)
+  output/threejs/sizes.f32        Float32[n]      sphere radius
+  output/threejs/colors.f32       Float32[n * 3]  community color, RGB 0-1
+  output/threejs/edges.u32        Uint32[m * 2]   node index pairs
+  output/threejs/weights.f32      Float32[m]      shared threads
+
+Positions come from an offline 3D ForceAtlas2 layout (layout.py, octree
+Barnes-Hut) started from the graph_metrics communities, so the page
+opens already laid out. All buffers are little-endian. The page uses
+fetch(), so serve output/ over HTTP (GitHub Pages, or
+`python -m http.server` in output/).
+
+Usage:
+    python scripts/build_threejs_graph.py [--top-n 200]
+    python scripts/build_threejs_graph.py --compare     # also write the inline page, compare size and decode time
+    python scripts/build_threejs_graph.py --tiles --top-n 5000      # octree tiles (tile_export.py)
+    python scripts/build_threejs_graph.py --ner-db preprocessed/epstein_files/epstein.db   # every NER person, tiled
 """
 
+import argparse
+import gzip
 import sqlite3
 import json
-from collections import defaultdict
+import time
 from pathlib import Path
+
 import networkx as nx
+import numpy as np
+
+import communities
+import graph_metrics
+import layout
+import tile_export
 
 PROJECT_ROOT = Path(__file__).parent.parent
 DB_PATH = PROJECT_ROOT / "preprocessed" / "epstein_emails.db"
 OUTPUT_PATH = PROJECT_ROOT / "output" / "epstein_3d_threejs.html"
+BUFFER_DIR = PROJECT_ROOT / "output" / "threejs"
+INLINE_PATH = PROJECT_ROOT / "output" / "epstein_3d_threejs_inline.html"
+TILE_DIR = PROJECT_ROOT / "output" / "threejs_tiles"
+NER_TILE_DIR = PROJECT_ROOT / "output" / "ner_threejs_tiles"
 
-# Name normalization mapping (same as build_graph.py)
-NAME_CANONICALIZATION = {
-    'jeffrey e.': 'jeffrey epstein',
-    'jeffrey epstein': 'jeffrey epstein',
-    'jeevacation': 'jeffrey epstein',
-    'j': 'jeffrey epstein',
-    'jeff epstein': 'jeffrey epstein',
-    'jeff': 'jeffrey epstein',
-    'je': 'jeffrey epstein',
-    'ee': 'jeffrey epstein',
-    'ghislaine': 'ghislaine maxwell',
-    'maxwell': 'ghislaine maxwell',
-    'g.maxwell': 'ghislaine maxwell',
-    'weingarten': 'reid weingarten',
-    'weingarten, reid': 'reid weingarten',
-    'reid': 'reid weingarten',
-    'unknown': None,
+CLUSTER_COLORS = [
+    0xff6b6b, 0x4ecdc4, 0xffe66d, 0x95e1d3,
+    0xf38181, 0xaa96da, 0xfcbad3, 0xa8d8ea,
+    0xffd3b6, 0xc9b1ff, 0x98ddca, 0xffaaa5
+]
+BUFFER_FILES = {
+    'positions': ('positions.f32', '<f4'),
+    'sizes': ('sizes.f32', '<f4'),
+    'colors': ('colors.f32', '<f4'),
+    'edges': ('edges.u32', '<u4'),
+    'weights': ('weights.f32', '<f4'),
 }
-
-EMAIL_CANONICALIZATION = {
-    'jeevacation@gmail.com': 'jeffrey epstein',
-}
-
-
-def normalize_name(name, email=None):
-    if not name:
-        return None
-    name_lower = name.lower().strip()
-    if email and email.lower() in EMAIL_CANONICALIZATION:
-        return EMAIL_CANONICALIZATION[email.lower()]
-    if name_lower in NAME_CANONICALIZATION:
-        return NAME_CANONICALIZATION[name_lower]
-    if name_lower in ('unknown', 'none', 'n/a', '', 'redacted'):
-        return None
-    return name_lower
+SPREAD = 10.0               # RMS node radius is SPREAD * sqrt(n) page units
 
 
 def get_db_connection():
     return sqlite3.connect(str(DB_PATH))
 
 
-def build_graph_data(top_n=200):
-    """Build graph data with cluster assignments from email database."""
+def build_graph_data(top_n=200, louvain=False):
+    """
+    Build graph data with cluster assignments from email database. With
+    louvain=True (the tiled export, thousands of people) communities come
+    from a direct Louvain run, as in build_ner_graph_data(), instead of the
+    graph_metrics stage and its centralities.
+    """
     conn = get_db_connection()
     
-    # Get all people with their thread counts
+    # Top N canonical people (name variants merged at ingest)
     cursor = conn.execute("""
-        SELECT id, name, email, total_threads
-        FROM people 
+        SELECT id, name, total_threads, emails
+        FROM canonical_person
         WHERE total_threads >= 3
-        ORDER BY total_threads DESC
-    """)
-    
-    # Merge by canonical name
-    canonical_data = defaultdict(lambda: {'total_threads': 0, 'ids': [], 'emails': set()})
-    
-    for row in cursor:
-        person_id, name, email, total_threads = row
-        canonical = normalize_name(name, email)
-        if canonical is None:
-            continue
-        canonical_data[canonical]['total_threads'] += total_threads
-        canonical_data[canonical]['ids'].append(person_id)
-        if email:
-            canonical_data[canonical]['emails'].add(email)
-    
-    # Sort and take top N
-    sorted_persons = sorted(canonical_data.items(), key=lambda x: -x[1]['total_threads'])[:top_n]
+        ORDER BY total_threads DESC, id
+        LIMIT ?
+    """, (top_n,))
     
     persons = []
-    person_set = set()
-    id_to_canonical = {}
-    
-    for canonical, data in sorted_persons:
+    for _, canonical, total_threads, emails in cursor:
         persons.append({
             'id': canonical,
             'name': canonical.title(),
-            'mentions': data['total_threads'],
-            'files': data['total_threads'],
-            'emails': list(data['emails'])[:3]
+            'mentions': total_threads,
+            'files': total_threads,
+            'emails': sorted(json.loads(emails))[:3] if emails else []
         })
-        person_set.add(canonical)
-        for pid in data['ids']:
-            id_to_canonical[pid] = canonical
     
-    # Get co-occurrences and merge by canonical
+    # Co-occurrences between the top N, summed over name variants
     cursor = conn.execute("""
-        SELECT person_a, person_b, thread_count 
-        FROM person_cooccurrence 
-        WHERE thread_count >= 2
-    """)
-    
-    canonical_cooccur = defaultdict(int)
-    for row in cursor:
-        p_a, p_b, count = row
-        canonical_a = id_to_canonical.get(p_a)
-        canonical_b = id_to_canonical.get(p_b)
-        if canonical_a and canonical_b and canonical_a != canonical_b:
-            pair = tuple(sorted([canonical_a, canonical_b]))
-            canonical_cooccur[pair] += count
+        WITH top AS (
+            SELECT id FROM canonical_person
+            WHERE total_threads >= 3
+            ORDER BY total_threads DESC, id
+            LIMIT ?
+        )
+        SELECT a.name, b.name, c.thread_count
+        FROM canonical_cooccurrence c
+        JOIN top ta ON ta.id = c.canonical_a
+        JOIN top tb ON tb.id = c.canonical_b
+        JOIN canonical_person a ON a.id = c.canonical_a
+        JOIN canonical_person b ON b.id = c.canonical_b
+        WHERE c.thread_count >= 2
+    """, (top_n,))
     
     edges = []
-    for (a, b), count in canonical_cooccur.items():
-        if a in person_set and b in person_set:
-            edges.append({
-                'source': a,
-                'target': b,
-                'weight': count
-            })
+    for name_a, name_b, count in cursor:
+        a, b = sorted([name_a, name_b])
+        edges.append({
+            'source': a,
+            'target': b,
+            'weight': count
+        })
     
+    if louvain:
+        G = nx.Graph()
+        G.add_weighted_edges_from((e['source'], e['target'], e['weight']) for e in edges)
+        partition = communities.louvain(G)
+        metrics = {node: {'community': cid} for node, cid in partition.items()}
+        community_count = len(set(partition.values()))
+    else:
+        # Communities come from the graph_metrics stage (shared with build_graph.py)
+        version = graph_metrics.ensure_metrics(conn, top_n=max(top_n, graph_metrics.METRICS_TOP_N))
+        metrics = graph_metrics.load_node_metrics(conn, version)
+        community_count = conn.execute("SELECT community_count FROM metrics_runs WHERE version = ?",
+                                       (version,)).fetchone()[0]
     conn.close()
     
-    # Build NetworkX graph for clustering
-    G = nx.Graph()
-    for p in persons:
-        G.add_node(p['id'])
+    # Calculate degree (connections) for each node; people without an edge are dropped
+    degrees = {}
     for e in edges:
-        G.add_edge(e['source'], e['target'], weight=e['weight'])
-    
-    # Remove isolated nodes
-    isolated = list(nx.isolates(G))
-    G.remove_nodes_from(isolated)
-    persons = [p for p in persons if p['id'] not in isolated]
-    
-    # Community detection
-    try:
-        communities = list(nx.community.louvain_communities(G, seed=42, resolution=1.0))
-    except:
-        communities = [set(G.nodes())]
-    
-    # Assign cluster to each person
-    node_to_cluster = {}
-    for cluster_idx, community in enumerate(communities):
-        for node in community:
-            node_to_cluster[node] = cluster_idx
-    
-    # Calculate degree (connections) for each node
-    degrees = dict(G.degree())
+        for node in (e['source'], e['target']):
+            degrees[node] = degrees.get(node, 0) + 1
     
     # Finalize nodes with cluster info
     nodes = []
     for p in persons:
-        if p['id'] in G.nodes():
+        if degrees.get(p['id']):
             nodes.append({
                 'id': p['id'],
                 'name': p['name'],
                 'mentions': p['mentions'],
                 'files': p['files'],
-                'connections': degrees.get(p['id'], 0),
-                'cluster': node_to_cluster.get(p['id'], 0)
+                'connections': degrees[p['id']],
+                'cluster': metrics[p['id']]['community'] if p['id'] in metrics else 0
             })
     
     # Sort by mentions
@@ -173,13 +164,124 @@ def build_graph_data(top_n=200):
     node_ids = set(n['id'] for n in nodes)
     edges = [e for e in edges if e['source'] in node_ids and e['target'] in node_ids]
     
-    print(f"Graph: {len(nodes)} nodes, {len(edges)} edges, {len(communities)} clusters")
+    print(f"Graph: {len(nodes)} nodes, {len(edges)} edges, {community_count} clusters")
     
     return {'nodes': nodes, 'edges': edges}
 
 
-def generate_html(graph_data):
-    """Generate standalone Three.js HTML visualization."""
+def build_ner_graph_data(db_path, top_n=None):
+    """
+    Graph data in build_graph_data()'s shape for the NER database's PERSON
+    entities (all of them with top_n=None). Only communities are needed
+    here, so Louvain runs directly instead of the graph_metrics stage,
+    whose exact closeness is O(nm) on the full graph.
+    """
+    conn = sqlite3.connect(str(db_path))
+    if top_n is None:
+        has_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='entity_names'").fetchone()
+        top_n = conn.execute("SELECT COUNT(*) FROM entity_names" if has_index else
+                             "SELECT COUNT(DISTINCT normalized) FROM entities WHERE entity_label = 'PERSON'").fetchone()[0]
+    G = graph_metrics.load_ner_graph(conn, top_n)
+    conn.close()
+    G.remove_nodes_from(list(nx.isolates(G)))
+    start = time.perf_counter()
+    partition = communities.louvain(G)
+    print(f"Louvain: {len(set(partition.values()))} communities in {time.perf_counter() - start:.1f}s")
+
+    nodes = [{
+        'id': name,
+        'name': name.title(),
+        'mentions': files,
+        'files': files,
+        'connections': G.degree(name),
+        'cluster': partition[name]
+    } for name, files in sorted(G.nodes(data='activity'), key=lambda n: (-n[1], n[0]))]
+    edges = [{'source': min(a, b), 'target': max(a, b), 'weight': w} for a, b, w in G.edges(data='weight')]
+
+    print(f"Graph: {len(nodes)} nodes, {len(edges)} edges")
+    return {'nodes': nodes, 'edges': edges}
+
+
+def layout_3d(graph_data, spread=SPREAD):
+    """
+    3D ForceAtlas2 positions (n x 3, in page units) for graph_data's nodes,
+    starting from their graph_metrics communities (layout.community_seeds).
+    Every node is seeded, so forceatlas2 runs its short warm-start schedule.
+    """
+    nodes = graph_data['nodes']
+    G = nx.Graph()
+    G.add_nodes_from(node['id'] for node in nodes)
+    G.add_weighted_edges_from((e['source'], e['target'], e['weight']) for e in graph_data['edges'])
+    seeds = layout.community_seeds({node['id']: node['cluster'] for node in nodes}, dims=3)
+    positions = layout.forceatlas2(G, pos=seeds, dims=3)
+    screen = layout.to_screen(positions, spread=spread)
+    return np.array([screen[node['id']] for node in nodes], dtype=np.float64).reshape(-1, 3)
+
+
+def graph_arrays(graph_data):
+    """
+    Laid-out typed arrays for graph_data: positions (n x 3), sizes (n),
+    colors (n x 3), edges (m x 2 node indices) and weights (m).
+    """
+    nodes, edges = graph_data['nodes'], graph_data['edges']
+    index = {node['id']: i for i, node in enumerate(nodes)}
+
+    start = time.perf_counter()
+    positions = layout_3d(graph_data)
+    print(f"3D layout of {len(nodes)} nodes in {time.perf_counter() - start:.2f}s")
+    mentions = np.array([node['mentions'] for node in nodes], dtype=np.float64)
+    palette = np.array([[(c >> 16) & 0xff, (c >> 8) & 0xff, c & 0xff] for c in CLUSTER_COLORS]) / 255
+    clusters = np.array([node['cluster'] for node in nodes], dtype=np.int64)
+    return {
+        'positions': positions,
+        'sizes': 2 + np.log(mentions + 1) * 1.5,
+        'colors': palette[clusters % len(palette)],
+        'edges': np.array([[index[e['source']], index[e['target']]] for e in edges], dtype=np.int64).reshape(-1, 2),
+        'weights': np.array([e['weight'] for e in edges], dtype=np.float64),
+    }
+
+
+def graph_labels(graph_data):
+    """Labels for tooltips, as parallel arrays (row i is node i)."""
+    nodes = graph_data['nodes']
+    return {
+        'name': [node['name'] for node in nodes],
+        'mentions': [node['mentions'] for node in nodes],
+        'connections': [node['connections'] for node in nodes],
+    }
+
+
+def export_buffers(arrays, labels, buffer_dir=BUFFER_DIR):
+    """Write graph_arrays() output as typed-array files plus manifest.json; returns the manifest."""
+    buffer_dir = Path(buffer_dir)
+    buffer_dir.mkdir(parents=True, exist_ok=True)
+    positions = arrays['positions']
+    radius = float(np.linalg.norm(positions, axis=1).max()) if len(positions) else 1.0
+    manifest = {'nodes': len(positions), 'edges': len(arrays['weights']), 'radius': round(radius, 1),
+                'buffers': {}}
+    for key, (filename, dtype) in BUFFER_FILES.items():
+        values = np.ascontiguousarray(arrays[key], dtype=dtype)
+        values.tofile(buffer_dir / filename)
+        manifest['buffers'][key] = {'file': filename, 'type': 'uint32' if dtype == '<u4' else 'float32',
+                                    'length': int(values.size)}
+    manifest['labels'] = labels
+    with open(buffer_dir / "manifest.json", 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    print(f"Three.js buffers saved to {buffer_dir}")
+    return manifest
+
+
+def generate_html(output_path=OUTPUT_PATH, buffer_dir=BUFFER_DIR):
+    """Write the Three.js page that loads the buffers written by export_buffers()."""
+    base = Path(buffer_dir).relative_to(Path(output_path).parent).as_posix() + '/'
+    with open(output_path, 'w') as f:
+        f.write(PAGE_HTML.replace('__BUFFER_DIR__', base))
+    print(f"Three.js visualization saved to {output_path}")
+
+
+def generate_inline_html(graph_data, output_path=INLINE_PATH):
+    """Generate standalone Three.js HTML visualization (graph inlined as a JSON literal)."""
     json_data = json.dumps(graph_data, indent=2)
     
     html = f'''<!DOCTYPE html>
@@ -243,6 +345,7 @@ def generate_html(graph_data):
         <p><strong>{len(graph_data['nodes'])}</strong> people, <strong>{len(graph_data['edges'])}</strong> connections</p>
         <p>Source: Hugging Face notesbymuneeb/epstein-emails</p>
         <p>Drag to rotate, scroll to zoom, click for details</p>
+        <p id="load-time"></p>
     </div>
     <div id="tooltip"></div>
     <div id="legend">
@@ -400,22 +503,319 @@ def generate_html(graph_data):
     }}
     
     animate();
+    document.getElementById('load-time').textContent = `Rendered in ${{Math.round(performance.now())}} ms`;
     </script>
 </body>
 </html>'''
     
-    with open(OUTPUT_PATH, 'w') as f:
+    with open(output_path, 'w') as f:
         f.write(html)
     
-    print(f"Three.js visualization saved to {OUTPUT_PATH}")
+    print(f"Inline Three.js visualization saved to {output_path}")
+
+
+def compare_formats(graph_data, output_path=OUTPUT_PATH, buffer_dir=BUFFER_DIR, inline_path=INLINE_PATH):
+    """
+    Print the size (raw and gzip, as a static host serves it) and the time
+    to decode the graph from each format. Both pages also show their own
+    time to first render in the info panel.
+    """
+    def sizes(paths):
+        raw = sum(p.stat().st_size for p in paths)
+        return raw, sum(len(gzip.compress(p.read_bytes())) for p in paths)
 
+    buffer_dir = Path(buffer_dir)
+    binary_files = [Path(output_path)] + sorted(buffer_dir.iterdir())
+    inline_files = [Path(inline_path)]
+
+    literal = json.dumps(graph_data, indent=2)     # what generate_inline_html() embeds
+    start = time.perf_counter()
+    json.loads(literal)
+    inline_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(buffer_dir / "manifest.json") as f:
+        manifest = json.load(f)
+    for spec in manifest['buffers'].values():
+        np.fromfile(buffer_dir / spec['file'], dtype='<u4' if spec['type'] == 'uint32' else '<f4')
+    binary_seconds = time.perf_counter() - start
+
+    print(f"\n{'format':8} {'files':>5} {'bytes':>10} {'gzip':>10} {'decode ms':>10}")
+    for name, files, seconds in (("inline", inline_files, inline_seconds), ("binary", binary_files, binary_seconds)):
+        raw, packed = sizes(files)
+        print(f"{name:8} {len(files):>5} {raw:>10,} {packed:>10,} {seconds * 1000:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-n", type=int, default=None,
+                        help="people to include (default 200; every PERSON entity with --ner-db)")
+    parser.add_argument("--compare", action="store_true",
+                        help=f"also write the inline-JSON page to {INLINE_PATH.name} and compare the formats")
+    parser.add_argument("--tiles", action="store_true",
+                        help=f"write an octree-tiled streaming export to {TILE_DIR.relative_to(PROJECT_ROOT)}/ "
+                             "instead of the single page")
+    parser.add_argument("--tile-max-nodes", type=int, default=tile_export.TILE_MAX_NODES)
+    parser.add_argument("--ner-db", type=Path, default=None,
+                        help=f"tile the NER database's PERSON graph into {NER_TILE_DIR.relative_to(PROJECT_ROOT)}/")
+    args = parser.parse_args(argv)
+    if args.compare and (args.tiles or args.ner_db):
+        parser.error("--compare compares the single-page formats; it cannot be combined with --tiles or --ner-db")
 
-def main():
     print("Building Three.js visualization...")
-    graph_data = build_graph_data(top_n=200)
-    generate_html(graph_data)
+    if args.ner_db:
+        if not args.ner_db.exists():
+            print(f"ERROR: Database not found at {args.ner_db}")
+            return
+        graph_data = build_ner_graph_data(args.ner_db, args.top_n)
+        tile_export.export_tiles(graph_arrays(graph_data), graph_labels(graph_data), NER_TILE_DIR,
+                                 max_nodes=args.tile_max_nodes, title="Epstein Files Entity Network",
+                                 activity="Files")
+        print("Done!")
+        return
+
+    graph_data = build_graph_data(top_n=args.top_n or 200, louvain=args.tiles)
+    arrays, labels = graph_arrays(graph_data), graph_labels(graph_data)
+    if args.tiles:
+        tile_export.export_tiles(arrays, labels, TILE_DIR, max_nodes=args.tile_max_nodes,
+                                 title="Epstein Email Network")
+    else:
+        export_buffers(arrays, labels)
+        generate_html()
+        if args.compare:
+            generate_inline_html(graph_data)
+            compare_formats(graph_data)
     print("Done!")
 
 
+PAGE_HTML = '''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Epstein Email Network - 3D Visualization</title>
+    <style>
+        body {
+            margin: 0;
+            overflow: hidden;
+            background: #0a0a15;
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+        }
+        #info {
+            position: absolute;
+            top: 10px;
+            left: 10px;
+            color: #fff;
+            background: rgba(0,0,0,0.7);
+            padding: 15px;
+            border-radius: 8px;
+            max-width: 300px;
+            z-index: 100;
+        }
+        #info h2 {
+            margin: 0 0 10px 0;
+            font-size: 18px;
+        }
+        #info p {
+            margin: 5px 0;
+            font-size: 12px;
+            color: #aaa;
+        }
+        #tooltip {
+            position: absolute;
+            background: rgba(0,0,0,0.85);
+            color: #fff;
+            padding: 10px 15px;
+            border-radius: 5px;
+            font-size: 13px;
+            pointer-events: none;
+            display: none;
+            z-index: 1000;
+        }
+        #legend {
+            position: absolute;
+            bottom: 10px;
+            right: 10px;
+            color: #fff;
+            background: rgba(0,0,0,0.7);
+            padding: 10px;
+            border-radius: 8px;
+            font-size: 11px;
+        }
+    </style>
+</head>
+<body>
+    <div id="info">
+        <h2>Epstein Email Network</h2>
+        <p id="counts">Loading...</p>
+        <p>Source: Hugging Face notesbymuneeb/epstein-emails</p>
+        <p>Drag to rotate, scroll to zoom, click for details</p>
+        <p id="load-time"></p>
+    </div>
+    <div id="tooltip"></div>
+    <div id="legend">
+        <strong>Node size</strong>: Email thread count<br>
+        <strong>Colors</strong>: Community clusters
+    </div>
+
+    <script src="https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js"></script>
+    <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/controls/OrbitControls.js"></script>
+    
+    <script>
+    const BUFFER_DIR = '__BUFFER_DIR__';
+    
+    // Scene setup
+    const scene = new THREE.Scene();
+    scene.background = new THREE.Color(0x0a0a15);
+    
+    const camera = new THREE.PerspectiveCamera(60, window.innerWidth / window.innerHeight, 0.1, 5000);
+    camera.position.set(0, 0, 400);
+    
+    const renderer = new THREE.WebGLRenderer({ antialias: true });
+    renderer.setSize(window.innerWidth, window.innerHeight);
+    renderer.setPixelRatio(window.devicePixelRatio);
+    document.body.appendChild(renderer.domElement);
+    
+    const controls = new THREE.OrbitControls(camera, renderer.domElement);
+    controls.enableDamping = true;
+    controls.dampingFactor = 0.05;
+    
+    // Lighting
+    scene.add(new THREE.AmbientLight(0xffffff, 0.6));
+    const point1 = new THREE.PointLight(0xffffff, 0.8);
+    point1.position.set(200, 200, 200);
+    scene.add(point1);
+    const point2 = new THREE.PointLight(0x4488ff, 0.5);
+    point2.position.set(-200, -200, -200);
+    scene.add(point2);
+    
+    const graph = new THREE.Group();
+    scene.add(graph);
+    let manifest = null;
+    let nodeMesh = null;
+    
+    // Fetch the manifest and every typed-array buffer it lists
+    async function loadGraph() {
+        manifest = await (await fetch(BUFFER_DIR + 'manifest.json')).json();
+        const buffers = {};
+        await Promise.all(Object.entries(manifest.buffers).map(async ([key, spec]) => {
+            const data = await (await fetch(BUFFER_DIR + spec.file)).arrayBuffer();
+            buffers[key] = spec.type === 'uint32' ? new Uint32Array(data) : new Float32Array(data);
+        }));
+        return buffers;
+    }
+    
+    function buildNodes(buffers) {
+        // One instanced sphere per node; sizes and colors straight from the buffers
+        const { positions, sizes, colors } = buffers;
+        const material = new THREE.MeshPhongMaterial({ color: 0xffffff });
+        nodeMesh = new THREE.InstancedMesh(new THREE.SphereGeometry(1, 16, 16), material, manifest.nodes);
+        const dummy = new THREE.Object3D();
+        const color = new THREE.Color();
+        for (let i = 0; i < manifest.nodes; i++) {
+            dummy.position.set(positions[3 * i], positions[3 * i + 1], positions[3 * i + 2]);
+            dummy.scale.setScalar(sizes[i]);
+            dummy.updateMatrix();
+            nodeMesh.setMatrixAt(i, dummy.matrix);
+            nodeMesh.setColorAt(i, color.setRGB(colors[3 * i], colors[3 * i + 1], colors[3 * i + 2]));
+        }
+        graph.add(nodeMesh);
+    }
+    
+    function buildEdges(buffers) {
+        // One LineSegments draw for all edges; weight sets brightness (additive, so it reads as opacity)
+        const { positions, edges, weights } = buffers;
+        const count = manifest.edges;
+        const vertices = new Float32Array(count * 6);
+        const shades = new Float32Array(count * 6);
+        const base = new THREE.Color(0x4488ff);
+        for (let e = 0; e < count; e++) {
+            const a = edges[2 * e], b = edges[2 * e + 1];
+            vertices.set(positions.subarray(3 * a, 3 * a + 3), 6 * e);
+            vertices.set(positions.subarray(3 * b, 3 * b + 3), 6 * e + 3);
+            const opacity = Math.min(0.6, 0.1 + weights[e] / 50);
+            for (let k = 0; k < 2; k++) {
+                shades[6 * e + 3 * k] = base.r * opacity;
+                shades[6 * e + 3 * k + 1] = base.g * opacity;
+                shades[6 * e + 3 * k + 2] = base.b * opacity;
+            }
+        }
+        const geometry = new THREE.BufferGeometry();
+        geometry.setAttribute('position', new THREE.BufferAttribute(vertices, 3));
+        geometry.setAttribute('color', new THREE.BufferAttribute(shades, 3));
+        const material = new THREE.LineBasicMaterial({
+            vertexColors: true,
+            transparent: true,
+            blending: THREE.AdditiveBlending,
+            depthWrite: false
+        });
+        graph.add(new THREE.LineSegments(geometry, material));
+    }
+    
+    // Raycaster for interaction
+    const raycaster = new THREE.Raycaster();
+    const mouse = new THREE.Vector2();
+    const tooltip = document.getElementById('tooltip');
+    
+    function onMouseMove(event) {
+        if (!nodeMesh) return;
+        mouse.x = (event.clientX / window.innerWidth) * 2 - 1;
+        mouse.y = -(event.clientY / window.innerHeight) * 2 + 1;
+        
+        raycaster.setFromCamera(mouse, camera);
+        const intersects = raycaster.intersectObject(nodeMesh);
+        
+        if (intersects.length > 0) {
+            const i = intersects[0].instanceId;
+            const labels = manifest.labels;
+            tooltip.style.display = 'block';
+            tooltip.style.left = event.clientX + 15 + 'px';
+            tooltip.style.top = event.clientY + 15 + 'px';
+            tooltip.innerHTML = `
+                <strong>${labels.name[i]}</strong><br>
+                Threads: ${labels.mentions[i]}<br>
+                Connections: ${labels.connections[i]}
+            `;
+            document.body.style.cursor = 'pointer';
+        } else {
+            tooltip.style.display = 'none';
+            document.body.style.cursor = 'default';
+        }
+    }
+    
+    window.addEventListener('mousemove', onMouseMove);
+    
+    // Resize handler
+    window.addEventListener('resize', () => {
+        camera.aspect = window.innerWidth / window.innerHeight;
+        camera.updateProjectionMatrix();
+        renderer.setSize(window.innerWidth, window.innerHeight);
+    });
+    
+    // Animation
+    function animate() {
+        requestAnimationFrame(animate);
+        controls.update();
+        graph.rotation.y += 0.001;
+        renderer.render(scene, camera);
+    }
+    
+    loadGraph().then(buffers => {
+        // Positions are precomputed, so frame the whole layout right away
+        camera.position.set(0, 0, 2.2 * manifest.radius);
+        camera.far = 10 * manifest.radius;
+        camera.updateProjectionMatrix();
+        buildNodes(buffers);
+        buildEdges(buffers);
+        document.getElementById('counts').innerHTML =
+            `<strong>${manifest.nodes}</strong> people, <strong>${manifest.edges}</strong> connections`;
+        animate();
+        document.getElementById('load-time').textContent = `Rendered in ${Math.round(performance.now())} ms`;
+    });
+    </script>
+</body>
+</html>
+'''
+
+
 if __name__ == "__main__":
     main()
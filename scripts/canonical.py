@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Canonical person names shared by the graph builders.
+
+Raw `people` rows are spelling variants of the same person (nicknames,
+email local parts, capitalisation). normalize_name() maps a row to its
+canonical lower-case name, or None for placeholders that are dropped.
+process_emails.py applies it once at ingest: people.canonical_id points at
+canonical_person, and canonical_cooccurrence holds the merged pair counts.
+"""
+
+# Name normalization mapping - merge variations of the same person
+NAME_CANONICALIZATION = {
+    # Jeffrey Epstein variations
+    'jeffrey e.': 'jeffrey epstein',
+    'jeffrey epstein': 'jeffrey epstein',
+    'jeevacation': 'jeffrey epstein',
+    'j': 'jeffrey epstein',
+    'jeff epstein': 'jeffrey epstein',
+    'jeff': 'jeffrey epstein',
+    'je': 'jeffrey epstein',
+    'ee': 'jeffrey epstein',
+
+    # Ghislaine Maxwell
+    'ghislaine': 'ghislaine maxwell',
+    'maxwell': 'ghislaine maxwell',
+    'g.maxwell': 'ghislaine maxwell',
+
+    # Reid Weingarten variations
+    'weingarten': 'reid weingarten',
+    'weingarten, reid': 'reid weingarten',
+    'reid': 'reid weingarten',
+
+    # Common variations
+    'unknown': None,  # Exclude
+}
+
+# Emails that identify the same person
+EMAIL_CANONICALIZATION = {
+    'jeevacation@gmail.com': 'jeffrey epstein',
+}
+
+
+def normalize_name(name, email=None):
+    """Normalize and canonicalize name."""
+    if not name:
+        return None
+
+    name_lower = name.lower().strip()
+
+    # Check email canonicalization first
+    if email and email.lower() in EMAIL_CANONICALIZATION:
+        return EMAIL_CANONICALIZATION[email.lower()]
+
+    # Check name canonicalization
+    if name_lower in NAME_CANONICALIZATION:
+        return NAME_CANONICALIZATION[name_lower]
+
+    # Filter out noise
+    if name_lower in ('unknown', 'none', 'n/a', '', 'redacted'):
+        return None
+
+    # Return cleaned name
+    return name_lower
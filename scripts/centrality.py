@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Centrality measures for the relationship graphs, sized for graphs where
+exact betweenness (O(VE)) is too slow.
+
+- betweenness(): Brandes betweenness from a random sample of pivot
+  sources. With `epsilon` set, enough pivots are drawn that every node's
+  normalized score is within epsilon of the exact value with probability
+  1 - delta (Hoeffding plus a union bound over nodes); graphs small enough
+  to need as many pivots as nodes are computed exactly.
+- closeness(): exact closeness, one BFS per node.
+- eigenvector(): sparse power iteration via networkx/scipy.
+
+Pivot and node batches run on a process pool when `workers` > 1 and the
+graph is large enough to repay the start-up cost. Results are cached on
+disk keyed by a fingerprint of the graph and the parameters, so rebuilding
+an unchanged summary does not recompute them.
+"""
+
+import hashlib
+import json
+import math
+import random
+from multiprocessing import Pool
+from pathlib import Path
+
+import networkx as nx
+
+PROJECT_ROOT = Path(__file__).parent.parent
+CACHE_DIR = PROJECT_ROOT / "data" / "cache" / "centrality"
+
+# Below this many BFS edge visits (pivots x edges) a pool costs more than it saves
+PARALLEL_MIN_WORK = 2_000_000
+
+_graph = None  # set in pool workers by _init_worker()
+
+
+def graph_fingerprint(G, weight=None):
+    """SHA-1 of the node set and (weighted) edge set, independent of insertion order."""
+    digest = hashlib.sha1()
+    digest.update(b"directed" if G.is_directed() else b"undirected")
+    for node in sorted(map(str, G.nodes())):
+        digest.update(node.encode() + b"\0")
+    digest.update(b"\1")
+    edges = []
+    for u, v, data in G.edges(data=True):
+        u, v = str(u), str(v)
+        if not G.is_directed() and v < u:
+            u, v = v, u
+        edges.append(f"{u}\0{v}\0{data.get(weight, 1) if weight else ''}")
+    for edge in sorted(edges):
+        digest.update(edge.encode() + b"\0")
+    return digest.hexdigest()
+
+
+def pivot_count(n, epsilon, delta=0.1):
+    """
+    Pivots needed for an additive error of `epsilon` on normalized
+    betweenness for all `n` nodes at once, with probability 1 - delta.
+    """
+    return math.ceil(math.log(2 * n / delta) / (2 * epsilon ** 2))
+
+
+def _cached(measure, G, params, compute, cache_dir):
+    """Load `measure` for G from the cache, or compute and store it."""
+    if cache_dir is None:
+        return compute()
+    key = hashlib.sha1(json.dumps([measure, graph_fingerprint(G, params.get("weight")), params],
+                                  sort_keys=True).encode()).hexdigest()
+    path = Path(cache_dir) / f"{measure}_{key}.json"
+    if path.exists():
+        # Keys go through JSON as strings; map them back to the graph's nodes
+        stored = json.loads(path.read_text())
+        return {node: stored[str(node)] for node in G.nodes()}
+    result = compute()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({str(node): value for node, value in result.items()}))
+    tmp.replace(path)
+    return result
+
+
+def _init_worker(G):
+    global _graph
+    _graph = G
+
+
+def _betweenness_batch(args):
+    """Pool worker: unnormalized betweenness summed over a batch of sources."""
+    sources, weight = args
+    return nx.betweenness_centrality_subset(_graph, sources, list(_graph), normalized=False, weight=weight)
+
+
+def _closeness_batch(args):
+    """Pool worker: closeness of a batch of nodes."""
+    nodes, distance = args
+    return {u: nx.closeness_centrality(_graph, u=u, distance=distance) for u in nodes}
+
+
+def _batches(items, count):
+    size = -(-len(items) // max(count, 1))
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _map_batches(G, func, batches, workers):
+    """Run func over batches in this process or on a pool with G preloaded."""
+    if workers <= 1 or len(batches) <= 1:
+        _init_worker(G)
+        try:
+            return [func(batch) for batch in batches]
+        finally:
+            _init_worker(None)
+    with Pool(min(workers, len(batches)), initializer=_init_worker, initargs=(G,)) as pool:
+        return pool.map(func, batches)
+
+
+def betweenness(G, epsilon=None, delta=0.1, normalized=True, weight=None, seed=42,
+                workers=1, cache_dir=CACHE_DIR):
+    """
+    Betweenness centrality of every node, exact when `epsilon` is None or
+    the error bound needs at least as many pivots as G has nodes, otherwise
+    estimated from pivot_count(n, epsilon, delta) sampled sources.
+    """
+    n = G.number_of_nodes()
+    k = n if epsilon is None else min(n, pivot_count(n, epsilon, delta))
+    params = {"k": k, "normalized": normalized, "weight": weight, "seed": seed if k < n else None}
+
+    def compute():
+        nodes = list(G)
+        sources = nodes if k >= n else random.Random(seed).sample(nodes, k)
+        work = k * max(G.number_of_edges(), 1)
+        pool_size = workers if work >= PARALLEL_MIN_WORK else 1
+        totals = dict.fromkeys(nodes, 0.0)
+        # Several batches per worker keeps the pool busy when BFS costs vary
+        for partial in _map_batches(G, _betweenness_batch,
+                                    [(batch, weight) for batch in _batches(sources, pool_size * 4)],
+                                    pool_size):
+            for node, value in partial.items():
+                totals[node] += value
+        # betweenness_centrality_subset already halves undirected pair counts
+        scale = n / k if k else 0.0
+        if normalized and n > 2:
+            scale *= (2 if not G.is_directed() else 1) / ((n - 1) * (n - 2))
+        return {node: value * scale for node, value in totals.items()}
+
+    return _cached("betweenness", G, params, compute, cache_dir)
+
+
+def closeness(G, distance=None, workers=1, cache_dir=CACHE_DIR):
+    """Closeness centrality (networkx semantics), one BFS/Dijkstra per node."""
+    def compute():
+        nodes = list(G)
+        work = len(nodes) * max(G.number_of_edges(), 1)
+        pool_size = workers if work >= PARALLEL_MIN_WORK else 1
+        result = {}
+        for partial in _map_batches(G, _closeness_batch,
+                                    [(batch, distance) for batch in _batches(nodes, pool_size * 4)],
+                                    pool_size):
+            result.update(partial)
+        return result
+
+    return _cached("closeness", G, {"distance": distance}, compute, cache_dir)
+
+
+def eigenvector(G, weight=None, cache_dir=CACHE_DIR):
+    """
+    Eigenvector centrality from a sparse eigensolver. Each connected
+    component is solved separately and scaled by sqrt(size / n), so the
+    vector still has unit norm; isolated nodes score 0.
+    """
+    def compute():
+        n = G.number_of_nodes()
+        result = dict.fromkeys(G, 0.0)
+        components = nx.weakly_connected_components(G) if G.is_directed() else nx.connected_components(G)
+        for component in components:
+            if len(component) < 2:
+                continue
+            scale = math.sqrt(len(component) / n)
+            if len(component) == 2:
+                # Too small for ARPACK; a single edge's eigenvector is uniform
+                values = dict.fromkeys(component, math.sqrt(0.5))
+            else:
+                values = nx.eigenvector_centrality_numpy(G.subgraph(component), weight=weight)
+            result.update((node, value * scale) for node, value in values.items())
+        return result
+
+    return _cached("eigenvector", G, {"weight": weight}, compute, cache_dir)
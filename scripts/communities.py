@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Community detection with ids that stay stable across runs.
+
+A partition is a {node: community id} dict. louvain() runs Louvain over
+the whole graph and matches the result to the previous partition by
+overlap, so a community keeps its id (and its color in the frontends) as
+long as most of its members stay together. update() maintains a previous
+partition instead of recomputing it: only the nodes touching an edge that
+was added, removed or reweighted are re-evaluated with Louvain's local
+moving step, and a move re-queues the mover's neighbours, so the work is
+proportional to the part of the graph that changed. Communities the moves
+disconnect are split into their components.
+
+update() never merges two existing communities wholesale the way Louvain's
+aggregation phase does, so after many deltas its modularity can drift
+below a full run's; graph_metrics.py --full resets it.
+"""
+
+from collections import Counter, defaultdict, deque
+
+import networkx as nx
+
+SEED = 42
+RESOLUTION = 1.0
+
+
+def _key(a, b):
+    return (a, b) if a <= b else (b, a)
+
+
+def edge_weights(G, weight='weight'):
+    """{(a, b): weight} with each pair in sorted order."""
+    return {_key(a, b): d.get(weight, 1) for a, b, d in G.edges(data=True)}
+
+
+def touched_nodes(old_edges, G, weight='weight'):
+    """Nodes of G on an edge added, removed or reweighted since `old_edges`."""
+    new_edges = edge_weights(G, weight)
+    touched = set()
+    for key in old_edges.keys() | new_edges.keys():
+        if old_edges.get(key) != new_edges.get(key):
+            touched.update(key)
+    return {node for node in touched if node in G}
+
+
+def align_ids(communities, previous):
+    """
+    Partition from a list of node sets. Each set takes the previous id it
+    shares the most members with (largest overlaps first, one set per id);
+    the rest get fresh ids above every previous id, in list order.
+    """
+    pairs = []
+    for i, members in enumerate(communities):
+        counts = Counter(previous[node] for node in members if node in previous)
+        pairs.extend((-overlap, i, cid) for cid, overlap in counts.items())
+
+    ids, used = {}, set()
+    for _, i, cid in sorted(pairs):
+        if i not in ids and cid not in used:
+            ids[i] = cid
+            used.add(cid)
+
+    next_id = max(previous.values(), default=-1) + 1
+    partition = {}
+    for i, members in enumerate(communities):
+        if i not in ids:
+            ids[i] = next_id
+            next_id += 1
+        partition.update((node, ids[i]) for node in members)
+    return partition
+
+
+def louvain(G, previous=None, seed=SEED, resolution=RESOLUTION, weight='weight'):
+    """
+    Full Louvain partition of G. Without a previous partition, ids number
+    the communities largest first (ties by smallest member name).
+    """
+    if G.number_of_edges() == 0:
+        communities = [{node} for node in G]
+    else:
+        communities = nx.community.louvain_communities(G, weight=weight, resolution=resolution, seed=seed)
+    communities = sorted(communities, key=lambda c: (-len(c), min(c)))
+    return align_ids(communities, previous or {})
+
+
+def _split_disconnected(G, partition, cids, next_id):
+    """Split each community in `cids` into its connected components; the largest keeps the id."""
+    members = defaultdict(set)
+    for node, cid in partition.items():
+        if cid in cids:
+            members[cid].add(node)
+    for cid in sorted(members):
+        components = sorted(nx.connected_components(G.subgraph(members[cid])),
+                            key=lambda c: (-len(c), min(c)))
+        for component in components[1:]:
+            partition.update((node, next_id) for node in component)
+            next_id += 1
+    return next_id
+
+
+def update(G, previous, touched, resolution=RESOLUTION, weight='weight'):
+    """
+    Re-optimize `previous` for the current G, starting from the nodes in
+    `touched` (see touched_nodes()). Nodes new to G start as singletons;
+    nodes no longer in G are dropped. Returns the new partition.
+    """
+    next_id = max(previous.values(), default=-1) + 1
+    partition = {}
+    new_nodes = []
+    for node in sorted(G):
+        if node in previous:
+            partition[node] = previous[node]
+        else:
+            partition[node] = next_id
+            next_id += 1
+            new_nodes.append(node)
+
+    m = G.size(weight=weight)
+    if m == 0:
+        return partition
+
+    k = dict(G.degree(weight=weight))
+    tot = defaultdict(float)
+    for node, cid in partition.items():
+        tot[cid] += k[node]
+
+    # Communities that lost members to deletion may now be disconnected too
+    affected = {previous[node] for node in previous if node not in G}
+    queue = deque(sorted(set(touched) | set(new_nodes)))
+    queued = set(queue)
+    while queue:
+        u = queue.popleft()
+        queued.discard(u)
+        current = partition[u]
+        links = defaultdict(float)
+        for v, d in G[u].items():
+            if v != u:
+                links[partition[v]] += d.get(weight, 1)
+
+        # Modularity gain of joining c, up to terms that do not depend on c
+        tot[current] -= k[u]
+        best = current
+        best_gain = links.get(current, 0.0) - resolution * tot[current] * k[u] / (2 * m)
+        for cid in sorted(links):
+            gain = links[cid] - resolution * tot[cid] * k[u] / (2 * m)
+            if gain > best_gain + 1e-12:
+                best, best_gain = cid, gain
+        tot[best] += k[u]
+
+        affected.add(current)
+        if best != current:
+            partition[u] = best
+            affected.add(best)
+            for v in G[u]:
+                if v not in queued and partition[v] != best:
+                    queue.append(v)
+                    queued.add(v)
+
+    _split_disconnected(G, partition, affected, next_id)
+    return partition
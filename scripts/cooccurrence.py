@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Sparse-matrix co-occurrence engine.
+
+Threads and people form a thread x person incidence matrix A; the Gram
+product A^T A holds, for every pair of people, the number of threads they
+share. Products are computed one block of person columns at a time and
+only the upper triangle is kept, so large mailing-list threads cost one
+sparse multiply instead of a Python loop over every pair.
+"""
+
+from itertools import chain
+
+import numpy as np
+import scipy.sparse as sp
+
+# Strongest role first: a person who both sends and is CC'd counts as sender
+ROLE_RANK = {'sender': 0, 'recipient': 1, 'cc': 2}
+
+
+def stronger_role(role, current):
+    """Return the stronger of two participant roles (current may be None)."""
+    if current is None or ROLE_RANK[role] < ROLE_RANK[current]:
+        return role
+    return current
+
+
+def parse_role_weights(spec):
+    """Parse 'sender=1,recipient=0.5,cc=0.25' into a dict (missing roles weigh 1)."""
+    if not spec:
+        return None
+    weights = {role: 1.0 for role in ROLE_RANK}
+    for part in spec.split(','):
+        role, _, value = part.partition('=')
+        role = role.strip()
+        if role not in ROLE_RANK:
+            raise ValueError(f"Unknown role '{role}' (expected one of {', '.join(ROLE_RANK)})")
+        weights[role] = float(value)
+    return weights
+
+
+def incidence_matrix(thread_participants, role_weights=None, n_people=None):
+    """
+    Build the thread x person CSR incidence matrix from
+    {thread_id: {person_id: role}}.
+
+    Entries are 1, or the weight of the person's strongest role in the
+    thread when role_weights is given. Columns are indexed by person id.
+    """
+    threads = list(thread_participants.values())
+    sizes = np.fromiter((len(p) for p in threads), dtype=np.int64, count=len(threads))
+    rows = np.repeat(np.arange(len(threads), dtype=np.int64), sizes)
+    cols = np.fromiter(chain.from_iterable(threads), dtype=np.int64, count=int(sizes.sum()))
+
+    if role_weights is None:
+        data = np.ones(len(cols), dtype=np.int64)
+    else:
+        roles = chain.from_iterable(p.values() for p in threads)
+        data = np.fromiter((role_weights[role] for role in roles), dtype=np.float64, count=len(cols))
+
+    if n_people is None:
+        n_people = int(cols.max()) + 1 if len(cols) else 0
+    return sp.csr_matrix((data, (rows, cols)), shape=(len(threads), n_people))
+
+
+def cooccurrence_blocks(thread_participants, role_weights=None, min_count=1, block_size=20_000):
+    """
+    Yield (person_a, person_b, thread_count, weight) numpy arrays, one block
+    of people at a time, with person_a < person_b and thread_count >= min_count.
+
+    weight is sum over shared threads of w(a) * w(b) for the given role
+    weights, or None when role_weights is None. People in fewer than
+    min_count threads cannot reach the threshold and are dropped before
+    the product.
+    """
+    counts = incidence_matrix(thread_participants)
+    n_people = counts.shape[1]
+    weights = None
+    if role_weights is not None:
+        weights = incidence_matrix(thread_participants, role_weights, n_people)
+
+    keep = np.flatnonzero(counts.getnnz(axis=0) >= max(min_count, 1))
+    counts = counts[:, keep].tocsc()
+    counts_t = counts.T.tocsr()
+    if weights is not None:
+        weights = weights[:, keep].tocsc()
+        weights_t = weights.T.tocsr()
+
+    for start in range(0, len(keep), block_size):
+        end = min(start + block_size, len(keep))
+        # Rows < end suffice for the upper triangle of this column block
+        block = (counts_t[:end] @ counts[:, start:end]).tocoo()
+        rows, cols = block.row, block.col + start
+        mask = (rows < cols) & (block.data >= min_count)
+        rows, cols, data = rows[mask], cols[mask], block.data[mask]
+
+        block_weights = None
+        if weights is not None:
+            weight_block = (weights_t[:end] @ weights[:, start:end]).tocsr()
+            block_weights = np.asarray(weight_block[rows, cols - start]).ravel()
+
+        if len(rows):
+            yield keep[rows], keep[cols], data, block_weights
+
+
+def pair_counts(thread_participants, role_weights=None):
+    """Return {(person_a, person_b): (thread_count, weight)} for all pairs."""
+    result = {}
+    for person_a, person_b, counts, weights in cooccurrence_blocks(thread_participants, role_weights):
+        weights = weights.tolist() if weights is not None else [None] * len(counts)
+        for a, b, count, weight in zip(person_a.tolist(), person_b.tolist(), counts.tolist(), weights):
+            result[(a, b)] = (count, weight)
+    return result
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for reading the epstein_emails.db database.
+
+Message text (emails.messages_json and messages.body) is stored either as
+TEXT or, after compress_bodies(), as zstd-compressed BLOBs sharing a
+dictionary trained on the database itself. Open the database with
+connect() and wrap those columns in body_text() to read either form.
+"""
+
+import re
+import sqlite3
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Columns holding message text that compress_bodies() may store compressed
+COMPRESSED_COLUMNS = (('emails', 'messages_json'), ('messages', 'body'))
+
+
+def parse_timestamp(ts_str):
+    """Parse various timestamp formats from the email data"""
+    if not ts_str:
+        return None
+
+    formats = [
+        "%m/%d/%Y %I:%M %p",
+        "%m/%d/%Y %I:%M:%S %p",
+        "%a, %b %d, %Y at %I:%M %p",
+        "%a, %b %d, %Y at %I:%M:%S %p",
+        "%b %d, %Y, at %I:%M %p",
+        "%b %d, %Y, at %I:%M:%S %p",
+        "%Y-%m-%d",
+        "%m/%d/%Y",
+    ]
+
+    for fmt in formats:
+        try:
+            return datetime.strptime(ts_str.strip(), fmt)
+        except ValueError:
+            continue
+
+    # Try extracting date portions
+    date_patterns = [
+        r'(\d{1,2}/\d{1,2}/\d{4})',
+        r'(\w+\s+\d{1,2},?\s+\d{4})',
+    ]
+    for pattern in date_patterns:
+        match = re.search(pattern, ts_str)
+        if match:
+            try:
+                return datetime.strptime(match.group(1), "%m/%d/%Y")
+            except:
+                try:
+                    return datetime.strptime(match.group(1).replace(",", ""), "%B %d %Y")
+                except:
+                    pass
+    return None
+
+
+def to_utc_iso(ts_str):
+    """
+    Parse a raw message timestamp into an ISO-8601 string (UTC; the source
+    timestamps carry no zone), or None if it cannot be parsed.
+    """
+    dt = parse_timestamp(ts_str) if isinstance(ts_str, str) else None
+    return dt.isoformat() if dt else None
+
+
+def has_table(conn, name):
+    """Return True if the database has a table called `name`."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def require_zstandard():
+    if zstandard is None:
+        raise ImportError("zstandard not installed. Run: pip install zstandard")
+
+
+def register_body_text(conn):
+    """
+    Register the SQL function body_text(value) on conn. TEXT values are
+    returned unchanged; BLOBs written by compress_bodies() are inflated
+    with the dictionary their frame names.
+    """
+    decompressors = {}
+    if has_table(conn, 'zstd_dicts'):
+        rows = conn.execute("SELECT dict_id, data FROM zstd_dicts").fetchall()
+        if rows:
+            require_zstandard()
+        for dict_id, data in rows:
+            dictionary = zstandard.ZstdCompressionDict(data)
+            decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    def body_text(value):
+        if not isinstance(value, bytes):
+            return value
+        dict_id = zstandard.get_frame_parameters(value).dict_id
+        if dict_id not in decompressors:
+            # Frames compressed without a dictionary carry dict_id 0
+            require_zstandard()
+            decompressors[dict_id] = zstandard.ZstdDecompressor()
+        return decompressors[dict_id].decompress(value).decode('utf-8')
+
+    conn.create_function('body_text', 1, body_text, deterministic=True)
+
+
+def connect(db_path):
+    """Open the database with body_text() registered."""
+    conn = sqlite3.connect(str(db_path))
+    register_body_text(conn)
+    return conn
+
+
+def train_dictionary(conn, dict_size=112_640, samples_per_column=5000):
+    """
+    Train a zstd dictionary on text sampled evenly (by rowid) from the
+    compressed columns. Returns None when there is too little text to train on.
+    """
+    require_zstandard()
+    samples = []
+    for table, column in COMPRESSED_COLUMNS:
+        total = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+        step = max(1, total // samples_per_column)
+        samples += [
+            value.encode('utf-8') for (value,) in conn.execute(
+                f"SELECT {column} FROM {table} WHERE typeof({column}) = 'text' "
+                f"AND rowid % ? = 0 LIMIT ?", (step, samples_per_column)
+            )
+        ]
+    try:
+        return zstandard.train_dictionary(dict_size, samples)
+    except zstandard.ZstdError:
+        return None
+
+
+def compress_bodies(conn, level=9, batch_rows=5000):
+    """
+    Compress the remaining TEXT values in emails.messages_json and
+    messages.body in place, storing a value only if it gets smaller.
+
+    The first call trains and stores a dictionary in zstd_dicts; later calls
+    (e.g. after an incremental ingest) reuse it, so only new rows are
+    touched. Commits per batch. Returns the number of values compressed.
+    """
+    require_zstandard()
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS zstd_dicts (dict_id INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+    row = cursor.execute("SELECT data FROM zstd_dicts ORDER BY rowid DESC LIMIT 1").fetchone()
+    if row:
+        dictionary = zstandard.ZstdCompressionDict(row[0])
+    else:
+        dictionary = train_dictionary(conn)
+        if dictionary is not None:
+            cursor.execute("INSERT INTO zstd_dicts (dict_id, data) VALUES (?, ?)",
+                           (dictionary.dict_id(), dictionary.as_bytes()))
+    compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+
+    compressed = 0
+    for table, column in COMPRESSED_COLUMNS:
+        last_rowid = 0
+        while True:
+            rows = cursor.execute(
+                f"SELECT rowid, {column} FROM {table} WHERE rowid > ? "
+                f"AND typeof({column}) = 'text' ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_rows)
+            ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for rowid, value in rows:
+                data = value.encode('utf-8')
+                blob = compressor.compress(data)
+                if len(blob) < len(data):
+                    updates.append((blob, rowid))
+            cursor.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", updates)
+            conn.commit()
+            compressed += len(updates)
+            last_rowid = rows[-1][0]
+    return compressed
@@ -8,73 +8,36 @@ Generates:
 4. Location network with coordinates
 """
 
-import sqlite3
 import json
 import csv
 import re
-from datetime import datetime
+import sys
+from itertools import groupby
 from pathlib import Path
 from collections import defaultdict
 import numpy as np
 
+from email_store import connect, has_table
+
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 DB_PATH = PROJECT_ROOT / "preprocessed" / "epstein_emails.db"
 OUTPUT_DIR = PROJECT_ROOT / "data" / "expanded"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
-def parse_timestamp(ts_str):
-    """Parse various timestamp formats from the email data"""
-    if not ts_str:
-        return None
-    
-    formats = [
-        "%m/%d/%Y %I:%M %p",
-        "%m/%d/%Y %I:%M:%S %p",
-        "%a, %b %d, %Y at %I:%M %p",
-        "%a, %b %d, %Y at %I:%M:%S %p",
-        "%b %d, %Y, at %I:%M %p",
-        "%b %d, %Y, at %I:%M:%S %p",
-        "%Y-%m-%d",
-        "%m/%d/%Y",
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(ts_str.strip(), fmt)
-        except ValueError:
-            continue
-    
-    # Try extracting date portions
-    date_patterns = [
-        r'(\d{1,2}/\d{1,2}/\d{4})',
-        r'(\w+\s+\d{1,2},?\s+\d{4})',
-    ]
-    for pattern in date_patterns:
-        match = re.search(pattern, ts_str)
-        if match:
-            try:
-                return datetime.strptime(match.group(1), "%m/%d/%Y")
-            except:
-                try:
-                    return datetime.strptime(match.group(1).replace(",", ""), "%B %d %Y")
-                except:
-                    pass
-    return None
-
 
 def extract_emails_and_names():
     """Extract all names and emails from the database"""
     print("Extracting names and emails...")
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     # Get all people with their thread counts
     cursor.execute("""
-        SELECT p.name, p.email, p.total_threads,
-               (SELECT COUNT(DISTINCT thread_id) FROM email_participants WHERE person_id = p.id) as actual_threads
+        SELECT p.name, p.email, p.total_threads, s.threads as actual_threads
         FROM people p
+        LEFT JOIN person_stats s ON s.person_id = p.id
         WHERE p.name != '' AND LENGTH(p.name) > 1
         ORDER BY p.total_threads DESC
     """)
@@ -121,46 +84,44 @@ def extract_timeline_data():
     """Extract dates from emails for timeline visualization"""
     print("Extracting timeline data...")
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
-    cursor.execute("SELECT thread_id, subject, messages_json FROM emails")
+    # Timestamps were parsed at ingest; the sent_at index covers the range
+    cursor.execute("""
+        SELECT e.subject, m.sender, m.sent_at, body_text(m.body)
+        FROM messages m
+        JOIN emails e ON e.thread_id = m.thread_id
+        WHERE m.sent_at >= '2000-01-01' AND m.sent_at < '2026-01-01'
+        ORDER BY e.rowid, m.ordinal
+    """)
     
-    timeline_events = []
+    timeline_events = defaultdict(list)
     date_counts = defaultdict(int)
     
-    for thread_id, subject, messages_json in cursor.fetchall():
-        try:
-            messages = json.loads(messages_json) if messages_json else []
-        except json.JSONDecodeError:
-            continue
+    for subject, sender, sent_at, body in cursor:
+        date_str = sent_at[:10]
+        date_counts[date_str] += 1
         
-        for msg in messages:
-            ts = msg.get("timestamp")
-            dt = parse_timestamp(ts)
-            if dt and dt.year >= 2000 and dt.year <= 2025:
-                date_str = dt.strftime("%Y-%m-%d")
-                date_counts[date_str] += 1
-                
-                # Sample some events
-                if len([e for e in timeline_events if e["date"] == date_str]) < 3:
-                    sender = msg.get("sender") or "Unknown"
-                    # Clean sender name
-                    sender_name = re.sub(r'\s*[\[<].*', '', str(sender)).strip()
-                    timeline_events.append({
-                        "date": date_str,
-                        "timestamp": dt.isoformat(),
-                        "subject": subject or "(no subject)",
-                        "sender": sender_name,
-                        "snippet": (msg.get("body", "")[:150] + "...") if msg.get("body") else ""
-                    })
+        # Sample some events
+        if len(timeline_events[date_str]) < 3:
+            sender = sender or "Unknown"
+            # Clean sender name
+            sender_name = re.sub(r'\s*[\[<].*', '', str(sender)).strip()
+            timeline_events[date_str].append({
+                "date": date_str,
+                "timestamp": sent_at,
+                "subject": subject or "(no subject)",
+                "sender": sender_name,
+                "snippet": (body[:150] + "...") if body else ""
+            })
     
     conn.close()
     
     # Aggregate by date
     timeline_summary = []
     for date, count in sorted(date_counts.items()):
-        events = [e for e in timeline_events if e["date"] == date][:3]
+        events = timeline_events[date]
         timeline_summary.append({
             "date": date,
             "count": count,
@@ -215,26 +176,28 @@ def extract_locations():
         "moscow": {"lat": 55.7558, "lng": 37.6173, "type": "city"},
     }
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT e.thread_id, e.messages_json, GROUP_CONCAT(DISTINCT p.name) as participants
-        FROM emails e
-        LEFT JOIN email_participants ep ON e.thread_id = ep.thread_id
-        LEFT JOIN people p ON ep.person_id = p.id
-        GROUP BY e.thread_id
+        SELECT ep.thread_id, GROUP_CONCAT(DISTINCT p.name) as participants
+        FROM email_participants ep
+        JOIN people p ON ep.person_id = p.id
+        GROUP BY ep.thread_id
+    """)
+    thread_people = dict(cursor.fetchall())
+    
+    cursor.execute("""
+        SELECT thread_id, body_text(body), subject
+        FROM messages
+        ORDER BY thread_id, ordinal
     """)
     
     location_mentions = defaultdict(lambda: {"count": 0, "people": set(), "threads": set()})
     
-    for thread_id, messages_json, participants in cursor.fetchall():
-        try:
-            messages = json.loads(messages_json) if messages_json else []
-        except json.JSONDecodeError:
-            continue
-        
-        text = " ".join((m.get("body") or "") + " " + (m.get("subject") or "") for m in messages).lower()
+    for thread_id, rows in groupby(cursor, key=lambda row: row[0]):
+        text = " ".join((body or "") + " " + (subject or "") for _, body, subject in rows).lower()
+        participants = thread_people.get(thread_id)
         participant_list = participants.split(",") if participants else []
         
         for loc_name, loc_data in known_locations.items():
@@ -270,31 +233,29 @@ def extract_topic_snippets():
     """Extract text snippets for topic embedding visualization"""
     print("Extracting topic snippets...")
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     
-    cursor.execute("SELECT thread_id, subject, messages_json FROM emails")
+    cursor.execute("""
+        SELECT m.thread_id, e.subject, m.sender, body_text(m.body), m.timestamp
+        FROM messages m
+        JOIN emails e ON e.thread_id = m.thread_id
+        WHERE m.body_length > 100
+        ORDER BY e.rowid, m.ordinal
+    """)
     
     snippets = []
-    for thread_id, subject, messages_json in cursor.fetchall():
-        try:
-            messages = json.loads(messages_json) if messages_json else []
-        except json.JSONDecodeError:
-            continue
-        
-        for msg in messages:
-            body = msg.get("body") or ""
-            if len(body) > 100:  # Only substantial messages
-                # Clean up the text
-                clean_text = re.sub(r'\s+', ' ', body).strip()
-                if len(clean_text) > 100:
-                    snippets.append({
-                        "thread_id": thread_id,
-                        "subject": subject or "(no subject)",
-                        "sender": msg.get("sender") or "Unknown",
-                        "text": clean_text[:500],  # Truncate for embedding
-                        "timestamp": msg.get("timestamp") or ""
-                    })
+    for thread_id, subject, sender, body, timestamp in cursor:
+        # Clean up the text (only substantial messages)
+        clean_text = re.sub(r'\s+', ' ', body).strip()
+        if len(clean_text) > 100:
+            snippets.append({
+                "thread_id": thread_id,
+                "subject": subject or "(no subject)",
+                "sender": sender or "Unknown",
+                "text": clean_text[:500],  # Truncate for embedding
+                "timestamp": timestamp or ""
+            })
     
     conn.close()
     return snippets
@@ -361,6 +322,13 @@ def main():
     print("Epstein Files - Expanded Analysis")
     print("=" * 60)
     
+    with connect(DB_PATH) as conn:
+        for table in ("messages", "person_stats"):
+            if not has_table(conn, table):
+                print(f"ERROR: {DB_PATH} has no {table} table")
+                print("Re-run scripts/process_emails.py to rebuild the database.")
+                sys.exit(1)
+    
     # 1. Names and Emails
     people = extract_emails_and_names()
     
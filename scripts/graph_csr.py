@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Binary CSR export of the co-occurrence graph.
+
+names.jsonl / edges.jsonl have to be parsed line by line into Python
+objects by every consumer. This export stores the same graph so it can be
+memory-mapped instead:
+
+  graph/nodes.arrow    Arrow IPC file: name, mentions, file_count, emails
+                       (row i is node i)
+  graph/offsets.npy    int64[n + 1]; node i's neighbours are
+                       targets[offsets[i]:offsets[i + 1]]
+  graph/targets.npy    int32[2m], neighbour ids sorted within each row
+  graph/weights.npy    int32[2m], shared threads of each (i, target) pair
+  graph/meta.json      format version and counts, written last
+
+Each undirected edge is stored in both rows. load_csr() opens the arrays
+with np.load(mmap_mode='r') and the node table through an Arrow memory
+map, so opening the graph costs a few syscalls regardless of its size,
+and pages are read only when touched.
+
+Usage:
+    python scripts/graph_csr.py [DIR]      # open an export and print load time and stats
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+FORMAT_VERSION = 1
+DEFAULT_DIR = Path(__file__).parent.parent / "data" / "processed" / "graph"
+
+
+def write_csr(persons_df, cooccur_df, output_dir):
+    """Write persons_df / cooccur_df (as export_data() takes them) as a CSR export."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "meta.json").unlink(missing_ok=True)
+
+    names = persons_df['normalized']
+    index = {name: i for i, name in enumerate(names)}
+    n = len(index)
+
+    a = cooccur_df['entity_a'].map(index)
+    b = cooccur_df['entity_b'].map(index)
+    keep = (a.notna() & b.notna() & (a != b)).to_numpy()
+    a = a[keep].to_numpy(dtype=np.int64)
+    b = b[keep].to_numpy(dtype=np.int64)
+    w = cooccur_df['file_count'].to_numpy()[keep]
+
+    # Both directions, sorted by (row, target)
+    rows = np.concatenate([a, b])
+    cols = np.concatenate([b, a])
+    weights = np.concatenate([w, w])
+    order = np.lexsort((cols, rows))
+    rows, cols, weights = rows[order], cols[order], weights[order]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=offsets[1:])
+
+    np.save(output_dir / "offsets.npy", offsets)
+    np.save(output_dir / "targets.npy", cols.astype(np.int32))
+    np.save(output_dir / "weights.npy", weights.astype(np.int32))
+
+    table = pa.table({
+        'name': pa.array(names.tolist(), type=pa.string()),
+        'mentions': pa.array(persons_df['total'].to_numpy(), type=pa.int64()),
+        'file_count': pa.array(persons_df['file_count'].to_numpy(), type=pa.int64()),
+        'emails': pa.array([list(e) for e in persons_df['emails']], type=pa.list_(pa.string())),
+    })
+    with pa.OSFile(str(output_dir / "nodes.arrow"), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    with open(output_dir / "meta.json", 'w') as f:
+        json.dump({'format': FORMAT_VERSION, 'nodes': n, 'edges': len(a)}, f)
+    print(f"CSR graph exported to {output_dir} ({n} nodes, {len(a)} edges)")
+
+
+class CSRGraph:
+    """
+    A memory-mapped CSR export. offsets / targets / weights are read-only
+    numpy memmaps and nodes is an Arrow table over a memory map.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "meta.json") as f:
+            self.meta = json.load(f)
+        if self.meta['format'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported CSR export format {self.meta['format']} in {self.path}")
+        self.offsets = np.load(self.path / "offsets.npy", mmap_mode='r')
+        self.targets = np.load(self.path / "targets.npy", mmap_mode='r')
+        self.weights = np.load(self.path / "weights.npy", mmap_mode='r')
+        self.nodes = pa.ipc.open_file(pa.memory_map(str(self.path / "nodes.arrow"))).read_all()
+        self._index = None
+
+    def __len__(self):
+        return self.meta['nodes']
+
+    @property
+    def names(self):
+        return self.nodes.column('name')
+
+    def index(self, name):
+        """Node id of `name` (the name -> id dict is built on first use)."""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names.to_pylist())}
+        return self._index[name]
+
+    def degree(self):
+        return np.diff(self.offsets)
+
+    def neighbors(self, i):
+        """(neighbour ids, weights) of node i, as memmap slices."""
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return self.targets[start:stop], self.weights[start:stop]
+
+    def to_frames(self):
+        """
+        (persons_df, cooccur_df) shaped like build_graph's extract_person_entities /
+        extract_cooccurrences output, for workers that start from the export.
+        """
+        import pandas as pd
+        persons_df = pd.DataFrame({
+            'normalized': self.names.to_pylist(),
+            'total': self.nodes.column('mentions').to_numpy(),
+            'file_count': self.nodes.column('file_count').to_numpy(),
+            'emails': self.nodes.column('emails').to_pylist(),
+        })
+        rows = np.repeat(np.arange(len(self)), self.degree())
+        upper = rows < self.targets
+        names = persons_df['normalized'].to_numpy()
+        a, b = names[rows[upper]], names[self.targets[upper]]
+        swap = a > b
+        cooccur_df = pd.DataFrame({
+            'entity_a': np.where(swap, b, a),
+            'entity_b': np.where(swap, a, b),
+            'file_count': np.asarray(self.weights[upper], dtype=np.int64),
+        })
+        cooccur_df = (cooccur_df
+                      .sort_values(['file_count', 'entity_a', 'entity_b'], ascending=[False, True, True], kind='stable')
+                      .reset_index(drop=True))
+        return persons_df, cooccur_df
+
+    def to_scipy(self):
+        """The adjacency as a scipy.sparse.csr_matrix sharing the mapped arrays."""
+        import scipy.sparse as sp
+        n = len(self)
+        return sp.csr_matrix((self.weights, self.targets, self.offsets), shape=(n, n), copy=False)
+
+
+def load_csr(path=DEFAULT_DIR):
+    return CSRGraph(path)
+
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DIR
+    start = time.perf_counter()
+    graph = load_csr(path)
+    elapsed = time.perf_counter() - start
+    degree = graph.degree()
+    print(f"Opened {path} in {elapsed * 1000:.2f} ms")
+    print(f"  {len(graph)} nodes, {graph.meta['edges']} edges")
+    if len(graph):
+        top = int(np.argmax(degree))
+        print(f"  Highest degree: {graph.names[top].as_py()} ({degree[top]})")
+
+
+if __name__ == "__main__":
+    main()
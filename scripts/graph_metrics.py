@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Graph analytics stage: node metrics, community ids and per-community
+aggregates, computed once per build and stored in versioned SQLite tables
+next to the graph they describe.
+
+  metrics_runs       one row per computed version (graph fingerprint, parameters)
+  node_metrics       degree, weighted degree, betweenness, closeness,
+                     eigenvector centrality and community per node
+  community_metrics  size, internal edges/weight and top members per community
+  metrics_edges      the weighted edge list each version was computed on
+
+The email graph is the `top_n` most active canonical people (3+ threads)
+with their 2+ thread co-occurrences; the NER graph (--ner-db, the
+database the Streamlit apps read) is the `top_n` PERSON entities in the
+most files with their entity_cooccurrence edges. A run whose graph
+fingerprint and parameters match any stored version reuses it, so
+build_graph.py, build_threejs_graph.py and the apps share one Louvain run
+and one set of centralities, and callers with different parameters can
+alternate without recomputing. Versions beyond the newest KEEP_VERSIONS
+of each source and parameter set are pruned.
+
+Communities are maintained incrementally (communities.update): when the
+graph changed since the latest version with the same parameters, only the
+nodes on added, removed or reweighted edges are re-optimized, starting
+from the previous partition, so community ids (and the frontends' colors)
+stay stable. When more than INCREMENTAL_MAX_CHANGE of the nodes are
+touched, or with --full, Louvain reruns on the whole graph and its
+communities are matched to the previous ids by overlap.
+
+Usage:
+    python scripts/graph_metrics.py                 # email database
+    python scripts/graph_metrics.py --ner-db preprocessed/epstein_files/epstein.db
+    python scripts/graph_metrics.py --top-n 1000 --epsilon 0.05 --force
+    python scripts/graph_metrics.py --full          # rerun Louvain from scratch
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import networkx as nx
+
+import centrality
+import communities
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DB_PATH = PROJECT_ROOT / "preprocessed" / "epstein_emails.db"
+
+METRICS_TOP_N = 500         # covers the 150-node summary and the 200-node Three.js graph
+BETWEENNESS_EPSILON = 0.1   # exact for graphs up to ~460 nodes (see centrality.pivot_count)
+COMMUNITY_SEED = communities.SEED
+INCREMENTAL_MAX_CHANGE = 0.3    # fraction of touched nodes above which Louvain reruns in full
+KEEP_VERSIONS = 5
+TOP_MEMBERS = 8
+
+
+def init_tables(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS metrics_runs (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            source TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            params TEXT NOT NULL,
+            node_count INTEGER,
+            edge_count INTEGER,
+            community_count INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS node_metrics (
+            version INTEGER NOT NULL REFERENCES metrics_runs(version),
+            node TEXT NOT NULL,
+            activity INTEGER,
+            degree INTEGER,
+            weighted_degree REAL,
+            betweenness REAL,
+            closeness REAL,
+            eigenvector REAL,
+            community INTEGER,
+            PRIMARY KEY (version, node)
+        );
+        CREATE TABLE IF NOT EXISTS community_metrics (
+            version INTEGER NOT NULL REFERENCES metrics_runs(version),
+            community INTEGER NOT NULL,
+            size INTEGER,
+            internal_edges INTEGER,
+            internal_weight REAL,
+            top_members TEXT,
+            PRIMARY KEY (version, community)
+        );
+        CREATE TABLE IF NOT EXISTS metrics_edges (
+            version INTEGER NOT NULL REFERENCES metrics_runs(version),
+            a TEXT NOT NULL,
+            b TEXT NOT NULL,
+            weight REAL,
+            PRIMARY KEY (version, a, b)
+        );
+        CREATE INDEX IF NOT EXISTS idx_node_metrics_community ON node_metrics(version, community);
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(metrics_runs)")}
+    if "method" not in columns:
+        conn.execute("ALTER TABLE metrics_runs ADD COLUMN method TEXT")
+    conn.commit()
+
+
+def load_email_graph(conn, top_n=METRICS_TOP_N, min_threads=3, min_cooccur=2):
+    """Top `top_n` canonical people and their co-occurrences (node attribute: activity)."""
+    G = nx.Graph()
+    G.add_nodes_from((name, {'activity': threads}) for name, threads in conn.execute("""
+        SELECT name, total_threads FROM canonical_person
+        WHERE total_threads >= ?
+        ORDER BY total_threads DESC, id
+        LIMIT ?
+    """, (min_threads, top_n)))
+    G.add_edges_from((a, b, {'weight': w}) for a, b, w in conn.execute("""
+        WITH top AS (
+            SELECT id FROM canonical_person
+            WHERE total_threads >= ?
+            ORDER BY total_threads DESC, id
+            LIMIT ?
+        )
+        SELECT a.name, b.name, c.thread_count
+        FROM canonical_cooccurrence c
+        JOIN top ta ON ta.id = c.canonical_a
+        JOIN top tb ON tb.id = c.canonical_b
+        JOIN canonical_person a ON a.id = c.canonical_a
+        JOIN canonical_person b ON b.id = c.canonical_b
+        WHERE c.thread_count >= ?
+    """, (min_threads, top_n, min_cooccur)))
+    return G
+
+
+def load_ner_graph(conn, top_n=METRICS_TOP_N, min_files=2):
+    """Top `top_n` PERSON entities by file count and their entity_cooccurrence edges."""
+    has_index = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='entity_names'").fetchone()
+    if has_index:
+        # Precomputed counts from preprocessed/name_index.py
+        people = conn.execute("""
+            SELECT name, person_files FROM entity_names
+            WHERE person_files >= ? ORDER BY person_files DESC, name LIMIT ?
+        """, (min_files, top_n)).fetchall()
+    else:
+        people = conn.execute("""
+            SELECT normalized, COUNT(DISTINCT file_id) AS files FROM entities
+            WHERE entity_label = 'PERSON'
+            GROUP BY normalized HAVING files >= ?
+            ORDER BY files DESC, normalized LIMIT ?
+        """, (min_files, top_n)).fetchall()
+    G = nx.Graph()
+    G.add_nodes_from((name, {'activity': files}) for name, files in people)
+    for a, b, w in conn.execute(
+            "SELECT entity_a, entity_b, file_count FROM entity_cooccurrence WHERE file_count >= ?",
+            (min_files,)):
+        if a in G and b in G and a != b:
+            G.add_edge(a, b, weight=w)
+    return G
+
+
+def detect_communities(conn, G, source, params, full=False):
+    """
+    Partition of G and how it was found ("full" or "incremental"), carried
+    over from the latest version with the same source and parameters.
+    """
+    row = conn.execute("""
+        SELECT version FROM metrics_runs WHERE source = ? AND params = ?
+        ORDER BY version DESC LIMIT 1
+    """, (source, json.dumps(params, sort_keys=True))).fetchone()
+    if row is None:
+        return communities.louvain(G, seed=params["seed"]), "full"
+
+    previous = dict(conn.execute("SELECT node, community FROM node_metrics WHERE version = ?", (row[0],)))
+    if full:
+        return communities.louvain(G, previous, seed=params["seed"]), "full"
+
+    old_edges = {(a, b): w for a, b, w in conn.execute(
+        "SELECT a, b, weight FROM metrics_edges WHERE version = ?", (row[0],))}
+    touched = communities.touched_nodes(old_edges, G)
+    # New nodes with edges are touched as well; count each node once
+    changed = set(touched) | {node for node in G if node not in previous}
+    if len(changed) > INCREMENTAL_MAX_CHANGE * G.number_of_nodes():
+        return communities.louvain(G, previous, seed=params["seed"]), "full"
+    print(f"  Re-optimizing communities around {len(touched)} touched nodes (version {row[0]})")
+    return communities.update(G, previous, touched), "incremental"
+
+
+def compute_metrics(G, community_of, epsilon=BETWEENNESS_EPSILON, workers=1):
+    """Return (node rows, community rows) for G and its partition, ready for store_metrics()."""
+    members_of = defaultdict(set)
+    for node, cid in community_of.items():
+        members_of[cid].add(node)
+
+    betweenness = centrality.betweenness(G, epsilon=epsilon, workers=workers)
+    closeness = centrality.closeness(G, workers=workers)
+    eigenvector = centrality.eigenvector(G, weight='weight')
+    weighted = dict(G.degree(weight='weight'))
+
+    nodes = [
+        (node, G.nodes[node].get('activity'), G.degree(node), weighted[node],
+         betweenness[node], closeness[node], eigenvector[node], community_of[node])
+        for node in G
+    ]
+
+    community_rows = []
+    for cid, members in sorted(members_of.items()):
+        sub = G.subgraph(members)
+        top = sorted(members, key=lambda m: (-G.degree(m), m))[:TOP_MEMBERS]
+        community_rows.append((cid, len(members), sub.number_of_edges(),
+                               sub.size(weight='weight'), json.dumps(top)))
+    return nodes, community_rows
+
+
+def latest_version(conn, source=None):
+    """Newest metrics version (optionally for one source), or None."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='metrics_runs'").fetchone():
+        return None
+    if source:
+        row = conn.execute("SELECT MAX(version) FROM metrics_runs WHERE source = ?", (source,)).fetchone()
+    else:
+        row = conn.execute("SELECT MAX(version) FROM metrics_runs").fetchone()
+    return row[0]
+
+
+def store_metrics(conn, G, source, fingerprint, params, method, nodes, community_rows):
+    """Write one version of node and community metrics and its edges; returns the version."""
+    cursor = conn.execute("""
+        INSERT INTO metrics_runs (created_at, source, fingerprint, params, node_count, edge_count,
+                                  community_count, method)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (datetime.now(timezone.utc).isoformat(timespec='seconds'), source, fingerprint,
+          json.dumps(params, sort_keys=True), G.number_of_nodes(), G.number_of_edges(),
+          len(community_rows), method))
+    version = cursor.lastrowid
+    conn.executemany("INSERT INTO node_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     ((version,) + row for row in nodes))
+    conn.executemany("INSERT INTO community_metrics VALUES (?, ?, ?, ?, ?, ?)",
+                     ((version,) + row for row in community_rows))
+    conn.executemany("INSERT INTO metrics_edges VALUES (?, ?, ?, ?)",
+                     ((version, a, b, w) for (a, b), w in communities.edge_weights(G).items()))
+
+    # Keep the newest KEEP_VERSIONS runs of this source and parameters; other
+    # series must not push out the versions this one reuses and diffs against
+    stale = [v for (v,) in conn.execute("""
+        SELECT version FROM metrics_runs WHERE source = ? AND params = ?
+        ORDER BY version DESC LIMIT -1 OFFSET ?
+    """, (source, json.dumps(params, sort_keys=True), KEEP_VERSIONS))]
+    for table in ("node_metrics", "community_metrics", "metrics_edges", "metrics_runs"):
+        conn.executemany(f"DELETE FROM {table} WHERE version = ?", ((v,) for v in stale))
+    conn.commit()
+    return version
+
+
+def ensure_metrics(conn, source="email", top_n=METRICS_TOP_N, epsilon=BETWEENNESS_EPSILON,
+                   workers=1, force=False, full=False):
+    """
+    Return the metrics version for the current graph, computing and storing
+    it only when no stored run has the same graph and parameters. Callers
+    with different parameters (e.g. top_n) each reuse their own run.
+    Communities are updated incrementally from the latest run with the same
+    parameters unless `full`.
+    """
+    init_tables(conn)
+    G = load_ner_graph(conn, top_n) if source == "ner" else load_email_graph(conn, top_n)
+    G.remove_nodes_from(list(nx.isolates(G)))
+    params = {"top_n": top_n, "epsilon": epsilon, "seed": COMMUNITY_SEED}
+    fingerprint = centrality.graph_fingerprint(G, weight='weight')
+
+    if not (force or full):
+        row = conn.execute("""
+            SELECT version FROM metrics_runs
+            WHERE source = ? AND fingerprint = ? AND params = ?
+            ORDER BY version DESC LIMIT 1
+        """, (source, fingerprint, json.dumps(params, sort_keys=True))).fetchone()
+        if row:
+            print(f"Graph metrics up to date (version {row[0]})")
+            return row[0]
+
+    start = time.time()
+    print(f"Computing graph metrics: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges...")
+    partition, method = detect_communities(conn, G, source, params, full=full)
+    nodes, community_rows = compute_metrics(G, partition, epsilon=epsilon, workers=workers)
+    version = store_metrics(conn, G, source, fingerprint, params, method, nodes, community_rows)
+    print(f"  Stored version {version} ({len(community_rows)} communities, {method}) "
+          f"in {time.time() - start:.1f}s")
+    return version
+
+
+def load_node_metrics(conn, version):
+    """Node metrics of one version as {node: dict}."""
+    cursor = conn.execute("""
+        SELECT node, activity, degree, weighted_degree, betweenness, closeness, eigenvector, community
+        FROM node_metrics WHERE version = ?
+    """, (version,))
+    columns = [d[0] for d in cursor.description]
+    return {row[0]: dict(zip(columns, row)) for row in cursor}
+
+
+def load_communities(conn, version):
+    """Community rows of one version, largest first (ids are stable, not ranks), with top_members decoded."""
+    return [
+        {'community': cid, 'size': size, 'internal_edges': edges,
+         'internal_weight': weight, 'top_members': json.loads(top)}
+        for cid, size, edges, weight, top in conn.execute("""
+            SELECT community, size, internal_edges, internal_weight, top_members
+            FROM community_metrics WHERE version = ? ORDER BY size DESC, community
+        """, (version,))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ner-db", type=Path, default=None,
+                        help="compute for the NER database (entity_cooccurrence) instead of the email database")
+    parser.add_argument("--top-n", type=int, default=METRICS_TOP_N)
+    parser.add_argument("--epsilon", type=float, default=BETWEENNESS_EPSILON,
+                        help="betweenness error bound (0 = exact)")
+    parser.add_argument("--workers", type=int, default=0, help="centrality processes (0 = one per CPU)")
+    parser.add_argument("--force", action="store_true", help="recompute even if the graph is unchanged")
+    parser.add_argument("--full", action="store_true",
+                        help="rerun Louvain on the whole graph instead of updating the previous communities")
+    args = parser.parse_args()
+
+    db_path = args.ner_db or DB_PATH
+    if not db_path.exists():
+        print(f"ERROR: Database not found at {db_path}")
+        return
+    conn = sqlite3.connect(str(db_path))
+    ensure_metrics(conn, source="ner" if args.ner_db else "email", top_n=args.top_n,
+                   epsilon=args.epsilon or None, workers=args.workers or os.cpu_count() or 1,
+                   force=args.force, full=args.full)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
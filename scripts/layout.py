@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Offline ForceAtlas2 layout for the PyVis exports and the Three.js page.
+
+The HTML graphs used to ship with barnes_hut physics on, so every page
+load re-ran the simulation and large graphs froze the tab while they
+settled. forceatlas2() computes the positions once at build time; the
+exporters write them into the nodes as x/y and turn physics off.
+
+Forces follow ForceAtlas2 (Jacomy et al. 2014): degree-weighted repulsion
+k_r (d_i + 1)(d_j + 1) / distance, linear attraction along weighted edges,
+degree-weighted gravity towards the origin, and the adaptive per-node
+speed that damps swinging nodes. Repulsion is exact (chunked O(n^2)) for
+small graphs and Barnes-Hut above EXACT_BELOW nodes: a quadtree (an
+octree with dims=3) is built level by level with np.bincount and walked
+for all nodes at once as an array of (node, cell) pairs, so a step costs
+O(n log n) array work and no Python loop over nodes. The tree deepens
+until no leaf holds more than LEAF_SIZE nodes, so clustered layouts get
+more levels rather than crowded leaves; cells that are still too close to
+approximate are summed exactly once they hold at most LEAF_SIZE nodes, so
+the error is bounded by theta alone.
+
+Positions are kept in layout units (what load_positions / save_positions
+store) and scaled to screen pixels only on export (to_screen), so a
+build can warm-start from the previous one: known nodes keep their
+position, new nodes start next to their placed neighbours, and far fewer
+iterations are needed.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+ITERATIONS = 400
+WARM_ITERATIONS = 100
+EXACT_BELOW = 1500          # node count from which repulsion switches to Barnes-Hut
+EXACT_BELOW_3D = 250        # the same for dims=3, where exact pairs cost more and the octree prunes more
+THETA = 1.2                 # Barnes-Hut opening criterion (cell size / distance)
+THETA_3D = 0.9              # cubes reach further past their side than squares (~5% median force error)
+LEAF_SIZE = 16              # Barnes-Hut cells up to this many nodes are summed exactly when near
+MAX_DEPTH = 20              # tree depth limit (only reached by near-coincident nodes)
+GRAVITY = 1.0
+SEED = 42
+
+
+def _repulsion_exact(pos, mass, kr, chunk=1024):
+    force = np.zeros_like(pos)
+    for start in range(0, len(pos), chunk):
+        delta = pos[start:start + chunk, None, :] - pos[None, :, :]
+        dist2 = np.maximum((delta ** 2).sum(axis=2), 1e-9)
+        factor = kr * mass[start:start + chunk, None] * mass[None, :] / dist2
+        force[start:start + chunk] = (delta * factor[:, :, None]).sum(axis=1)
+    return force
+
+
+def _add_pair_forces(force, nodes, delta, factor):
+    for axis in range(force.shape[1]):
+        force[:, axis] += np.bincount(nodes, delta[:, axis] * factor, minlength=len(force))
+
+
+def _morton(coords, depth):
+    """
+    Morton code of integer grid coords (n x dims) with 2^depth cells per
+    axis: bits interleaved so that a cell's code at a coarser level is the
+    code shifted right by dims bits per level, and the children of a cell
+    are a contiguous range of codes.
+    """
+    dims = coords.shape[1]
+    codes = np.zeros(len(coords), dtype=np.int64)
+    for bit in range(depth):
+        for axis in range(dims):
+            codes |= ((coords[:, axis] >> bit) & 1) << (bit * dims + dims - 1 - axis)
+    return codes
+
+
+def _repulsion_barnes_hut(pos, mass, kr, theta=THETA):
+    n, dims = pos.shape
+    branching = 1 << dims       # quadtree in 2D, octree in 3D
+    low = pos.min(axis=0)
+    size = float((pos.max(axis=0) - low).max()) + 1e-9
+
+    # Deepen until no leaf holds more than LEAF_SIZE nodes, so clusters get
+    # more levels instead of huge leaves (coincident nodes stop at MAX_DEPTH)
+    depth = max(1, int(np.ceil(np.log(n / LEAF_SIZE) / np.log(branching)))) if n > LEAF_SIZE else 1
+    max_depth = min(MAX_DEPTH, 62 // dims)
+    while True:
+        leaf_xy = np.minimum(((pos - low) / size * (1 << depth)).astype(np.int64), (1 << depth) - 1)
+        leaves = _morton(leaf_xy, depth)
+        if depth >= max_depth or np.unique(leaves, return_counts=True)[1].max() <= LEAF_SIZE:
+            break
+        depth += 1
+
+    # Per level, over the non-empty cells only: sorted codes, each node's
+    # cell, members (slices of `order`), mass and center of mass
+    order = np.argsort(leaves, kind='stable')
+    levels = []
+    for level in range(depth + 1):
+        codes = leaves[order] >> (dims * (depth - level))
+        ids, first, cell_of, counts = np.unique(codes, return_index=True, return_inverse=True, return_counts=True)
+        node_cell = np.empty(n, dtype=np.int64)
+        node_cell[order] = cell_of
+        m = np.bincount(cell_of, mass[order])
+        com = np.stack([np.bincount(cell_of, (mass * pos[:, axis])[order]) / m for axis in range(dims)], axis=1)
+        levels.append((ids, node_cell, first, counts, m, com))
+    # Range of each cell's non-empty children in the next level
+    child_ranges = [(np.searchsorted(below[0], ids << dims), np.searchsorted(below[0], (ids + 1) << dims))
+                    for (ids, *_), below in zip(levels, levels[1:])]
+
+    force = np.zeros_like(pos)
+    nodes = np.arange(n)
+    cells = np.zeros(n, dtype=np.int64)       # index into the level's non-empty cells
+    for level, (ids, node_cell, first, counts, cell_mass, cell_com) in enumerate(levels):
+        m = cell_mass[cells]
+        delta = pos[nodes] - cell_com[cells]
+        dist2 = np.maximum((delta ** 2).sum(axis=1), 1e-9)
+        own = node_cell[nodes] == cells
+        far = ~own & ((size / (1 << level)) ** 2 < theta ** 2 * dist2)
+        _add_pair_forces(force, nodes[far], delta[far], kr * mass[nodes[far]] * m[far] / dist2[far])
+
+        # Near cells with few nodes (all of them at the last level) are summed
+        # exactly, node by node; the rest are opened
+        near = ~far
+        exact = near & ((counts[cells] <= LEAF_SIZE) | (level == depth))
+        if exact.any():
+            pair_nodes, slots = _expand(nodes[exact], first[cells[exact]], counts[cells[exact]])
+            others = order[slots]
+            delta = pos[pair_nodes] - pos[others]
+            dist2 = np.maximum((delta ** 2).sum(axis=1), 1e-9)
+            _add_pair_forces(force, pair_nodes, delta, kr * mass[pair_nodes] * mass[others] / dist2)
+
+        opened = near & ~exact
+        if level < depth and opened.any():
+            # Open the cell: pair each node with its non-empty children
+            start, end = child_ranges[level]
+            cells = cells[opened]
+            nodes, cells = _expand(nodes[opened], start[cells], end[cells] - start[cells])
+    return force
+
+
+def _expand(nodes, starts, counts):
+    """Pair each of `nodes` with the `counts` consecutive indices from its start."""
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(nodes, counts), np.repeat(starts, counts) + within
+
+
+def _initial_positions(nodes, sources, targets, pos, rng, dims=2):
+    """Previous positions where known; new nodes at the mean of placed neighbours, else random."""
+    n = len(nodes)
+    spread = np.sqrt(n) * 10
+    init = rng.uniform(-spread, spread, size=(n, dims))
+    if not pos:
+        return init
+    known = np.array([node in pos for node in nodes])
+    if known.any():
+        init[known] = [pos[node] for node in np.asarray(nodes, dtype=object)[known]]
+    # One pass of neighbour averaging places new nodes next to their component
+    sums = np.zeros((n, dims))
+    counts = np.zeros(n)
+    for a, b in ((sources, targets), (targets, sources)):
+        take = known[b] & ~known[a]
+        np.add.at(sums, a[take], init[b[take]])
+        np.add.at(counts, a[take], 1)
+    placed = counts > 0
+    jitter = rng.normal(scale=1.0, size=(placed.sum(), dims))
+    init[placed] = sums[placed] / counts[placed, None] + jitter
+    return init
+
+
+def community_seeds(community_of, dims=2, seed=SEED):
+    """
+    Starting positions {node: coords} that place each community's members
+    around its own center: centers spread evenly on a circle (a Fibonacci
+    sphere in 3D), largest community first, members scattered over a ball
+    whose volume is proportional to the community's size. Passed as `pos`,
+    the layout starts from the Louvain structure instead of untangling it,
+    and WARM_ITERATIONS are enough.
+    """
+    if not community_of:
+        return {}
+    n = len(community_of)
+    members = {}
+    for node, cid in community_of.items():
+        members.setdefault(cid, []).append(node)
+    groups = sorted(members.values(), key=lambda g: (-len(g), min(map(str, g))))
+    k = len(groups)
+    i = np.arange(k) + 0.5
+    if dims == 3:
+        phi = np.arccos(1 - 2 * i / k)
+        theta = np.pi * (1 + 5 ** 0.5) * i
+        directions = np.stack([np.cos(theta) * np.sin(phi), np.sin(theta) * np.sin(phi), np.cos(phi)], axis=1)
+    else:
+        angle = 2 * np.pi * i / k
+        directions = np.stack([np.cos(angle), np.sin(angle)], axis=1)
+    radius = np.sqrt(n) * 10
+    rng = np.random.default_rng(seed)
+    seeds = {}
+    for center, group in zip(directions * radius, groups):
+        spread = radius * 0.5 * (len(group) / n) ** (1 / dims)
+        offsets = rng.normal(size=(len(group), dims)) * spread
+        seeds.update((node, tuple(map(float, center + offset))) for node, offset in zip(group, offsets))
+    return seeds
+
+
+def forceatlas2(G, pos=None, iterations=None, weight='weight', gravity=GRAVITY,
+                scaling=None, theta=None, seed=SEED, dims=2):
+    """
+    ForceAtlas2 positions {node: (x, y)} for a networkx graph, in layout
+    units ({node: (x, y, z)} with dims=3). `pos` warm-starts from earlier
+    positions; iterations default to ITERATIONS cold and WARM_ITERATIONS
+    when most nodes are placed.
+    """
+    nodes = list(G)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = [(index[a], index[b], d.get(weight, 1)) for a, b, d in G.edges(data=True) if a != b]
+    sources = np.array([e[0] for e in edges], dtype=np.int64)
+    targets = np.array([e[1] for e in edges], dtype=np.int64)
+    weights = np.array([e[2] for e in edges], dtype=np.float64)
+
+    rng = np.random.default_rng(seed)
+    positions = _initial_positions(nodes, sources, targets, pos, rng, dims)
+    if iterations is None:
+        warm = bool(pos) and sum(node in pos for node in nodes) >= 0.5 * n
+        iterations = WARM_ITERATIONS if warm else ITERATIONS
+
+    mass = np.bincount(np.concatenate([sources, targets]), minlength=n).astype(np.float64) + 1
+    kr = scaling if scaling is not None else (2.0 if n < 100 else 10.0)
+    if theta is None:
+        theta = THETA if dims == 2 else THETA_3D
+    if n < (EXACT_BELOW if dims == 2 else EXACT_BELOW_3D):
+        repulse = lambda p: _repulsion_exact(p, mass, kr)
+    else:
+        repulse = lambda p: _repulsion_barnes_hut(p, mass, kr, theta)
+
+    previous = np.zeros_like(positions)
+    speed, efficiency = 1.0, 1.0
+    for _ in range(iterations):
+        force = repulse(positions)
+
+        # Attraction along edges, proportional to distance and weight
+        delta = positions[targets] - positions[sources]
+        pull = delta * weights[:, None]
+        for axis in range(dims):
+            force[:, axis] += (np.bincount(sources, pull[:, axis], minlength=n)
+                               - np.bincount(targets, pull[:, axis], minlength=n))
+
+        # Gravity towards the origin, keeps components together
+        radius = np.maximum(np.linalg.norm(positions, axis=1), 1e-9)
+        force -= (gravity * mass / radius)[:, None] * positions
+
+        # Adaptive speed (global swinging vs traction, per-node damping)
+        swinging = mass * np.linalg.norm(force - previous, axis=1)
+        traction = mass * np.linalg.norm(force + previous, axis=1) / 2
+        total_swinging, total_traction = swinging.sum(), traction.sum()
+        estimated = 0.05 * np.sqrt(n)
+        jitter = max(np.sqrt(estimated), min(10.0, estimated * total_traction / n ** 2))
+        if total_traction > 0 and total_swinging / total_traction > 2.0:
+            efficiency = max(efficiency * 0.5, 0.05)
+            jitter = max(jitter, 1.0)
+        target = jitter * efficiency * total_traction / max(total_swinging, 1e-9)
+        if total_swinging > jitter * total_traction:
+            efficiency = max(efficiency * 0.7, 0.05)
+        elif speed < 1000:
+            efficiency *= 1.3
+        speed += min(target - speed, 0.5 * speed)
+
+        factor = speed / (1 + np.sqrt(speed * swinging))
+        positions += force * factor[:, None]
+        previous = force
+
+    return {node: tuple(map(float, xy)) for node, xy in zip(nodes, positions)}
+
+
+def to_screen(pos, spread=40.0):
+    """Center positions and scale them so the RMS radius is spread * sqrt(n) pixels."""
+    if not pos:
+        return {}
+    coords = np.array(list(pos.values()))
+    coords -= coords.mean(axis=0)
+    rms = np.sqrt((coords ** 2).sum(axis=1).mean()) or 1.0
+    coords *= spread * np.sqrt(len(coords)) / rms
+    return {node: tuple(round(float(v), 1) for v in xy) for node, xy in zip(pos, coords)}
+
+
+def load_positions(path):
+    """Positions saved by save_positions(), or {} when there are none."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return {node: tuple(xy) for node, xy in json.load(f).items()}
+
+
+def save_positions(path, pos):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({node: [round(v, 4) for v in xy] for node, xy in pos.items()}, f)
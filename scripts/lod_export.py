@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Level-of-detail export of the full co-occurrence graph.
+
+The other HTML exports keep the top 150-300 people and drop the rest.
+This export keeps everyone: the graph is split into Louvain communities,
+and any community with more than max_nodes members is split again, up to
+MAX_DEPTH levels. Every group becomes one JSON file:
+
+  lod/root.json          one super-node per top-level community
+  lod/c/<path>.json      the children of one community: sub-community
+                         super-nodes, or people once it is small enough
+
+Paths name the community at each level ("3", "3-0", "3-0-2"), so a super-
+node "c:3-0" expands to lod/c/3-0.json. Each file carries its edges
+between its own nodes plus its external edges, aggregated by the leaf
+community on the other end (person-level in leaf files), which the
+viewer routes to whatever currently represents that community on screen.
+Node positions are precomputed (layout.forceatlas2); child positions are
+relative to the parent super-node.
+
+lod/index.html loads root.json and fetches a community's file on double
+click, so the page never holds more than the groups the reader opened.
+It uses fetch(), so serve the directory over HTTP (GitHub Pages, or
+`python -m http.server` in output/lod).
+"""
+
+import json
+import shutil
+from collections import defaultdict
+from pathlib import Path
+
+import networkx as nx
+
+import communities
+import layout
+
+LOD_MAX_NODES = 250         # nodes per file; larger communities are split again
+MAX_DEPTH = 4
+TOP_MEMBERS = 3             # names shown on a super-node
+
+
+def build_full_graph(persons_df, cooccur_df):
+    """Every person with a co-occurrence edge (node attribute: threads)."""
+    G = nx.Graph()
+    G.add_nodes_from((name, {'threads': int(total)})
+                     for name, total in zip(persons_df['normalized'], persons_df['total']))
+    G.add_weighted_edges_from(
+        (a, b, int(w)) for a, b, w in zip(cooccur_df['entity_a'], cooccur_df['entity_b'], cooccur_df['file_count'])
+        if a != b and a in G and b in G
+    )
+    G.remove_nodes_from(list(nx.isolates(G)))
+    return G
+
+
+def _child_path(path, cid):
+    return f"{path}-{cid}" if path else str(cid)
+
+
+def split_groups(G, max_nodes=LOD_MAX_NODES):
+    """
+    Hierarchy of groups: ({path: members}, {path: child paths}, {node: leaf path}).
+    The root group has path "".
+    """
+    members = {"": set(G)}
+    children = {}
+    leaf_of = {}
+    stack = [("", 0)]
+    while stack:
+        path, depth = stack.pop()
+        group = members[path]
+        parts = {}
+        if len(group) > max_nodes and depth < MAX_DEPTH:
+            partition = communities.louvain(G.subgraph(group))
+            for node, cid in partition.items():
+                parts.setdefault(cid, set()).add(node)
+        if len(parts) <= 1:
+            leaf_of.update((node, path) for node in group)
+            continue
+        children[path] = [_child_path(path, cid) for cid in sorted(parts)]
+        for cid in sorted(parts):
+            child = _child_path(path, cid)
+            members[child] = parts[cid]
+            stack.append((child, depth + 1))
+    return members, children, leaf_of
+
+
+def _super_node(G, path, group):
+    top = sorted(group, key=lambda n: (-G.nodes[n]['threads'], n))[:TOP_MEMBERS]
+    label = top[0].title() + (f" +{len(group) - 1}" if len(group) > 1 else "")
+    return {'id': f"c:{path}", 'path': path, 'size': len(group), 'label': label,
+            'top': [name.title() for name in top]}
+
+
+def _group_file(G, path, members, children, leaf_of, spread):
+    """JSON document for one group: its nodes, internal edges and external edges."""
+    group = members[path]
+    leaf = path not in children
+    if leaf:
+        local = {node: node for node in group}
+        nodes = [{'id': node, 'label': node.title(), 'threads': G.nodes[node]['threads']}
+                 for node in sorted(group)]
+    else:
+        depth = len(path.split('-')) if path else 0
+        local = {node: 'c:' + '-'.join(leaf_of[node].split('-')[:depth + 1]) for node in group}
+        nodes = [_super_node(G, child, members[child]) for child in children[path]]
+
+    internal = defaultdict(int)
+    external = defaultdict(int)
+    for u, v, w in G.edges(group, data='weight'):
+        if u not in group:
+            u, v = v, u
+        if v in group:
+            a, b = sorted((local[u], local[v]))
+            if a != b:
+                internal[(a, b)] += w
+        elif leaf:
+            external[(local[u], leaf_of[v], v)] += w
+        else:
+            external[(local[u], leaf_of[v], None)] += w
+
+    # Precomputed layout of this group's nodes
+    H = nx.Graph()
+    H.add_nodes_from(node['id'] for node in nodes)
+    H.add_weighted_edges_from((a, b, w) for (a, b), w in internal.items())
+    positions = layout.to_screen(layout.forceatlas2(H), spread=spread)
+    for node in nodes:
+        node['x'], node['y'] = positions[node['id']]
+
+    return {
+        'path': path,
+        'leaf': leaf,
+        'nodes': nodes,
+        'edges': [[a, b, w] for (a, b), w in sorted(internal.items())],
+        'external': [[src, target_path, target, w]
+                     for (src, target_path, target), w in sorted(external.items(), key=lambda e: (e[0][0], e[0][1], e[0][2] or ''))],
+    }
+
+
+def export_lod(G, output_dir, max_nodes=LOD_MAX_NODES):
+    """Write root.json, one c/<path>.json per community and index.html to output_dir."""
+    output_dir = Path(output_dir)
+    shutil.rmtree(output_dir / "c", ignore_errors=True)
+    (output_dir / "c").mkdir(parents=True, exist_ok=True)
+
+    members, children, leaf_of = split_groups(G, max_nodes)
+    for path in members:
+        document = _group_file(G, path, members, children, leaf_of, spread=40.0 if path == "" else 12.0)
+        target = output_dir / "root.json" if path == "" else output_dir / "c" / f"{path}.json"
+        with open(target, 'w') as f:
+            json.dump(document, f, separators=(',', ':'))
+
+    with open(output_dir / "index.html", 'w') as f:
+        f.write(VIEWER_HTML)
+
+    leaves = len(members) - len(children)
+    print(f"LOD export: {G.number_of_nodes()} people in {len(members)} files "
+          f"({leaves} leaf communities, {len(children.get('', []))} at the top level) -> {output_dir}")
+    return members
+
+
+VIEWER_HTML = '''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Epstein Email Network - Level of Detail</title>
+    <script src="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js"></script>
+    <style>
+        body { margin: 0; background: #222222; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; }
+        #network { width: 100vw; height: 100vh; }
+        #info { position: absolute; top: 10px; left: 10px; color: #fff; background: rgba(0,0,0,0.7);
+                padding: 12px 15px; border-radius: 8px; font-size: 12px; max-width: 300px; }
+        #info h2 { margin: 0 0 8px 0; font-size: 16px; }
+        #info button { margin-top: 8px; }
+    </style>
+</head>
+<body>
+    <div id="network"></div>
+    <div id="info">
+        <h2>Epstein Email Network</h2>
+        <div id="stats"></div>
+        <p>Double-click a community to expand it.</p>
+        <button onclick="reset()">Reset</button>
+    </div>
+    <script>
+    const palette = ['#e6194b', '#3cb44b', '#ffe119', '#4363d8', '#f58231', '#911eb4', '#46f0f0',
+                     '#f032e6', '#bcf60c', '#fabebe', '#008080', '#e6beff', '#9a6324', '#fffac8'];
+    const nodes = new vis.DataSet();
+    const edges = new vis.DataSet();
+    const network = new vis.Network(document.getElementById('network'), { nodes, edges }, {
+        physics: { enabled: false },
+        interaction: { hover: true, tooltipDelay: 100 },
+        nodes: { font: { color: 'white' } },
+        edges: { color: { color: 'rgba(150,150,150,0.4)' }, smooth: false },
+    });
+    let files = [];
+
+    function color(path) {
+        return palette[parseInt(path.split('-')[0], 10) % palette.length];
+    }
+
+    function addFile(doc, originX, originY) {
+        files.push(doc);
+        nodes.add(doc.nodes.map(n => n.path !== undefined ? {
+            id: n.id, label: n.label, shape: 'dot', size: 10 + 4 * Math.sqrt(n.size),
+            color: color(n.path), x: originX + n.x, y: originY + n.y,
+            title: `${n.size} people\\n${n.top.join(', ')}`,
+        } : {
+            id: n.id, label: n.label, shape: 'dot', size: Math.min(40, 5 + Math.sqrt(n.threads)),
+            color: color(doc.path || '0'), x: originX + n.x, y: originY + n.y,
+            title: `${n.label}\\nThreads: ${n.threads}`,
+        }));
+        redrawEdges();
+        document.getElementById('stats').textContent = `${nodes.length} nodes on screen, ${files.length} files loaded`;
+    }
+
+    // The visible node standing for a person in leaf community `path`
+    function resolve(path, person) {
+        if (person && nodes.get(person)) return person;
+        const parts = path.split('-');
+        for (let depth = parts.length; depth > 0; depth--) {
+            const id = 'c:' + parts.slice(0, depth).join('-');
+            if (nodes.get(id)) return id;
+        }
+        return null;
+    }
+
+    // A file holds every edge of its nodes, so a pair's full weight is the
+    // sum over the one file listing either end; both ends' files may be
+    // loaded, so files are combined with max instead of summed again
+    function redrawEdges() {
+        const weights = new Map();
+        for (const doc of files) {
+            const sums = new Map();
+            const add = (a, b, w) => {
+                if (!a || !b || a === b || !nodes.get(a) || !nodes.get(b)) return;
+                const key = a < b ? a + '\\u0000' + b : b + '\\u0000' + a;
+                sums.set(key, (sums.get(key) || 0) + w);
+            };
+            for (const [a, b, w] of doc.edges) add(a, b, w);
+            for (const [src, path, person, w] of doc.external) add(src, resolve(path, person), w);
+            for (const [key, w] of sums) weights.set(key, Math.max(weights.get(key) || 0, w));
+        }
+        edges.clear();
+        edges.add([...weights].map(([key, w]) => {
+            const [from, to] = key.split('\\u0000');
+            return { from, to, value: w, title: `${w} shared threads` };
+        }));
+    }
+
+    async function expand(id) {
+        const node = nodes.get(id);
+        if (!node || !id.startsWith('c:')) return;
+        const response = await fetch(`c/${id.slice(2)}.json`);
+        const doc = await response.json();
+        nodes.remove(id);
+        addFile(doc, node.x, node.y);
+    }
+
+    async function reset() {
+        nodes.clear();
+        edges.clear();
+        files = [];
+        const response = await fetch('root.json');
+        addFile(await response.json(), 0, 0);
+        network.fit();
+    }
+
+    network.on('doubleClick', params => {
+        if (params.nodes.length) expand(params.nodes[0]);
+    });
+    reset();
+    </script>
+</body>
+</html>
+'''
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Run the whole pipeline as a DAG with a content-addressed stage cache.
+
+  ingest ──> metrics ──> build_graph
+     │           └─────> threejs
+     └─────> expand_analysis
+
+Each stage declares the scripts it runs, the database tables it reads,
+its parameters and its outputs (files, directories or tables). Its
+fingerprint is a SHA-256 over the content of all of those inputs (tables
+by the ingest and metrics state that produced them, see table_digest()),
+taken when its dependencies have finished. After a stage runs, its output
+files are copied into an object store keyed by their own hash and a
+manifest is written under the fingerprint:
+
+  data/cache/pipeline/objects/ab/abcdef...     output file contents
+  data/cache/pipeline/stages/<stage>/<fp>.json  output path -> hash
+  data/cache/pipeline/logs/<stage>.log          stdout/stderr of the last run
+
+A stage whose fingerprint has a manifest is skipped: if its outputs on
+disk still match they are left alone ("cached"), otherwise they are
+copied back from the object store ("restored"), which also covers
+switching parameters back and forth. Table outputs cannot be restored,
+so a stage whose output tables changed since its manifest runs again.
+Ingest from the Hugging Face Hub cannot be fingerprinted without
+downloading it and always runs (incrementally); with --source or
+--offline its input is the local Arrow/Parquet files.
+
+Stages whose dependencies are done run concurrently in a process pool,
+and a report of status and wall time per stage is printed at the end.
+
+Usage:
+    python scripts/pipeline.py                          # everything
+    python scripts/pipeline.py --stages build_graph threejs --jobs 2
+    python scripts/pipeline.py --offline --embedding spectral
+    python scripts/pipeline.py --force build_graph      # ignore the cache for a stage
+    python scripts/pipeline.py --dry-run                # show what would run
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+DB_PATH = PROJECT_ROOT / "preprocessed" / "epstein_emails.db"
+CACHE_DIR = PROJECT_ROOT / "data" / "cache" / "pipeline"
+
+INGEST_TABLES = ("emails", "messages", "people", "email_participants", "person_cooccurrence",
+                 "person_stats", "canonical_person", "canonical_cooccurrence", "thread_hashes")
+METRICS_TABLES = ("metrics_runs", "node_metrics", "community_metrics", "metrics_edges")
+
+STAGES = {
+    "ingest": {
+        "deps": (),
+        "code": ("process_emails.py", "arrow_source.py", "canonical.py", "cooccurrence.py", "email_store.py"),
+        "tables": (),
+        "outputs": [("table", t) for t in INGEST_TABLES],
+    },
+    "metrics": {
+        "deps": ("ingest",),
+        "code": ("graph_metrics.py", "centrality.py", "communities.py"),
+        "tables": ("canonical_person", "canonical_cooccurrence"),
+        "outputs": [("table", t) for t in METRICS_TABLES],
+    },
+    "build_graph": {
+        "deps": ("metrics",),
+        "code": ("build_graph.py", "embedding.py", "layout.py", "lod_export.py", "graph_csr.py",
+                 "graph_metrics.py", "centrality.py", "communities.py", "email_store.py"),
+        "tables": ("canonical_person", "canonical_cooccurrence", "emails", "email_participants")
+                  + METRICS_TABLES,
+        "outputs": [("file", "output/epstein_network.html"), ("file", "output/epstein_3d_embedding.html"),
+                    ("file", "output/summary.md"), ("dir", "output/lod"),
+                    ("file", "data/processed/names.jsonl"), ("file", "data/processed/edges.jsonl"),
+                    ("dir", "data/processed/graph")],
+    },
+    "threejs": {
+        "deps": ("metrics",),
+        "code": ("build_threejs_graph.py", "layout.py", "tile_export.py", "graph_metrics.py", "centrality.py",
+                 "communities.py"),
+        "tables": ("canonical_person", "canonical_cooccurrence") + METRICS_TABLES,
+        "outputs": [("file", "output/epstein_3d_threejs.html"), ("dir", "output/threejs")],
+    },
+    "expand_analysis": {
+        "deps": ("ingest",),
+        "code": ("expand_analysis.py", "email_store.py"),
+        "tables": ("people", "person_stats", "messages", "email_participants", "emails"),
+        "outputs": [("dir", "data/expanded")],
+    },
+}
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def table_digest(conn, table):
+    """
+    SHA-256 standing in for the content of `table` (None if it does not
+    exist). Ingest tables are summarized by ingest_meta (dataset
+    fingerprint and settings) and thread_hashes, metrics tables by their
+    metrics_runs rows, so neither is rescanned; edits to those tables made
+    outside process_emails.py / graph_metrics.py go unnoticed. Any other
+    table is hashed row by row.
+    """
+    def exists(name):
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone()
+
+    if not exists(table):
+        return None
+    if table in INGEST_TABLES and exists("ingest_meta") and exists("thread_hashes"):
+        queries = ["SELECT key, value FROM ingest_meta ORDER BY key",
+                   "SELECT thread_id, content_hash FROM thread_hashes ORDER BY thread_id"]
+    elif table in METRICS_TABLES and exists("metrics_runs"):
+        queries = ["SELECT version, fingerprint, params FROM metrics_runs ORDER BY version"]
+    else:
+        queries = [f"SELECT * FROM {table} ORDER BY rowid"]
+    digest = hashlib.sha256()
+    for query in queries:
+        digest.update(query.encode())
+        rows_digest(digest, conn.execute(query))
+    return digest.hexdigest()
+
+
+def rows_digest(digest, cursor):
+    """Feed every row of `cursor` into `digest`."""
+    while True:
+        rows = cursor.fetchmany(10_000)
+        if not rows:
+            break
+        digest.update(repr(rows).encode())
+
+
+def output_files(spec):
+    """Output files of a stage (directories expanded), relative to PROJECT_ROOT."""
+    files = []
+    for kind, path in spec["outputs"]:
+        if kind == "file":
+            files.append(path)
+        elif kind == "dir" and (PROJECT_ROOT / path).is_dir():
+            files.extend(str(p.relative_to(PROJECT_ROOT)) for p in sorted((PROJECT_ROOT / path).rglob("*"))
+                         if p.is_file())
+    return files
+
+
+def output_tables(spec):
+    return [name for kind, name in spec["outputs"] if kind == "table"]
+
+
+def ingest_source_digest(params):
+    """Fingerprint of the local ingest input, or None when ingest reads from the Hub."""
+    if not (params["source"] or params["offline"]):
+        return None
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    from arrow_source import ArrowSource, cached_arrow_files
+    if params["offline"]:
+        return ArrowSource(cached_arrow_files("notesbymuneeb/epstein-emails"))._fingerprint
+    return ArrowSource.from_path(params["source"])._fingerprint
+
+
+def stage_params(name, params):
+    """The parameters a stage's output depends on."""
+    if name == "ingest":
+        return {"source": params["source"], "offline": params["offline"]}
+    if name == "build_graph":
+        return {"embedding": params["embedding"], "lod_max_nodes": params["lod_max_nodes"]}
+    return {}
+
+
+def fingerprint(name, params, table_digests):
+    """Stage fingerprint, or None when the stage cannot be cached."""
+    spec = STAGES[name]
+    inputs = {
+        "stage": name,
+        "code": {f: file_digest(SCRIPTS_DIR / f) for f in spec["code"]},
+        "tables": {t: table_digests(t) for t in spec["tables"]},
+        "params": stage_params(name, params),
+    }
+    if name == "ingest":
+        inputs["source"] = ingest_source_digest(params)
+        if inputs["source"] is None:
+            return None
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def manifest_path(name, fp):
+    return CACHE_DIR / "stages" / name / f"{fp}.json"
+
+
+def object_path(digest):
+    return CACHE_DIR / "objects" / digest[:2] / digest
+
+
+def use_cache(name, fp, table_digests, restore=True):
+    """
+    "cached" or "restored" when the stage can be skipped, None when it
+    has to run. Restores output files from the object store as needed
+    (with restore=False, only reports "would restore").
+    """
+    path = manifest_path(name, fp)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if any(table_digests(t) != digest for t, digest in manifest["tables"].items()):
+        return None
+    if any(not object_path(digest).exists() for digest in manifest["files"].values()):
+        return None
+
+    restored = False
+    for rel, digest in manifest["files"].items():
+        target = PROJECT_ROOT / rel
+        if target.exists() and file_digest(target) == digest:
+            continue
+        if not restore:
+            return "would restore"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(object_path(digest), target)
+        restored = True
+    return "restored" if restored else "cached"
+
+
+def store_outputs(name, fp, seconds, table_digests):
+    """Copy the stage's output files into the object store and write its manifest."""
+    spec = STAGES[name]
+    files = {}
+    for rel in output_files(spec):
+        if not (PROJECT_ROOT / rel).exists():
+            continue
+        digest = file_digest(PROJECT_ROOT / rel)
+        target = object_path(digest)
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(PROJECT_ROOT / rel, target)
+        files[rel] = digest
+    manifest = {"stage": name, "fingerprint": fp, "seconds": round(seconds, 3),
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "files": files,
+                "tables": {t: table_digests(t) for t in output_tables(spec)}}
+    path = manifest_path(name, fp)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+
+def run_stage(name, params):
+    """Run one stage (in a pool worker), logging its output. Returns its wall time."""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    log_path = CACHE_DIR / "logs" / f"{name}.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    try:
+        _run_stage_logged(name, params, log_path)
+    except SystemExit as e:
+        # Scripts' main() exit on missing inputs; that is a stage failure, and
+        # a SystemExit must not reach the runner through future.result()
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{name} exited with status {e.code} (see {log_path})") from None
+    return time.perf_counter() - start
+
+
+def _run_stage_logged(name, params, log_path):
+    with open(log_path, 'w') as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        if name == "ingest":
+            import process_emails
+            process_emails.process_dataset(incremental=True, workers=params["workers"],
+                                           source=params["source"], offline=params["offline"])
+        elif name == "metrics":
+            import graph_metrics
+            conn = sqlite3.connect(str(DB_PATH))
+            graph_metrics.ensure_metrics(conn, workers=params["workers"])
+            conn.close()
+        elif name == "build_graph":
+            import build_graph
+            build_graph.main(["--embedding", params["embedding"],
+                              "--lod-max-nodes", str(params["lod_max_nodes"])])
+        elif name == "threejs":
+            import build_threejs_graph
+            build_threejs_graph.main([])
+        elif name == "expand_analysis":
+            import expand_analysis
+            expand_analysis.main()
+        else:
+            raise ValueError(f"Unknown stage '{name}'")
+
+
+def selected_stages(names):
+    """`names` plus everything they depend on, in declaration (topological) order."""
+    wanted = set()
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(STAGES[name]["deps"])
+    return [name for name in STAGES if name in wanted]
+
+
+def run_pipeline(names, params, jobs=1, force=(), dry_run=False):
+    """Run the selected stages; returns {stage: (status, seconds)}."""
+    stages = selected_stages(names)
+    digests = {}
+
+    def table_digests(table):
+        # Memoized per run; reset for a table when a stage that writes it finishes
+        if table not in digests:
+            digests[table] = None
+            if DB_PATH.exists():
+                with contextlib.closing(sqlite3.connect(str(DB_PATH))) as conn:
+                    digests[table] = table_digest(conn, table)
+        return digests[table]
+
+    results = {}
+    fingerprints = {}
+    pending = list(stages)
+    running = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in list(pending):
+                deps = STAGES[name]["deps"]
+                if any(d in stages and d not in results for d in deps):
+                    continue
+                pending.remove(name)
+                if any(results.get(d, ("ok",))[0] in ("failed", "skipped") for d in deps):
+                    results[name] = ("skipped", 0.0)
+                    continue
+                if any(results.get(d, ("ok",))[0] == "would run" for d in deps):
+                    # Its inputs are not known until the dependency has run
+                    results[name] = ("would run", 0.0)
+                    continue
+                fp = fingerprint(name, params, table_digests)
+                fingerprints[name] = fp
+                status = None if (fp is None or name in force) else use_cache(name, fp, table_digests, restore=not dry_run)
+                if status:
+                    results[name] = (status, 0.0)
+                elif dry_run:
+                    results[name] = ("would run", 0.0)
+                else:
+                    print(f"[{name}] running (log: {CACHE_DIR / 'logs' / (name + '.log')})")
+                    running[pool.submit(run_stage, name, params)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                for table in output_tables(STAGES[name]):
+                    digests.pop(table, None)
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    print(f"[{name}] failed: {e!r}")
+                    results[name] = ("failed", 0.0)
+                    continue
+                print(f"[{name}] done in {seconds:.1f}s")
+                if fingerprints[name] is not None:
+                    store_outputs(name, fingerprints[name], seconds, table_digests)
+                results[name] = ("ran", seconds)
+    return {name: results[name] for name in stages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES),
+                        help="stages to run (their dependencies are included)")
+    parser.add_argument("--jobs", type=int, default=0, help="stages run at once (0 = one per CPU)")
+    parser.add_argument("--workers", type=int, default=0, help="processes inside ingest/metrics (0 = one per CPU)")
+    parser.add_argument("--force", nargs="*", choices=list(STAGES), default=None,
+                        help="run these stages even when cached (no names = all)")
+    parser.add_argument("--dry-run", action="store_true", help="report cache status without running anything")
+    parser.add_argument("--source", default=None, help="ingest a local Parquet/Arrow export")
+    parser.add_argument("--offline", action="store_true", help="ingest from the Hugging Face cache")
+    parser.add_argument("--embedding", default="umap", help="build_graph.py --embedding")
+    parser.add_argument("--lod-max-nodes", type=int, default=250, help="build_graph.py --lod-max-nodes")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    params = {
+        "source": str(Path(args.source).resolve()) if args.source else None,
+        "offline": args.offline,
+        "workers": args.workers or cpus,
+        "embedding": args.embedding,
+        "lod_max_nodes": args.lod_max_nodes,
+    }
+    force = set(STAGES) if args.force == [] else set(args.force or ())
+
+    start = time.perf_counter()
+    results = run_pipeline(args.stages, params, jobs=args.jobs or cpus, force=force, dry_run=args.dry_run)
+
+    print(f"\n{'stage':<16} {'status':<13} {'seconds':>9}")
+    for name, (status, seconds) in results.items():
+        print(f"{name:<16} {status:<13} {seconds:>9.2f}")
+    print(f"{'total':<16} {'':<13} {time.perf_counter() - start:>9.2f}")
+    if any(status == "failed" for status, _ in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
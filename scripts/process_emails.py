@@ -4,15 +4,32 @@ Process Epstein email dataset from Hugging Face.
 Downloads notesbymuneeb/epstein-emails and builds SQLite database.
 """
 
+import argparse
+import hashlib
 import json
+import os
 import re
 import sqlite3
 from collections import defaultdict
+from multiprocessing import Pool
 from pathlib import Path
 from datasets import load_dataset
 
+from arrow_source import ArrowSource, cached_arrow_files
+from canonical import normalize_name as canonical_name
+from cooccurrence import cooccurrence_blocks, pair_counts, parse_role_weights, stronger_role
+from email_store import compress_bodies, has_table, to_utc_iso
+
 PROJECT_ROOT = Path(__file__).parent.parent
 DB_PATH = PROJECT_ROOT / "preprocessed" / "epstein_emails.db"
+DATASET_NAME = 'notesbymuneeb/epstein-emails'
+# Bumped whenever tables are added or change shape; incremental ingest
+# into a database with another version falls back to a rebuild
+SCHEMA_VERSION = 4
+# Bumped whenever thread_hash() or fallback thread ids change; hashes stored
+# under another format never match, so incremental ingest rebuilds instead
+# (a database without the key predates format 2)
+HASH_FORMAT = 2
 
 
 def normalize_email(email: str) -> str:
@@ -74,20 +91,33 @@ def is_automated_sender(name: str, email: str) -> bool:
     return any(pat in combined for pat in automated_patterns)
 
 
-def create_database():
-    """Create SQLite database with schema."""
+def create_database(defer_indexes=False, rebuild=True):
+    """Create SQLite database with schema.
+
+    With defer_indexes the secondary indexes are left for create_indexes(),
+    so a bulk load does not maintain them row by row. With rebuild=False
+    existing tables and rows are kept (incremental ingest).
+    """
     conn = sqlite3.connect(str(DB_PATH))
     cursor = conn.cursor()
     
-    # Drop existing tables
-    cursor.execute("DROP TABLE IF EXISTS person_cooccurrence")
-    cursor.execute("DROP TABLE IF EXISTS email_participants")
-    cursor.execute("DROP TABLE IF EXISTS people")
-    cursor.execute("DROP TABLE IF EXISTS emails")
+    if rebuild:
+        # Drop existing tables
+        cursor.execute("DROP TABLE IF EXISTS zstd_dicts")
+        cursor.execute("DROP TABLE IF EXISTS ingest_meta")
+        cursor.execute("DROP TABLE IF EXISTS person_stats")
+        cursor.execute("DROP TABLE IF EXISTS canonical_cooccurrence")
+        cursor.execute("DROP TABLE IF EXISTS canonical_person")
+        cursor.execute("DROP TABLE IF EXISTS thread_hashes")
+        cursor.execute("DROP TABLE IF EXISTS messages")
+        cursor.execute("DROP TABLE IF EXISTS person_cooccurrence")
+        cursor.execute("DROP TABLE IF EXISTS email_participants")
+        cursor.execute("DROP TABLE IF EXISTS people")
+        cursor.execute("DROP TABLE IF EXISTS emails")
     
     # Create tables
     cursor.execute("""
-    CREATE TABLE emails (
+    CREATE TABLE IF NOT EXISTS emails (
         thread_id TEXT PRIMARY KEY,
         source_file TEXT,
         subject TEXT,
@@ -97,17 +127,18 @@ def create_database():
     """)
     
     cursor.execute("""
-    CREATE TABLE people (
+    CREATE TABLE IF NOT EXISTS people (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT NOT NULL,
         email TEXT,
         total_threads INTEGER DEFAULT 0,
+        canonical_id INTEGER,
         UNIQUE(name, email)
     )
     """)
     
     cursor.execute("""
-    CREATE TABLE email_participants (
+    CREATE TABLE IF NOT EXISTS email_participants (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         thread_id TEXT NOT NULL,
         person_id INTEGER NOT NULL,
@@ -118,52 +149,338 @@ def create_database():
     """)
     
     cursor.execute("""
-    CREATE TABLE person_cooccurrence (
+    CREATE TABLE IF NOT EXISTS person_cooccurrence (
         person_a INTEGER NOT NULL,
         person_b INTEGER NOT NULL,
         thread_count INTEGER DEFAULT 0,
+        weight REAL,
         PRIMARY KEY (person_a, person_b),
         FOREIGN KEY (person_a) REFERENCES people(id),
         FOREIGN KEY (person_b) REFERENCES people(id)
     )
     """)
     
-    # Indexes
-    cursor.execute("CREATE INDEX idx_participants_thread ON email_participants(thread_id)")
-    cursor.execute("CREATE INDEX idx_participants_person ON email_participants(person_id)")
-    cursor.execute("CREATE INDEX idx_cooccurrence_a ON person_cooccurrence(person_a)")
-    cursor.execute("CREATE INDEX idx_cooccurrence_b ON person_cooccurrence(person_b)")
-    cursor.execute("CREATE INDEX idx_people_name ON people(name)")
+    # One row per message, with the timestamp parsed once at ingest
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        thread_id TEXT NOT NULL,
+        ordinal INTEGER NOT NULL,
+        sender_id INTEGER,
+        sender TEXT,
+        subject TEXT,
+        sent_at TEXT,
+        timestamp TEXT,
+        body TEXT,
+        body_length INTEGER,
+        FOREIGN KEY (thread_id) REFERENCES emails(thread_id),
+        FOREIGN KEY (sender_id) REFERENCES people(id)
+    )
+    """)
+    
+    # Per-person aggregates, refreshed by update_person_stats()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS person_stats (
+        person_id INTEGER PRIMARY KEY,
+        threads INTEGER DEFAULT 0,
+        degree INTEGER DEFAULT 0,
+        weighted_degree REAL DEFAULT 0,
+        sent_messages INTEGER DEFAULT 0,
+        received_threads INTEGER DEFAULT 0,
+        first_seen TEXT,
+        last_seen TEXT,
+        FOREIGN KEY (person_id) REFERENCES people(id)
+    )
+    """)
+    
+    # Spelling variants merged by canonical.normalize_name(); totals and
+    # pair counts are sums over the variants' people / person_cooccurrence rows
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS canonical_person (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        total_threads INTEGER DEFAULT 0,
+        emails TEXT
+    )
+    """)
+    
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS canonical_cooccurrence (
+        canonical_a INTEGER NOT NULL,
+        canonical_b INTEGER NOT NULL,
+        thread_count INTEGER DEFAULT 0,
+        weight REAL,
+        PRIMARY KEY (canonical_a, canonical_b),
+        FOREIGN KEY (canonical_a) REFERENCES canonical_person(id),
+        FOREIGN KEY (canonical_b) REFERENCES canonical_person(id)
+    )
+    """)
+    
+    # Databases created before role weights lack the weight column
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(person_cooccurrence)")}
+    if 'weight' not in columns:
+        cursor.execute("ALTER TABLE person_cooccurrence ADD COLUMN weight REAL")
+    
+    # Content hash of every ingested thread, for incremental refreshes
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS thread_hashes (
+        thread_id TEXT PRIMARY KEY,
+        content_hash TEXT NOT NULL
+    )
+    """)
+    
+    # Dataset name / revision / fingerprint of the last ingest
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ingest_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """)
+    
+    if not defer_indexes:
+        create_indexes(cursor)
     
     conn.commit()
     return conn
 
 
-def process_dataset():
-    """Download and process the Hugging Face dataset."""
-    print("Downloading dataset from Hugging Face...")
-    ds = load_dataset('notesbymuneeb/epstein-emails', split='train')
-    print(f"Downloaded {len(ds)} email threads")
+def create_indexes(cursor):
+    """Create secondary indexes (no-op for indexes that already exist)."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_participants_thread ON email_participants(thread_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_participants_person ON email_participants(person_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cooccurrence_a ON person_cooccurrence(person_a)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cooccurrence_b ON person_cooccurrence(person_b)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_people_name ON people(name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_thread ON messages(thread_id, ordinal)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_sent_at ON messages(sent_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_person_stats_degree ON person_stats(degree)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_people_canonical ON people(canonical_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_canonical_person_threads ON canonical_person(total_threads)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_canonical_cooccurrence_count ON canonical_cooccurrence(thread_count)")
+
+
+def parse_messages(messages_raw):
+    """
+    Parse the messages field - may be list of dicts already, or JSON string.
+    Returns None if the field cannot be decoded.
+    """
+    try:
+        if isinstance(messages_raw, str):
+            messages = json.loads(messages_raw)
+        elif isinstance(messages_raw, list):
+            messages = messages_raw
+        else:
+            messages = [messages_raw] if messages_raw else []
+    except (json.JSONDecodeError, TypeError):
+        return None
+    
+    if not isinstance(messages, list):
+        messages = [messages] if messages else []
+    return messages
+
+
+def iter_participants(messages):
+    """
+    Yield (name, email, role) for every non-automated sender, recipient
+    and CC in message order.
+    """
+    for msg in messages:
+        if not isinstance(msg, dict):
+            continue
+        
+        # Process sender (field is 'sender' not 'from')
+        sender = msg.get('sender', '') or msg.get('from', '')
+        if sender:
+            name, email = parse_participant(sender)
+            if not is_automated_sender(name, email):
+                yield name, email, 'sender'
+        
+        # Process recipients (field is 'recipients' not 'to')
+        recipients = msg.get('recipients', []) or msg.get('to', [])
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        
+        for recip in recipients:
+            name, email = parse_participant(recip)
+            if not is_automated_sender(name, email):
+                yield name, email, 'recipient'
+        
+        # Process CC
+        cc_list = msg.get('cc', [])
+        if isinstance(cc_list, str):
+            cc_list = [cc_list]
+        
+        for cc in cc_list:
+            name, email = parse_participant(cc)
+            if not is_automated_sender(name, email):
+                yield name, email, 'cc'
+
+
+def message_rows(messages):
+    """
+    Return (ordinal, sender_keys, sender, subject, sent_at, timestamp, body)
+    for every message. sender_keys is the person_keys() tuple of a
+    non-automated sender, else None; sent_at is the parsed UTC timestamp.
+    """
+    rows = []
+    for ordinal, msg in enumerate(messages):
+        if not isinstance(msg, dict):
+            continue
+        sender = msg.get('sender', '') or msg.get('from', '')
+        sender_keys = None
+        if sender:
+            name, email = parse_participant(sender)
+            if not is_automated_sender(name, email):
+                sender_keys = person_keys(name, email)
+        timestamp = msg.get('timestamp')
+        rows.append((ordinal, sender_keys, msg.get('sender'), msg.get('subject'),
+                     to_utc_iso(timestamp), timestamp, msg.get('body')))
+    return rows
+
+
+def person_keys(name: str, email: str):
+    """
+    Return (cache_key, display_name, email) for a parsed participant, or
+    None if it has neither name nor email.
     
-    conn = create_database()
+    cache_key merges case variants of a name; (display_name, email) is the
+    UNIQUE key of the people table.
+    """
+    name = normalize_name(name)
+    email = normalize_email(email)
+    
+    if not name and not email:
+        return None
+    
+    # Use email as primary key if available, else name
+    key = (name.lower() if name else "", email)
+    return key, name or email.split('@')[0].title(), email
+
+
+def fallback_thread_id(index):
+    """Id of a dataset row without a thread_id: its row index, the same in every ingest mode."""
+    return f"thread_{index}"
+
+
+def thread_hash(item, previous=None) -> str:
+    """
+    Content hash of a raw dataset row (computed without parsing messages).
+    Rows repeating a thread_id chain onto the hash of the earlier rows.
+    Changing the payload means bumping HASH_FORMAT.
+    """
+    payload = json.dumps(
+        [item.get('source_file', ''), item.get('subject', ''), item.get('messages', '[]')],
+        sort_keys=True, default=str
+    )
+    row_hash = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    return chain_hash(previous, row_hash)
+
+
+def chain_hash(previous, row_hash):
+    """Combine the hash of earlier rows of a thread with the next row's hash."""
+    if previous is None:
+        return row_hash
+    return hashlib.sha1((previous + row_hash).encode('utf-8')).hexdigest()
+
+
+def parse_item(item):
+    """
+    Parse one dataset row into a compact record:
+    (thread_id or None, row_hash, email_row, participants, messages)
+    
+    email_row is (source_file, subject, message_count, messages_json), or
+    None if the messages cannot be decoded; participants is a list of
+    (cache_key, display_name, email, role) tuples and messages the
+    message_rows() of the thread.
+    """
+    thread_id = item.get('thread_id')
+    row_hash = thread_hash(item)
+    
+    messages = parse_messages(item.get('messages', '[]'))
+    if messages is None:
+        return thread_id, row_hash, None, [], []
+    
+    participants = []
+    for name, email, role in iter_participants(messages):
+        keys = person_keys(name, email)
+        if keys is not None:
+            participants.append((*keys, role))
+    
+    email_row = (item.get('source_file', ''), item.get('subject', ''),
+                 len(messages), json.dumps(messages))
+    return thread_id, row_hash, email_row, participants, message_rows(messages)
+
+
+def parse_shard(shard):
+    """Pool worker: parse every row of a dataset shard."""
+    return [parse_item(item) for item in shard]
+
+
+def iter_shards(ds, num_shards):
+    """Split a dataset (or any sequence of rows) into contiguous shards."""
+    if hasattr(ds, 'shard'):
+        for index in range(num_shards):
+            yield ds.shard(num_shards=num_shards, index=index, contiguous=True)
+        return
+    rows = list(ds)
+    size = -(-len(rows) // num_shards)
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def parse_records(ds, workers=1):
+    """
+    Yield parse_item() records in dataset order, parsing on `workers`
+    processes when workers > 1.
+    """
+    if workers <= 1:
+        for item in ds:
+            yield parse_item(item)
+        return
+    
+    # Several shards per worker keeps the pool busy and bounds memory
+    num_shards = min(max(len(ds), 1), workers * 8)
+    with Pool(workers) as pool:
+        for records in pool.imap(parse_shard, iter_shards(ds, num_shards)):
+            yield from records
+
+
+def load_people(cursor):
+    """
+    Rebuild the person lookup tables used by ingest_bulk() from the people
+    table: returns (people_cache, people_ids).
+    """
+    people_cache = {}
+    people_ids = {}
+    for person_id, name, email in cursor.execute("SELECT id, name, email FROM people ORDER BY id"):
+        people_ids[(name, email)] = person_id
+        people_cache.setdefault((name.lower(), email), person_id)
+        # Rows named after the email local part were created from a bare address
+        if email and name == email.split('@')[0].title():
+            people_cache.setdefault(("", email), person_id)
+    return people_cache, people_ids
+
+
+def ingest_serial(conn, ds, hashes=None):
+    """
+    Insert threads and participants row by row, resolving person ids
+    through the database. Content hashes are collected into `hashes`.
+    Returns (thread_participants, processed, skipped).
+    """
     cursor = conn.cursor()
     
     # Track people: (name, email) -> person_id
     people_cache = {}
-    # Track thread participants: thread_id -> set of person_ids
-    thread_participants = defaultdict(set)
+    # Track thread participants: thread_id -> {person_id: strongest role}
+    thread_participants = {}
     
     def get_or_create_person(name: str, email: str) -> int:
         """Get or create person, return person_id."""
-        # Normalize
-        name = normalize_name(name)
-        email = normalize_email(email)
-        
-        if not name and not email:
+        keys = person_keys(name, email)
+        if keys is None:
             return None
-        
-        # Use email as primary key if available, else name
-        key = (name.lower() if name else "", email)
+        key, display_name, email = keys
         
         if key in people_cache:
             return people_cache[key]
@@ -171,13 +488,13 @@ def process_dataset():
         # Insert new person
         cursor.execute(
             "INSERT OR IGNORE INTO people (name, email) VALUES (?, ?)",
-            (name or email.split('@')[0].title(), email)
+            (display_name, email)
         )
         
         # Get the ID
         cursor.execute(
             "SELECT id FROM people WHERE name = ? AND email = ?",
-            (name or email.split('@')[0].title(), email)
+            (display_name, email)
         )
         row = cursor.fetchone()
         if row:
@@ -186,90 +503,51 @@ def process_dataset():
             return person_id
         return None
     
-    print("Processing email threads...")
     processed = 0
     skipped = 0
     
-    for item in ds:
-        thread_id = item.get('thread_id', f"thread_{processed}")
+    for index, item in enumerate(ds):
+        thread_id = item.get('thread_id') or fallback_thread_id(index)
         source_file = item.get('source_file', '')
         subject = item.get('subject', '')
-        messages_raw = item.get('messages', '[]')
-        
-        # Parse messages - may be list of dicts already, or JSON string
-        try:
-            if isinstance(messages_raw, str):
-                messages = json.loads(messages_raw)
-            elif isinstance(messages_raw, list):
-                messages = messages_raw
-            else:
-                messages = [messages_raw] if messages_raw else []
-        except (json.JSONDecodeError, TypeError):
-            skipped += 1
-            continue
         
-        if not isinstance(messages, list):
-            messages = [messages] if messages else []
+        if hashes is not None:
+            hashes[thread_id] = thread_hash(item, hashes.get(thread_id))
         
-        message_count = len(messages)
+        messages = parse_messages(item.get('messages', '[]'))
+        if messages is None:
+            skipped += 1
+            continue
         
         # Insert email thread
         cursor.execute(
             "INSERT OR REPLACE INTO emails (thread_id, source_file, subject, message_count, messages_json) VALUES (?, ?, ?, ?, ?)",
-            (thread_id, source_file, subject, message_count, json.dumps(messages))
+            (thread_id, source_file, subject, len(messages), json.dumps(messages))
         )
         
         # Extract participants from each message
-        participants_in_thread = set()
+        participants_in_thread = {}
         
-        for msg in messages:
-            if not isinstance(msg, dict):
-                continue
-            
-            # Process sender (field is 'sender' not 'from')
-            sender = msg.get('sender', '') or msg.get('from', '')
-            if sender:
-                name, email = parse_participant(sender)
-                if not is_automated_sender(name, email):
-                    person_id = get_or_create_person(name, email)
-                    if person_id:
-                        participants_in_thread.add(person_id)
-                        cursor.execute(
-                            "INSERT INTO email_participants (thread_id, person_id, role) VALUES (?, ?, ?)",
-                            (thread_id, person_id, 'sender')
-                        )
-            
-            # Process recipients (field is 'recipients' not 'to')
-            recipients = msg.get('recipients', []) or msg.get('to', [])
-            if isinstance(recipients, str):
-                recipients = [recipients]
-            
-            for recip in recipients:
-                name, email = parse_participant(recip)
-                if not is_automated_sender(name, email):
-                    person_id = get_or_create_person(name, email)
-                    if person_id:
-                        participants_in_thread.add(person_id)
-                        cursor.execute(
-                            "INSERT INTO email_participants (thread_id, person_id, role) VALUES (?, ?, ?)",
-                            (thread_id, person_id, 'recipient')
-                        )
-            
-            # Process CC
-            cc_list = msg.get('cc', [])
-            if isinstance(cc_list, str):
-                cc_list = [cc_list]
-            
-            for cc in cc_list:
-                name, email = parse_participant(cc)
-                if not is_automated_sender(name, email):
-                    person_id = get_or_create_person(name, email)
-                    if person_id:
-                        participants_in_thread.add(person_id)
-                        cursor.execute(
-                            "INSERT INTO email_participants (thread_id, person_id, role) VALUES (?, ?, ?)",
-                            (thread_id, person_id, 'cc')
-                        )
+        for name, email, role in iter_participants(messages):
+            person_id = get_or_create_person(name, email)
+            if person_id:
+                participants_in_thread[person_id] = stronger_role(role, participants_in_thread.get(person_id))
+                cursor.execute(
+                    "INSERT INTO email_participants (thread_id, person_id, role) VALUES (?, ?, ?)",
+                    (thread_id, person_id, role)
+                )
+        
+        # One row per message; senders were registered with the participants.
+        # A repeated thread_id replaces the messages, like the emails row.
+        if thread_id in thread_participants:
+            cursor.execute("DELETE FROM messages WHERE thread_id = ?", (thread_id,))
+        for ordinal, sender_keys, sender, msg_subject, sent_at, timestamp, body in message_rows(messages):
+            sender_id = people_cache.get(sender_keys[0]) if sender_keys else None
+            cursor.execute(
+                "INSERT INTO messages (thread_id, ordinal, sender_id, sender, subject, sent_at, timestamp, body, body_length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, ordinal, sender_id, sender, msg_subject, sent_at, timestamp, body,
+                 len(body) if isinstance(body, str) else None)
+            )
         
         thread_participants[thread_id] = participants_in_thread
         processed += 1
@@ -279,41 +557,656 @@ def process_dataset():
             conn.commit()
     
     conn.commit()
-    print(f"Processed {processed} threads, skipped {skipped}")
+    return thread_participants, processed, skipped
+
+
+def ingest_bulk(conn, ds, people=None, hashes=None, workers=1, flush_rows=200_000):
+    """
+    Bulk ingest: person ids are assigned in Python, rows are accumulated in
+    columnar buffers and written with executemany. Nothing is committed, so
+    the whole load is one transaction; the caller commits and creates the
+    indexes once the load is complete.
+    
+    `people` is the (people_cache, people_ids) pair from load_people() when
+    adding to an existing database; it is updated in place. With workers > 1
+    rows are parsed on a process pool and merged here, in dataset order, by
+    this single writer.
+    
+    Produces the same tables and ids as ingest_serial().
+    Returns (thread_participants, processed, skipped).
+    """
+    cursor = conn.cursor()
+    
+    # cache_key -> person_id and (display_name, email) -> person_id
+    people_cache, people_ids = people if people is not None else ({}, {})
+    next_id = max(people_ids.values(), default=0) + 1
+    thread_participants = {}
     
-    # Update total_threads for each person
-    print("Updating thread counts...")
+    # Columnar buffers
+    people_id_col, people_name_col, people_email_col = [], [], []
+    email_cols = ([], [], [], [], [])
+    part_thread_col, part_person_col, part_role_col = [], [], []
+    message_cols = ([], [], [], [], [], [], [], [], [])
+    
+    def flush():
+        cursor.executemany(
+            "INSERT INTO people (id, name, email) VALUES (?, ?, ?)",
+            zip(people_id_col, people_name_col, people_email_col)
+        )
+        cursor.executemany(
+            "INSERT OR REPLACE INTO emails (thread_id, source_file, subject, message_count, messages_json) VALUES (?, ?, ?, ?, ?)",
+            zip(*email_cols)
+        )
+        cursor.executemany(
+            "INSERT INTO email_participants (thread_id, person_id, role) VALUES (?, ?, ?)",
+            zip(part_thread_col, part_person_col, part_role_col)
+        )
+        cursor.executemany(
+            "INSERT INTO messages (thread_id, ordinal, sender_id, sender, subject, sent_at, timestamp, body, body_length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            zip(*message_cols)
+        )
+        for col in (people_id_col, people_name_col, people_email_col,
+                    part_thread_col, part_person_col, part_role_col, *email_cols, *message_cols):
+            col.clear()
+    
+    processed = 0
+    skipped = 0
+    
+    for index, (thread_id, row_hash, email_row, participants, messages) in enumerate(parse_records(ds, workers)):
+        thread_id = thread_id or fallback_thread_id(index)
+        
+        if hashes is not None:
+            hashes[thread_id] = chain_hash(hashes.get(thread_id), row_hash)
+        
+        if email_row is None:
+            skipped += 1
+            continue
+        
+        for col, value in zip(email_cols, (thread_id, *email_row)):
+            col.append(value)
+        
+        participants_in_thread = {}
+        
+        for key, display_name, email, role in participants:
+            person_id = people_cache.get(key)
+            if person_id is None:
+                # Different cache keys can share a people row (UNIQUE(name, email))
+                person_id = people_ids.get((display_name, email))
+                if person_id is None:
+                    person_id = next_id
+                    next_id += 1
+                    people_ids[(display_name, email)] = person_id
+                    people_id_col.append(person_id)
+                    people_name_col.append(display_name)
+                    people_email_col.append(email)
+                people_cache[key] = person_id
+            
+            participants_in_thread[person_id] = stronger_role(role, participants_in_thread.get(person_id))
+            part_thread_col.append(thread_id)
+            part_person_col.append(person_id)
+            part_role_col.append(role)
+        
+        # A repeated thread_id replaces the messages, like the emails row
+        if thread_id in thread_participants:
+            flush()
+            cursor.execute("DELETE FROM messages WHERE thread_id = ?", (thread_id,))
+        for ordinal, sender_keys, sender, msg_subject, sent_at, timestamp, body in messages:
+            sender_id = people_cache.get(sender_keys[0]) if sender_keys else None
+            for col, value in zip(message_cols, (thread_id, ordinal, sender_id, sender, msg_subject,
+                                                 sent_at, timestamp, body,
+                                                 len(body) if isinstance(body, str) else None)):
+                col.append(value)
+        
+        thread_participants[thread_id] = participants_in_thread
+        processed += 1
+        
+        if len(part_thread_col) + len(message_cols[0]) >= flush_rows:
+            flush()
+        if processed % 5000 == 0:
+            print(f"  Processed {processed} threads...")
+    
+    flush()
+    return thread_participants, processed, skipped
+
+
+def stage_affected_people(cursor, person_ids):
+    """Load `person_ids` into the temp table affected_people."""
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS affected_people (id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM affected_people")
+    cursor.executemany("INSERT INTO affected_people (id) VALUES (?)", ((pid,) for pid in person_ids))
+
+
+def update_thread_counts(cursor, person_ids=None):
+    """Recompute people.total_threads for all people, or only `person_ids`."""
+    if person_ids is None:
+        cursor.execute("""
+        UPDATE people SET total_threads = counts.n
+        FROM (
+            SELECT person_id, COUNT(DISTINCT thread_id) AS n
+            FROM email_participants
+            GROUP BY person_id
+        ) AS counts
+        WHERE counts.person_id = people.id
+        """)
+        return
+    
+    stage_affected_people(cursor, person_ids)
+    cursor.execute("UPDATE people SET total_threads = 0 WHERE id IN (SELECT id FROM affected_people)")
     cursor.execute("""
-    UPDATE people SET total_threads = (
-        SELECT COUNT(DISTINCT thread_id) 
-        FROM email_participants 
-        WHERE email_participants.person_id = people.id
+    UPDATE people SET total_threads = counts.n
+    FROM (
+        SELECT person_id, COUNT(DISTINCT thread_id) AS n
+        FROM email_participants
+        WHERE person_id IN (SELECT id FROM affected_people)
+        GROUP BY person_id
+    ) AS counts
+    WHERE counts.person_id = people.id
+    """)
+
+
+def update_person_stats(cursor, person_ids=None):
+    """
+    Recompute person_stats for all people, or only `person_ids`, with one
+    grouped query per source table:
+    
+    threads / received_threads - distinct threads (as recipient or cc)
+    degree / weighted_degree   - co-occurrence pairs and their summed weight
+                                 (thread_count when no role weights are stored)
+    sent_messages              - messages sent
+    first_seen / last_seen     - earliest / latest sent_at in their threads
+    
+    Call after person_cooccurrence is up to date.
+    """
+    if person_ids is None:
+        target = "people"
+        where = where_a = where_b = where_sender = where_thread = ""
+    else:
+        stage_affected_people(cursor, person_ids)
+        target = "affected_people"
+        where = "WHERE person_id IN (SELECT id FROM affected_people)"
+        where_a = "WHERE person_a IN (SELECT id FROM affected_people)"
+        where_b = "WHERE person_b IN (SELECT id FROM affected_people)"
+        where_sender = "WHERE sender_id IN (SELECT id FROM affected_people)"
+        where_thread = f"AND thread_id IN (SELECT thread_id FROM email_participants {where})"
+    
+    cursor.execute(f"""
+    INSERT OR REPLACE INTO person_stats
+        (person_id, threads, degree, weighted_degree, sent_messages, received_threads, first_seen, last_seen)
+    SELECT p.id,
+           COALESCE(t.threads, 0), COALESCE(d.degree, 0), COALESCE(d.weighted_degree, 0),
+           COALESCE(s.sent, 0), COALESCE(t.received, 0), seen.first_seen, seen.last_seen
+    FROM {target} p
+    LEFT JOIN (
+        SELECT person_id, COUNT(DISTINCT thread_id) AS threads,
+               COUNT(DISTINCT CASE WHEN role != 'sender' THEN thread_id END) AS received
+        FROM email_participants {where}
+        GROUP BY person_id
+    ) AS t ON t.person_id = p.id
+    LEFT JOIN (
+        SELECT person, COUNT(*) AS degree, SUM(COALESCE(weight, thread_count)) AS weighted_degree
+        FROM (
+            SELECT person_a AS person, thread_count, weight FROM person_cooccurrence {where_a}
+            UNION ALL
+            SELECT person_b, thread_count, weight FROM person_cooccurrence {where_b}
+        )
+        GROUP BY person
+    ) AS d ON d.person = p.id
+    LEFT JOIN (
+        SELECT sender_id, COUNT(*) AS sent
+        FROM messages {where_sender}
+        GROUP BY sender_id
+    ) AS s ON s.sender_id = p.id
+    LEFT JOIN (
+        SELECT ep.person_id, MIN(span.first_at) AS first_seen, MAX(span.last_at) AS last_seen
+        FROM (SELECT DISTINCT thread_id, person_id FROM email_participants {where}) AS ep
+        JOIN (
+            SELECT thread_id, MIN(sent_at) AS first_at, MAX(sent_at) AS last_at
+            FROM messages
+            WHERE sent_at IS NOT NULL {where_thread}
+            GROUP BY thread_id
+        ) AS span ON span.thread_id = ep.thread_id
+        GROUP BY ep.person_id
+    ) AS seen ON seen.person_id = p.id
+    """)
+
+
+def insert_cooccurrences(cursor, thread_participants, role_weights=None, min_count=1):
+    """
+    Compute all co-occurrence pairs with the sparse engine and insert them.
+    Returns the number of pairs.
+    """
+    total = 0
+    for person_a, person_b, counts, weights in cooccurrence_blocks(
+            thread_participants, role_weights, min_count):
+        weights = weights.tolist() if weights is not None else [None] * len(counts)
+        cursor.executemany(
+            "INSERT OR REPLACE INTO person_cooccurrence (person_a, person_b, thread_count, weight) VALUES (?, ?, ?, ?)",
+            zip(person_a.tolist(), person_b.tolist(), counts.tolist(), weights)
+        )
+        total += len(counts)
+    return total
+
+
+def apply_cooccurrence_delta(cursor, old_participants, new_participants, role_weights=None):
+    """
+    Subtract the pairs of the old versions of changed threads and add the
+    pairs of their new versions. Returns the applied changes as
+    (person_a, person_b, thread_count delta, weight delta) tuples.
+    """
+    delta = defaultdict(lambda: [0, 0.0])
+    for participants, sign in ((new_participants, 1), (old_participants, -1)):
+        for key, (count, weight) in pair_counts(participants, role_weights).items():
+            delta[key][0] += sign * count
+            delta[key][1] += sign * (weight or 0.0)
+    
+    changes = [(p1, p2, count, weight if role_weights else None)
+               for (p1, p2), (count, weight) in delta.items() if count or (role_weights and weight)]
+    cursor.executemany("""
+        INSERT INTO person_cooccurrence (person_a, person_b, thread_count, weight) VALUES (?, ?, ?, ?)
+        ON CONFLICT (person_a, person_b) DO UPDATE SET
+            thread_count = thread_count + excluded.thread_count,
+            weight = weight + excluded.weight
+    """, changes)
+    cursor.executemany(
+        "DELETE FROM person_cooccurrence WHERE person_a = ? AND person_b = ? AND thread_count <= 0",
+        ((p1, p2) for p1, p2, count, weight in changes if count < 0)
     )
+    return changes
+
+
+def assign_canonical_ids(cursor, first_person_id=1):
+    """
+    Set people.canonical_id for people with id >= first_person_id, adding
+    canonical_person rows for new canonical names. Returns the canonical
+    ids that were assigned.
+    """
+    known = dict(cursor.execute("SELECT name, id FROM canonical_person"))
+    next_id = max(known.values(), default=0) + 1
+    new_rows = []
+    assignments = []
+    rows = cursor.execute(
+        "SELECT id, name, email FROM people WHERE id >= ? ORDER BY id", (first_person_id,)
+    ).fetchall()
+    for person_id, name, email in rows:
+        canonical = canonical_name(name, email)
+        if canonical is None:
+            continue
+        canonical_id = known.get(canonical)
+        if canonical_id is None:
+            canonical_id = known[canonical] = next_id
+            next_id += 1
+            new_rows.append((canonical_id, canonical))
+        assignments.append((canonical_id, person_id))
+    cursor.executemany("INSERT INTO canonical_person (id, name) VALUES (?, ?)", new_rows)
+    cursor.executemany("UPDATE people SET canonical_id = ? WHERE id = ?", assignments)
+    return {canonical_id for canonical_id, _ in assignments}
+
+
+def update_canonical_people(cursor, person_ids=None):
+    """
+    Recompute canonical_person.total_threads and emails for every canonical
+    person, or only those of the raw `person_ids`.
+    """
+    where = ""
+    if person_ids is not None:
+        stage_affected_people(cursor, person_ids)
+        where = """WHERE canonical_id IN (
+            SELECT canonical_id FROM people WHERE id IN (SELECT id FROM affected_people)
+        )"""
+    cursor.execute(f"""
+    UPDATE canonical_person SET total_threads = agg.total_threads, emails = agg.emails
+    FROM (
+        SELECT canonical_id, SUM(total_threads) AS total_threads,
+               json_group_array(DISTINCT email) FILTER (WHERE email != '') AS emails
+        FROM people {where}
+        GROUP BY canonical_id
+    ) AS agg
+    WHERE agg.canonical_id = canonical_person.id
     """)
-    conn.commit()
+
+
+def insert_canonical_cooccurrences(cursor):
+    """Fill canonical_cooccurrence by summing person_cooccurrence over variants."""
+    cursor.execute("DELETE FROM canonical_cooccurrence")
+    cursor.execute("""
+    INSERT INTO canonical_cooccurrence (canonical_a, canonical_b, thread_count, weight)
+    SELECT MIN(pa.canonical_id, pb.canonical_id), MAX(pa.canonical_id, pb.canonical_id),
+           SUM(c.thread_count), SUM(c.weight)
+    FROM person_cooccurrence c
+    JOIN people pa ON pa.id = c.person_a
+    JOIN people pb ON pb.id = c.person_b
+    WHERE pa.canonical_id != pb.canonical_id
+    GROUP BY 1, 2
+    """)
+    return cursor.rowcount
+
+
+def apply_canonical_delta(cursor, changes):
+    """Apply person_cooccurrence changes (from apply_cooccurrence_delta) to canonical_cooccurrence."""
+    person_ids = list({p for p1, p2, _, _ in changes for p in (p1, p2)})
+    canonical = {}
+    for i in range(0, len(person_ids), 500):
+        part = person_ids[i:i + 500]
+        canonical.update(cursor.execute(
+            f"SELECT id, canonical_id FROM people WHERE id IN ({','.join('?' * len(part))})", part
+        ))
     
-    # Build co-occurrence matrix
-    print("Building co-occurrence matrix...")
-    cooccurrence = defaultdict(int)
+    delta = defaultdict(lambda: [0, None])
+    for p1, p2, count, weight in changes:
+        c1, c2 = canonical.get(p1), canonical.get(p2)
+        if c1 is None or c2 is None or c1 == c2:
+            continue
+        entry = delta[(min(c1, c2), max(c1, c2))]
+        entry[0] += count
+        if weight is not None:
+            entry[1] = (entry[1] or 0.0) + weight
+    
+    cursor.executemany("""
+        INSERT INTO canonical_cooccurrence (canonical_a, canonical_b, thread_count, weight) VALUES (?, ?, ?, ?)
+        ON CONFLICT (canonical_a, canonical_b) DO UPDATE SET
+            thread_count = thread_count + excluded.thread_count,
+            weight = weight + excluded.weight
+    """, ((c1, c2, count, weight) for (c1, c2), (count, weight) in delta.items()))
+    cursor.executemany(
+        "DELETE FROM canonical_cooccurrence WHERE canonical_a = ? AND canonical_b = ? AND thread_count <= 0",
+        ((c1, c2) for (c1, c2), (count, _) in delta.items() if count < 0)
+    )
+
+
+def drop_orphan_people(cursor, person_ids):
+    """
+    Delete the people among `person_ids` who are left without threads, and
+    canonical people left without variants, as a fresh build would not
+    create them; the remaining canonical people get their emails recomputed.
+    Returns the deleted person ids.
+    """
+    stage_affected_people(cursor, person_ids)
+    orphans = [pid for (pid,) in cursor.execute("""
+        SELECT id FROM people WHERE id IN (SELECT id FROM affected_people) AND total_threads = 0
+    """)]
+    if not orphans:
+        return orphans
+    stage_affected_people(cursor, orphans)
+    canonical_ids = [cid for (cid,) in cursor.execute("""
+        SELECT DISTINCT canonical_id FROM people
+        WHERE id IN (SELECT id FROM affected_people) AND canonical_id IS NOT NULL
+    """)]
+    cursor.execute("DELETE FROM person_stats WHERE person_id IN (SELECT id FROM affected_people)")
+    cursor.execute("DELETE FROM people WHERE id IN (SELECT id FROM affected_people)")
+    cursor.executemany("""
+        DELETE FROM canonical_person
+        WHERE id = ? AND NOT EXISTS (SELECT 1 FROM people WHERE canonical_id = canonical_person.id)
+    """, ((cid,) for cid in canonical_ids))
+    survivors = [pid for cid in canonical_ids
+                 for (pid,) in cursor.execute("SELECT id FROM people WHERE canonical_id = ?", (cid,)).fetchall()]
+    if survivors:
+        update_canonical_people(cursor, survivors)
+    return orphans
+
+
+def forget_people(people, person_ids):
+    """Remove deleted `person_ids` from load_people() lookup tables."""
+    person_ids = set(person_ids)
+    if not person_ids:
+        return
+    for lookup in people:
+        for key in [key for key, pid in lookup.items() if pid in person_ids]:
+            del lookup[key]
+
+
+def write_ingest_meta(cursor, hashes, meta):
+    """Record thread content hashes and dataset metadata."""
+    cursor.executemany(
+        "INSERT OR REPLACE INTO thread_hashes (thread_id, content_hash) VALUES (?, ?)",
+        hashes.items()
+    )
+    cursor.executemany(
+        "INSERT OR REPLACE INTO ingest_meta (key, value) VALUES (?, ?)",
+        meta.items()
+    )
+
+
+def detach_threads(cursor, thread_ids, drop=False):
+    """
+    Delete the email_participants and messages rows of `thread_ids` (and with drop=True
+    the threads themselves). Returns their previous participants as
+    {thread_id: {person_id: strongest role}}.
+    """
+    old_participants = defaultdict(dict)
+    for i in range(0, len(thread_ids), 500):
+        part = thread_ids[i:i + 500]
+        placeholders = ','.join('?' * len(part))
+        rows = cursor.execute(
+            f"SELECT thread_id, person_id, role FROM email_participants WHERE thread_id IN ({placeholders})",
+            part
+        ).fetchall()
+        for thread_id, person_id, role in rows:
+            roles = old_participants[thread_id]
+            roles[person_id] = stronger_role(role, roles.get(person_id))
+        cursor.execute(f"DELETE FROM email_participants WHERE thread_id IN ({placeholders})", part)
+        cursor.execute(f"DELETE FROM messages WHERE thread_id IN ({placeholders})", part)
+        if drop:
+            cursor.execute(f"DELETE FROM emails WHERE thread_id IN ({placeholders})", part)
+            cursor.execute(f"DELETE FROM thread_hashes WHERE thread_id IN ({placeholders})", part)
+    return old_participants
+
+
+def ingest_incremental(conn, ds, meta, workers=1, role_weights=None, chunk_threads=5000):
+    """
+    Re-parse only threads whose content hash is new or changed, remove
+    threads that left the dataset, and apply co-occurrence deltas.
     
-    for thread_id, participants in thread_participants.items():
-        participants_list = sorted(participants)
-        for i, p1 in enumerate(participants_list):
-            for p2 in participants_list[i+1:]:
-                # Always store smaller id first
-                key = (min(p1, p2), max(p1, p2))
-                cooccurrence[key] += 1
+    Changes are committed per chunk of threads, so an interrupted refresh
+    resumes where it stopped. Returns (processed, skipped, removed).
+    """
+    cursor = conn.cursor()
+    stored = dict(cursor.execute("SELECT thread_id, content_hash FROM thread_hashes"))
     
-    print(f"Found {len(cooccurrence)} unique co-occurrence pairs")
+    # Hash pass: only hashes are kept, no message parsing for unchanged threads
+    current = {}
+    for index, item in enumerate(ds):
+        thread_id = item.get('thread_id') or fallback_thread_id(index)
+        current[thread_id] = thread_hash(item, current.get(thread_id))
+    changed_ids = {thread_id for thread_id, content_hash in current.items()
+                   if stored.get(thread_id) != content_hash}
+    removed = [thread_id for thread_id in stored if thread_id not in current]
+    print(f"  {len(changed_ids)} new or changed threads, {len(removed)} removed, "
+          f"{len(current) - len(changed_ids)} unchanged")
+    del current
     
-    # Insert co-occurrences
-    for (p1, p2), count in cooccurrence.items():
-        cursor.execute(
-            "INSERT OR REPLACE INTO person_cooccurrence (person_a, person_b, thread_count) VALUES (?, ?, ?)",
-            (p1, p2, count)
+    # Second pass: collect the rows of changed threads, grouped by thread
+    rows = defaultdict(list)
+    if changed_ids:
+        for index, item in enumerate(ds):
+            thread_id = item.get('thread_id') or fallback_thread_id(index)
+            if thread_id in changed_ids:
+                rows[thread_id].append(dict(item, thread_id=thread_id))
+    changed = [item for thread_rows in rows.values() for item in thread_rows]
+    del rows
+    
+    if removed:
+        old_participants = detach_threads(cursor, removed, drop=True)
+        changes = apply_cooccurrence_delta(cursor, old_participants, {}, role_weights)
+        apply_canonical_delta(cursor, changes)
+        affected = set().union(*old_participants.values())
+        update_thread_counts(cursor, affected)
+        update_person_stats(cursor, affected)
+        update_canonical_people(cursor, affected)
+        drop_orphan_people(cursor, affected)
+        conn.commit()
+    
+    people = load_people(cursor)
+    processed = 0
+    skipped = 0
+    
+    start = 0
+    while start < len(changed):
+        # Chunk boundaries never split the rows of one thread
+        end = min(start + chunk_threads, len(changed))
+        while end < len(changed) and changed[end]['thread_id'] == changed[end - 1]['thread_id']:
+            end += 1
+        batch = changed[start:end]
+        start = end
+        batch_ids = list(dict.fromkeys(item['thread_id'] for item in batch))
+        old_participants = detach_threads(
+            cursor, [thread_id for thread_id in batch_ids if thread_id in stored]
+        )
+        
+        hashes = {}
+        first_new_person = max(people[1].values(), default=0) + 1
+        new_participants, batch_processed, batch_skipped = ingest_bulk(
+            conn, batch, people=people, hashes=hashes, workers=workers
         )
+        # Threads that no longer parse are dropped (their hash is still recorded)
+        unparsed = [thread_id for thread_id in batch_ids if thread_id not in new_participants]
+        if unparsed:
+            cursor.executemany("DELETE FROM emails WHERE thread_id = ?", ((t,) for t in unparsed))
+        
+        assign_canonical_ids(cursor, first_new_person)
+        changes = apply_cooccurrence_delta(cursor, old_participants, new_participants, role_weights)
+        apply_canonical_delta(cursor, changes)
+        affected = set().union(*old_participants.values(), *new_participants.values())
+        update_thread_counts(cursor, affected)
+        update_person_stats(cursor, affected)
+        update_canonical_people(cursor, affected)
+        forget_people(people, drop_orphan_people(cursor, affected))
+        write_ingest_meta(cursor, hashes, {})
+        conn.commit()
+        
+        processed += batch_processed
+        skipped += batch_skipped
+        print(f"  Applied {processed} changed threads...")
     
+    write_ingest_meta(cursor, {}, meta)
     conn.commit()
+    return processed, skipped, len(removed)
+
+
+def process_dataset(bulk=False, incremental=False, revision=None, workers=1,
+                    role_weights=None, min_count=1, compress=False, source=None, offline=False):
+    """
+    Download and process the Hugging Face dataset.
+    workers > 1 parses threads on a process pool (implies bulk mode).
+    role_weights ({'sender': w, 'recipient': w, 'cc': w}) additionally fills
+    person_cooccurrence.weight; pairs sharing fewer than min_count threads
+    are not stored. compress stores message text as zstd BLOBs (see
+    email_store.compress_bodies); incremental runs keep compressing once a
+    database has been compressed.
+    
+    source (a Parquet/Arrow file or directory) or offline (the local
+    Hugging Face cache) read memory-mapped Arrow record batches instead of
+    going through load_dataset.
+    """
+    if source is not None or offline:
+        if offline:
+            ds = ArrowSource(cached_arrow_files(DATASET_NAME))
+        else:
+            ds = ArrowSource.from_path(source)
+        print(f"Reading {len(ds)} email threads from {len(ds.paths)} local file(s)")
+    else:
+        print("Downloading dataset from Hugging Face...")
+        ds = load_dataset(DATASET_NAME, split='train', revision=revision)
+        print(f"Downloaded {len(ds)} email threads")
+    
+    meta = {
+        'dataset': DATASET_NAME,
+        'revision': revision or 'main',
+        'fingerprint': getattr(ds, '_fingerprint', None),
+        'schema_version': str(SCHEMA_VERSION),
+        'hash_format': str(HASH_FORMAT),
+        'min_count': str(min_count),
+        'role_weights': json.dumps(role_weights, sort_keys=True) if role_weights else None,
+    }
+    
+    if incremental and DB_PATH.exists():
+        conn = create_database(rebuild=False)
+        cursor = conn.cursor()
+        hashed = cursor.execute("SELECT COUNT(*) FROM thread_hashes").fetchone()[0]
+        emails = cursor.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+        previous = dict(cursor.execute("SELECT key, value FROM ingest_meta"))
+        if emails and not hashed:
+            print("Database has no thread hashes (built before incremental ingest); rebuilding")
+            incremental = False
+        elif emails and previous.get('schema_version') != meta['schema_version']:
+            print("Database was built with an older schema; rebuilding")
+            incremental = False
+        elif emails and previous.get('hash_format', '1') != meta['hash_format']:
+            print("Thread hashes use an older format; rebuilding")
+            incremental = False
+        elif emails and (previous.get('min_count', '1') != meta['min_count']
+                         or previous.get('role_weights') != meta['role_weights']):
+            # Pairs dropped by a threshold cannot be updated with deltas
+            print("Co-occurrence settings differ from the last ingest; rebuilding")
+            incremental = False
+        elif min_count > 1:
+            print("--min-count requires a full rebuild; rebuilding")
+            incremental = False
+        if not incremental:
+            conn.close()
+    else:
+        incremental = False
+    
+    if incremental:
+        if meta['fingerprint'] and previous.get('fingerprint') == meta['fingerprint']:
+            print("Dataset unchanged since last ingest")
+        else:
+            print("Processing changed email threads (incremental mode)...")
+            processed, skipped, removed = ingest_incremental(
+                conn, ds, meta, workers=workers, role_weights=role_weights
+            )
+            print(f"Processed {processed} threads, skipped {skipped}, removed {removed}")
+        if compress or has_table(conn, 'zstd_dicts'):
+            print("Compressing new message text...")
+            print(f"Compressed {compress_bodies(conn):,} values")
+    else:
+        bulk = bulk or workers > 1
+        conn = create_database(defer_indexes=bulk)
+        cursor = conn.cursor()
+        hashes = {}
+        
+        if bulk:
+            # The database is rebuilt from scratch, so trade durability for speed
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.execute("PRAGMA journal_mode=MEMORY").fetchone()
+            print(f"Processing email threads (bulk mode, {workers} worker(s))...")
+            thread_participants, processed, skipped = ingest_bulk(conn, ds, hashes=hashes, workers=workers)
+        else:
+            print("Processing email threads...")
+            thread_participants, processed, skipped = ingest_serial(conn, ds, hashes=hashes)
+        conn.commit()
+        
+        print(f"Processed {processed} threads, skipped {skipped}")
+        
+        # Update total_threads for each person
+        print("Updating thread counts...")
+        update_thread_counts(cursor)
+        conn.commit()
+        
+        # Build co-occurrence matrix
+        print("Building co-occurrence matrix...")
+        total_pairs = insert_cooccurrences(cursor, thread_participants, role_weights, min_count)
+        print(f"Found {total_pairs} unique co-occurrence pairs")
+        
+        print("Computing per-person statistics...")
+        update_person_stats(cursor)
+        
+        print("Merging name variants into canonical people...")
+        assign_canonical_ids(cursor)
+        update_canonical_people(cursor)
+        total_canonical = insert_canonical_cooccurrences(cursor)
+        print(f"Found {total_canonical} canonical co-occurrence pairs")
+        write_ingest_meta(cursor, hashes, meta)
+        
+        if bulk:
+            print("Creating indexes...")
+            create_indexes(cursor)
+        
+        conn.commit()
+        
+        if compress:
+            print("Compressing message text...")
+            print(f"Compressed {compress_bodies(conn):,} values")
+            cursor.execute("VACUUM")
     
     # Print stats
     cursor.execute("SELECT COUNT(*) FROM people")
@@ -338,11 +1231,10 @@ def process_dataset():
     print("TOP 20 MOST CONNECTED PEOPLE")
     print("=" * 60)
     cursor.execute("""
-    SELECT p.id, p.name, p.email, p.total_threads,
-           (SELECT COUNT(*) FROM person_cooccurrence 
-            WHERE person_a = p.id OR person_b = p.id) as connections
+    SELECT p.id, p.name, p.email, p.total_threads, s.degree
     FROM people p
-    ORDER BY connections DESC, total_threads DESC
+    JOIN person_stats s ON s.person_id = p.id
+    ORDER BY s.degree DESC, p.total_threads DESC, p.id
     LIMIT 20
     """)
     
@@ -385,5 +1277,39 @@ def process_dataset():
     }
 
 
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bulk", action="store_true",
+                        help="assign person ids in memory and load with executemany "
+                             "in one transaction (indexes built after the load)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="keep the existing database and re-parse only new or "
+                             "changed threads")
+    parser.add_argument("--revision", default=None,
+                        help="dataset revision (branch, tag or commit) to load")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parse threads on N processes (0 = one per CPU); "
+                             "implies --bulk")
+    parser.add_argument("--role-weights", default=None,
+                        help="also store role-weighted co-occurrence in person_cooccurrence.weight, "
+                             "e.g. sender=1,recipient=0.5,cc=0.25")
+    parser.add_argument("--min-count", type=int, default=1,
+                        help="only store pairs sharing at least N threads (full rebuilds only)")
+    parser.add_argument("--source", default=None,
+                        help="ingest a local Parquet/Arrow file or directory (e.g. a "
+                             "Dataset.to_parquet export) instead of downloading")
+    parser.add_argument("--offline", action="store_true",
+                        help="ingest the dataset's Arrow files from the Hugging Face cache")
+    parser.add_argument("--compress", action="store_true",
+                        help="store message text as zstd-compressed BLOBs with a trained "
+                             "dictionary (requires zstandard)")
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    process_dataset(bulk=args.bulk, incremental=args.incremental, revision=args.revision,
+                    workers=workers, role_weights=parse_role_weights(args.role_weights),
+                    min_count=args.min_count, compress=args.compress,
+                    source=args.source, offline=args.offline)
+
+
 if __name__ == "__main__":
-    process_dataset()
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic email corpus shaped like notesbymuneeb/epstein-emails.
+Output is a Parquet file with the dataset's columns (thread_id, source_file,
+subject, messages as a JSON string), readable by
+`process_emails.py --source`. The same seed and size always produce the
+same file.
+
+Senders follow a Zipf law over a pool of people, recipient lists are
+mostly short with a heavy tail of mailing-list blasts, and timestamps use
+every format parse_timestamp() understands (plus a few it does not).
+"""
+
+import argparse
+import bisect
+import json
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PROJECT_ROOT = Path(__file__).parent.parent
+OUTPUT_DIR = PROJECT_ROOT / "data" / "synthetic"
+
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David",
+    "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas",
+    "Sarah", "Charles", "Karen", "Daniel", "Lisa", "Matthew", "Nancy", "Anthony", "Betty",
+    "Mark", "Sandra", "Steven", "Ashley", "Paul", "Emily", "Andrew", "Donna", "Joshua", "Michelle",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+    "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Taylor", "Moore",
+    "Jackson", "Martin", "Lee", "Thompson", "White", "Harris", "Clark", "Lewis", "Robinson",
+    "Walker", "Young", "Allen", "King", "Wright", "Scott", "Green", "Baker", "Adams", "Nelson",
+]
+DOMAINS = ["gmail.com", "yahoo.com", "aol.com", "law-firm.com", "bank.com", "university.edu",
+           "foundation.org", "media.com"]
+AUTOMATED = ["noreply@calendar.example.com", "Mail Delivery System <mailer-daemon@example.com>",
+             "newsletter@media.com"]
+
+# Participant string formats seen in the dataset
+PARTICIPANT_FORMATS = [
+    "{name} <{email}>", "{name} [{email}]", '"{name}" <{email}>', "{email}", "{name}",
+    "{upper} <{email}>",
+]
+PARTICIPANT_WEIGHTS = [40, 20, 10, 15, 10, 5]
+
+# Every strptime format in parse_timestamp(), then its regex fallbacks,
+# then strings it cannot parse
+TIMESTAMP_FORMATS = [
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%a, %b %d, %Y at %I:%M %p",
+    "%a, %b %d, %Y at %I:%M:%S %p",
+    "%b %d, %Y, at %I:%M %p",
+    "%b %d, %Y, at %I:%M:%S %p",
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "Sent %m/%d/%Y from my iPhone",
+    "%B %d, %Y (forwarded)",
+    "sometime in %Y",
+    "",
+]
+TIMESTAMP_WEIGHTS = [30, 10, 15, 5, 10, 5, 5, 5, 5, 4, 3, 3]
+
+SUBJECTS = [
+    "Meeting", "Dinner", "Flight schedule", "Re: call tomorrow", "Documents", "Invitation",
+    "Fwd: article", "Donation", "Board update", "Visit", "Contract draft", "Quick question",
+]
+SENTENCES = [
+    "Let me know if that works for you.", "Please see the attached documents.",
+    "We should discuss this in person.", "The car will pick you up at the airport.",
+    "Thanks for dinner last night.", "Can we move the call to Thursday?",
+    "I spoke with the lawyers this morning.", "The foundation approved the grant.",
+    "Here is the article I mentioned.", "He will be in town next week.",
+]
+PLACES = [
+    "New York", "Palm Beach", "Paris", "London", "Santa Fe", "Little St. James",
+    "Boston", "Washington DC", "Tel Aviv", "Monaco", "Los Angeles", "Cambridge",
+]
+SIGNATURE = "\n\nSent from my iPhone\n\nThis communication is confidential and may be privileged."
+
+START_DATE = datetime(2002, 1, 1)
+DATE_SPAN_DAYS = 17 * 365
+
+
+def zipf_cum_weights(n, exponent):
+    """Cumulative Zipf weights for ranks 1..n."""
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+def make_people(rng, count):
+    """Return (name, email) for `count` people with mostly unique emails."""
+    people = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        name = f"{first} {last}"
+        email = f"{first[0].lower()}{last.lower()}{i}@{rng.choice(DOMAINS)}"
+        people.append((name, email))
+    return people
+
+
+class CorpusGenerator:
+    """Deterministic thread generator for one seed and people pool."""
+
+    def __init__(self, num_threads, seed=0, people=None, zipf_exponent=1.1):
+        self.rng = random.Random(seed)
+        self.people = make_people(self.rng, people or max(200, num_threads // 5))
+        self.cum_weights = zipf_cum_weights(len(self.people), zipf_exponent)
+        self.total_weight = self.cum_weights[-1]
+
+    def person(self):
+        """Zipf-distributed person index."""
+        return bisect.bisect_left(self.cum_weights, self.rng.random() * self.total_weight)
+
+    def participant(self, index):
+        rng = self.rng
+        if rng.random() < 0.01:
+            return rng.choice(AUTOMATED)
+        name, email = self.people[index]
+        fmt = rng.choices(PARTICIPANT_FORMATS, PARTICIPANT_WEIGHTS)[0]
+        return fmt.format(name=name, email=email, upper=name.upper())
+
+    def fan_out(self):
+        """Recipient count: usually 1-3, occasionally a mailing-list blast."""
+        rng = self.rng
+        if rng.random() < 0.02:
+            return int(rng.lognormvariate(3.5, 0.6))
+        return 1 + min(int(rng.expovariate(0.9)), 12)
+
+    def timestamp(self, when):
+        fmt = self.rng.choices(TIMESTAMP_FORMATS, TIMESTAMP_WEIGHTS)[0]
+        return when.strftime(fmt) if fmt else ""
+
+    def body(self, previous):
+        rng = self.rng
+        lines = rng.choices(SENTENCES, k=rng.randint(1, 6))
+        if rng.random() < 0.3:
+            lines.append(f"I will be in {rng.choice(PLACES)} on the weekend.")
+        text = " ".join(lines) + SIGNATURE
+        if previous and rng.random() < 0.6:
+            # Replies quote the previous message
+            text += "\n\n> " + previous.replace("\n", "\n> ")[:2000]
+        return text
+
+    def thread(self, index):
+        rng = self.rng
+        cast = [self.person() for _ in range(rng.randint(2, 6))]
+        subject = f"{rng.choice(SUBJECTS)} {index % 997}"
+        when = START_DATE + timedelta(minutes=rng.randrange(DATE_SPAN_DAYS * 24 * 60))
+        messages = []
+        previous = None
+        for _ in range(min(1 + int(rng.expovariate(0.45)), 40)):
+            sender = rng.choice(cast)
+            recipients = [self.person() if rng.random() < 0.3 else rng.choice(cast)
+                          for _ in range(self.fan_out())]
+            cc = [self.person() for _ in range(rng.randint(0, 2))] if rng.random() < 0.25 else []
+            previous = self.body(previous)
+            messages.append({
+                "sender": self.participant(sender),
+                "recipients": [self.participant(r) for r in recipients],
+                "cc": [self.participant(c) for c in cc],
+                "timestamp": self.timestamp(when),
+                "subject": subject if not messages else f"Re: {subject}",
+                "body": previous,
+            })
+            when += timedelta(minutes=int(rng.expovariate(1 / 600)) + 1)
+        return {
+            "thread_id": f"synthetic-{index:08d}",
+            "source_file": f"synthetic/batch_{index // 10_000:04d}.txt",
+            "subject": subject,
+            "messages": json.dumps(messages),
+        }
+
+
+def generate(path, num_threads, seed=0, people=None, batch_threads=50_000):
+    """Write `num_threads` synthetic threads to a Parquet file at `path`."""
+    generator = CorpusGenerator(num_threads, seed=seed, people=people)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    try:
+        for start in range(0, num_threads, batch_threads):
+            rows = [generator.thread(i) for i in range(start, min(start + batch_threads, num_threads))]
+            table = pa.Table.from_pylist(rows)
+            if writer is None:
+                writer = pq.ParquetWriter(str(path), table.schema)
+            writer.write_table(table, row_group_size=10_000)
+            print(f"  Generated {start + len(rows):,} threads...")
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def parse_size(value):
+    """Parse a thread count such as 5000, 10k or 1m."""
+    value = value.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip('km')) * scale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=parse_size, default=10_000, help="number of threads (e.g. 10k, 1m)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--people", type=int, default=None,
+                        help="size of the people pool (default: threads / 5, at least 200)")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Parquet file to write (default: data/synthetic/emails_<threads>_<seed>.parquet)")
+    args = parser.parse_args()
+    output = args.output or OUTPUT_DIR / f"emails_{args.threads}_{args.seed}.parquet"
+    print(f"Generating {args.threads:,} threads (seed {args.seed})...")
+    generate(output, args.threads, seed=args.seed, people=args.people)
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Octree-tiled export of the laid-out 3D graph.
+
+The single-page Three.js export (build_threejs_graph.py) loads every node
+and edge up front, which caps it at a few thousand people. This export
+splits the positions from layout_3d() into an octree: any cell with more
+than max_nodes nodes is split into its eight octants, up to MAX_DEPTH
+levels, and every leaf cell becomes one tile:
+
+  tiles/index.json       counts, layout radius, and per tile: bounding box,
+                         center, node / edge counts, byte size, color
+  tiles/t/<path>.bin     the tile's typed arrays, back to back (little-endian):
+                           Float32[k * 3] positions  Float32[k] sizes
+                           Float32[k * 3] colors     Uint32[e * 2] edges
+                           Float32[e] weights        Uint32[x * 3] external
+                           Float32[x] external weights
+  tiles/t/<path>.json    labels of the tile's nodes (row i is node i)
+
+Paths name the octant at each level ("5", "5-2", "5-2-7"). Edges inside a
+tile use tile-local node indices. An edge between two tiles is stored
+once, in the tile listed first, as (local node, other tile, node in that
+tile), and drawn while both tiles are loaded.
+
+tiles/index.html shows every tile as one point until it is loaded, and
+streams tiles in by camera frustum, nearest first, within a memory
+budget (?budget=MB, default BUDGET_MB), evicting the farthest tiles that
+left the view when it needs room. It uses fetch(), so serve the directory
+over HTTP.
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+TILE_MAX_NODES = 2000       # nodes per tile; fuller cells are split into octants
+MAX_DEPTH = 8
+BUDGET_MB = 64              # tile data the viewer keeps loaded
+
+
+def split_octree(positions, max_nodes=TILE_MAX_NODES):
+    """Leaf tiles as {path: node indices}, in depth-first octant order. The root has path ""."""
+    tiles = {}
+    if not len(positions):
+        return tiles
+    low = positions.min(axis=0)
+    size = float((positions.max(axis=0) - low).max()) + 1e-9
+    bits = np.array([4, 2, 1])
+    stack = [("", np.arange(len(positions)), low, size, 0)]
+    while stack:
+        path, members, corner, size, depth = stack.pop()
+        if len(members) <= max_nodes or depth == MAX_DEPTH:
+            tiles[path] = members
+            continue
+        half = size / 2
+        upper = positions[members] >= corner + half
+        octant = upper.astype(np.int64) @ bits
+        # Reversed so the stack pops octant 0 first
+        for o in reversed(range(8)):
+            child = members[octant == o]
+            if len(child):
+                offset = np.array([(o >> 2) & 1, (o >> 1) & 1, o & 1]) * half
+                stack.append((f"{path}-{o}" if path else str(o), child, corner + offset, half, depth + 1))
+    return tiles
+
+
+def export_tiles(arrays, labels, output_dir, max_nodes=TILE_MAX_NODES, title="", activity="Threads"):
+    """
+    Write index.json, one t/<path>.bin + .json per tile and index.html to
+    output_dir for build_threejs_graph.graph_arrays() / graph_labels() output.
+    """
+    output_dir = Path(output_dir)
+    shutil.rmtree(output_dir / "t", ignore_errors=True)
+    (output_dir / "t").mkdir(parents=True, exist_ok=True)
+
+    positions, sizes, colors = arrays['positions'], arrays['sizes'], arrays['colors']
+    edges, weights = arrays['edges'], arrays['weights']
+    tiles = split_octree(positions, max_nodes)
+    paths = list(tiles)
+
+    # Tile number and tile-local index of every node
+    tile_of = np.empty(len(positions), dtype=np.int64)
+    local = np.empty(len(positions), dtype=np.int64)
+    for t, path in enumerate(paths):
+        tile_of[tiles[path]] = t
+        local[tiles[path]] = np.arange(len(tiles[path]))
+
+    # Orient every edge so it belongs to the tile listed first
+    a, b = edges[:, 0], edges[:, 1]
+    swap = tile_of[a] > tile_of[b]
+    a, b = np.where(swap, b, a), np.where(swap, a, b)
+    owner = tile_of[a]
+    internal = owner == tile_of[b]
+    order = np.argsort(owner, kind='stable')
+    bounds = np.searchsorted(owner[order], np.arange(len(paths) + 1))
+
+    entries = []
+    for t, path in enumerate(paths):
+        members = tiles[path]
+        own = order[bounds[t]:bounds[t + 1]]
+        inner, outer = own[internal[own]], own[~internal[own]]
+        parts = [
+            np.asarray(positions[members], dtype='<f4'),
+            np.asarray(sizes[members], dtype='<f4'),
+            np.asarray(colors[members], dtype='<f4'),
+            np.stack([local[a[inner]], local[b[inner]]], axis=1).astype('<u4'),
+            np.asarray(weights[inner], dtype='<f4'),
+            np.stack([local[a[outer]], tile_of[b[outer]], local[b[outer]]], axis=1).astype('<u4'),
+            np.asarray(weights[outer], dtype='<f4'),
+        ]
+        name = path or "root"
+        data = b''.join(np.ascontiguousarray(part).tobytes() for part in parts)
+        (output_dir / "t" / f"{name}.bin").write_bytes(data)
+        document = json.dumps({key: [values[i] for i in members] for key, values in labels.items()},
+                              separators=(',', ':'))
+        (output_dir / "t" / f"{name}.json").write_text(document)
+
+        tile_positions = positions[members]
+        pad = float(sizes[members].max())
+        # Most common node color stands in for the tile before it loads
+        palette, counts = np.unique(np.round(colors[members], 3), axis=0, return_counts=True)
+        entries.append({
+            'path': path,
+            'file': f"t/{name}",
+            'nodes': len(members),
+            'edges': len(inner),
+            'external': len(outer),
+            'bytes': len(data) + len(document),
+            'low': np.round(tile_positions.min(axis=0) - pad, 1).tolist(),
+            'high': np.round(tile_positions.max(axis=0) + pad, 1).tolist(),
+            'center': np.round(tile_positions.mean(axis=0), 1).tolist(),
+            'color': palette[counts.argmax()].tolist(),
+        })
+
+    radius = float(np.linalg.norm(positions, axis=1).max()) if len(positions) else 1.0
+    index = {'title': title, 'activity': activity, 'nodes': len(positions), 'edges': len(edges),
+             'radius': round(radius, 1), 'budget_mb': BUDGET_MB, 'tiles': entries}
+    with open(output_dir / "index.json", 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+    with open(output_dir / "index.html", 'w') as f:
+        f.write(VIEWER_HTML)
+
+    sizes_kb = [entry['bytes'] / 1024 for entry in entries]
+    print(f"Tiled export: {len(positions)} nodes in {len(entries)} tiles "
+          f"({max(sizes_kb, default=0):.0f} KB largest, {sum(sizes_kb) / 1024:.1f} MB total) -> {output_dir}")
+    return index
+
+
+VIEWER_HTML = '''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>3D Network - Tiled</title>
+    <style>
+        body { margin: 0; overflow: hidden; background: #0a0a15;
+               font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; }
+        #info { position: absolute; top: 10px; left: 10px; color: #fff; background: rgba(0,0,0,0.7);
+                padding: 15px; border-radius: 8px; max-width: 300px; z-index: 100; }
+        #info h2 { margin: 0 0 10px 0; font-size: 18px; }
+        #info p { margin: 5px 0; font-size: 12px; color: #aaa; }
+        #tooltip { position: absolute; background: rgba(0,0,0,0.85); color: #fff; padding: 10px 15px;
+                   border-radius: 5px; font-size: 13px; pointer-events: none; display: none; z-index: 1000; }
+    </style>
+</head>
+<body>
+    <div id="info">
+        <h2 id="title">3D Network</h2>
+        <p id="counts">Loading...</p>
+        <p id="stream"></p>
+        <p>Drag to rotate, scroll to zoom; tiles load as you move closer</p>
+    </div>
+    <div id="tooltip"></div>
+
+    <script src="https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js"></script>
+    <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/controls/OrbitControls.js"></script>
+
+    <script>
+    const MAX_INFLIGHT = 4;
+    const UPDATE_MS = 200;
+
+    const scene = new THREE.Scene();
+    scene.background = new THREE.Color(0x0a0a15);
+    const camera = new THREE.PerspectiveCamera(60, window.innerWidth / window.innerHeight, 0.1, 5000);
+    const renderer = new THREE.WebGLRenderer({ antialias: true });
+    renderer.setSize(window.innerWidth, window.innerHeight);
+    renderer.setPixelRatio(window.devicePixelRatio);
+    document.body.appendChild(renderer.domElement);
+    const controls = new THREE.OrbitControls(camera, renderer.domElement);
+    controls.enableDamping = true;
+    controls.dampingFactor = 0.05;
+
+    scene.add(new THREE.AmbientLight(0xffffff, 0.6));
+    const light = new THREE.PointLight(0xffffff, 0.8);
+    camera.add(light);
+    scene.add(camera);
+
+    const sphere = new THREE.SphereGeometry(1, 8, 6);
+    const nodeMaterial = new THREE.MeshPhongMaterial({ color: 0xffffff });
+    const edgeMaterial = new THREE.LineBasicMaterial({
+        vertexColors: true, transparent: true, blending: THREE.AdditiveBlending, depthWrite: false
+    });
+    const edgeColor = new THREE.Color(0x4488ff);
+
+    let index = null;
+    let budget = 0;
+    let boxes = [];
+    let overview = null;
+    let crossLines = null;
+    let crossDirty = false;
+    let residentBytes = 0;
+    const resident = new Map();     // tile number -> { doc, arrays, mesh, lines, bytes }
+    const loading = new Set();
+
+    // Typed-array views over one tile file (layout in index.json order)
+    function views(buffer, tile) {
+        let offset = 0;
+        const take = (Type, length) => {
+            const view = new Type(buffer, offset, length);
+            offset += 4 * length;
+            return view;
+        };
+        return {
+            positions: take(Float32Array, 3 * tile.nodes),
+            sizes: take(Float32Array, tile.nodes),
+            colors: take(Float32Array, 3 * tile.nodes),
+            edges: take(Uint32Array, 2 * tile.edges),
+            weights: take(Float32Array, tile.edges),
+            external: take(Uint32Array, 3 * tile.external),
+            externalWeights: take(Float32Array, tile.external),
+        };
+    }
+
+    function lineSegments(count, fill) {
+        // fill(e, vertices, shades) writes segment e; weight sets brightness
+        const vertices = new Float32Array(count * 6);
+        const shades = new Float32Array(count * 6);
+        for (let e = 0; e < count; e++) fill(e, vertices, shades);
+        const geometry = new THREE.BufferGeometry();
+        geometry.setAttribute('position', new THREE.BufferAttribute(vertices, 3));
+        geometry.setAttribute('color', new THREE.BufferAttribute(shades, 3));
+        return new THREE.LineSegments(geometry, edgeMaterial);
+    }
+
+    function shade(shades, e, weight) {
+        const opacity = Math.min(0.6, 0.1 + weight / 50);
+        for (let k = 0; k < 2; k++) {
+            shades[6 * e + 3 * k] = edgeColor.r * opacity;
+            shades[6 * e + 3 * k + 1] = edgeColor.g * opacity;
+            shades[6 * e + 3 * k + 2] = edgeColor.b * opacity;
+        }
+    }
+
+    function buildTile(t, doc, arrays) {
+        const tile = index.tiles[t];
+        const mesh = new THREE.InstancedMesh(sphere, nodeMaterial, tile.nodes);
+        const dummy = new THREE.Object3D();
+        const color = new THREE.Color();
+        const { positions, sizes, colors, edges, weights } = arrays;
+        for (let i = 0; i < tile.nodes; i++) {
+            dummy.position.set(positions[3 * i], positions[3 * i + 1], positions[3 * i + 2]);
+            dummy.scale.setScalar(sizes[i]);
+            dummy.updateMatrix();
+            mesh.setMatrixAt(i, dummy.matrix);
+            mesh.setColorAt(i, color.setRGB(colors[3 * i], colors[3 * i + 1], colors[3 * i + 2]));
+        }
+        mesh.userData = { tile: t };
+        const lines = lineSegments(tile.edges, (e, vertices, shades) => {
+            const a = edges[2 * e], b = edges[2 * e + 1];
+            vertices.set(positions.subarray(3 * a, 3 * a + 3), 6 * e);
+            vertices.set(positions.subarray(3 * b, 3 * b + 3), 6 * e + 3);
+            shade(shades, e, weights[e]);
+        });
+        scene.add(mesh);
+        scene.add(lines);
+        return { doc, arrays, mesh, lines, bytes: tile.bytes };
+    }
+
+    // Edges between two loaded tiles, rebuilt when the loaded set changes
+    function rebuildCrossEdges() {
+        crossDirty = false;
+        if (crossLines) {
+            scene.remove(crossLines);
+            crossLines.geometry.dispose();
+        }
+        const pairs = [];
+        for (const entry of resident.values()) {
+            const { external, externalWeights } = entry.arrays;
+            for (let x = 0; x < externalWeights.length; x++) {
+                const other = resident.get(external[3 * x + 1]);
+                if (other) pairs.push([entry.arrays.positions, external[3 * x], other.arrays.positions,
+                                       external[3 * x + 2], externalWeights[x]]);
+            }
+        }
+        crossLines = lineSegments(pairs.length, (e, vertices, shades) => {
+            const [from, a, to, b, weight] = pairs[e];
+            vertices.set(from.subarray(3 * a, 3 * a + 3), 6 * e);
+            vertices.set(to.subarray(3 * b, 3 * b + 3), 6 * e + 3);
+            shade(shades, e, weight);
+        });
+        scene.add(crossLines);
+    }
+
+    // Unloaded tiles are drawn as one point at their center; black is invisible with additive blending
+    function showPlaceholder(t, visible) {
+        const colors = overview.geometry.attributes.color;
+        const c = visible ? index.tiles[t].color : [0, 0, 0];
+        colors.setXYZ(t, c[0], c[1], c[2]);
+        colors.needsUpdate = true;
+    }
+
+    async function loadTile(t) {
+        const tile = index.tiles[t];
+        loading.add(t);
+        try {
+            const [doc, buffer] = await Promise.all([
+                fetch(tile.file + '.json').then(r => r.json()),
+                fetch(tile.file + '.bin').then(r => r.arrayBuffer()),
+            ]);
+            // Skip tiles the camera moved away from while they were in flight
+            if (!wantedNow.has(t) || !evictFor(tile.bytes, wantedNow)) return;
+            resident.set(t, buildTile(t, doc, views(buffer, tile)));
+            residentBytes += tile.bytes;
+            showPlaceholder(t, false);
+            crossDirty = true;
+        } finally {
+            loading.delete(t);
+            needsUpdate = true;
+        }
+    }
+
+    function unloadTile(t) {
+        const entry = resident.get(t);
+        scene.remove(entry.mesh);
+        scene.remove(entry.lines);
+        entry.lines.geometry.dispose();
+        if (entry.mesh.dispose) entry.mesh.dispose();
+        resident.delete(t);
+        residentBytes -= entry.bytes;
+        showPlaceholder(t, true);
+        crossDirty = true;
+    }
+
+    // Evict loaded tiles that are not wanted, farthest first, until `bytes` fit in the budget
+    function evictFor(bytes, wanted) {
+        const victims = [...resident.keys()].filter(t => !wanted.has(t))
+            .sort((a, b) => boxes[b].distanceToPoint(camera.position) - boxes[a].distanceToPoint(camera.position));
+        while (residentBytes + bytes > budget && victims.length) unloadTile(victims.shift());
+        return residentBytes + bytes <= budget;
+    }
+
+    const frustum = new THREE.Frustum();
+    const projection = new THREE.Matrix4();
+    let wantedNow = new Set();
+    let needsUpdate = true;
+
+    // Tiles in the view, nearest first, as many as the budget holds
+    function update() {
+        needsUpdate = false;
+        camera.updateMatrixWorld();
+        projection.multiplyMatrices(camera.projectionMatrix, camera.matrixWorldInverse);
+        frustum.setFromProjectionMatrix(projection);
+        const visible = [];
+        index.tiles.forEach((tile, t) => {
+            if (frustum.intersectsBox(boxes[t])) visible.push([boxes[t].distanceToPoint(camera.position), t]);
+        });
+        visible.sort((a, b) => a[0] - b[0]);
+
+        const wanted = new Set();
+        let bytes = 0;
+        for (const [, t] of visible) {
+            if (bytes + index.tiles[t].bytes > budget) break;
+            wanted.add(t);
+            bytes += index.tiles[t].bytes;
+        }
+        wantedNow = wanted;
+        for (const [, t] of visible) {
+            if (!wanted.has(t)) break;
+            if (resident.has(t) || loading.has(t)) continue;
+            if (loading.size >= MAX_INFLIGHT) break;
+            loadTile(t);
+        }
+        if (crossDirty) rebuildCrossEdges();
+        document.getElementById('stream').textContent =
+            `${resident.size} / ${index.tiles.length} tiles loaded ` +
+            `(${(residentBytes / 1048576).toFixed(1)} of ${(budget / 1048576).toFixed(1)} MB)`;
+    }
+
+    // Raycaster for interaction
+    const raycaster = new THREE.Raycaster();
+    const mouse = new THREE.Vector2();
+    const tooltip = document.getElementById('tooltip');
+
+    window.addEventListener('mousemove', event => {
+        mouse.x = (event.clientX / window.innerWidth) * 2 - 1;
+        mouse.y = -(event.clientY / window.innerHeight) * 2 + 1;
+        raycaster.setFromCamera(mouse, camera);
+        const hits = raycaster.intersectObjects([...resident.values()].map(entry => entry.mesh));
+        if (hits.length > 0) {
+            const labels = resident.get(hits[0].object.userData.tile).doc;
+            const i = hits[0].instanceId;
+            tooltip.style.display = 'block';
+            tooltip.style.left = event.clientX + 15 + 'px';
+            tooltip.style.top = event.clientY + 15 + 'px';
+            tooltip.innerHTML = `
+                <strong>${labels.name[i]}</strong><br>
+                ${index.activity}: ${labels.mentions[i]}<br>
+                Connections: ${labels.connections[i]}
+            `;
+            document.body.style.cursor = 'pointer';
+        } else {
+            tooltip.style.display = 'none';
+            document.body.style.cursor = 'default';
+        }
+    });
+
+    window.addEventListener('resize', () => {
+        camera.aspect = window.innerWidth / window.innerHeight;
+        camera.updateProjectionMatrix();
+        renderer.setSize(window.innerWidth, window.innerHeight);
+        needsUpdate = true;
+    });
+    controls.addEventListener('change', () => { needsUpdate = true; });
+
+    let lastUpdate = 0;
+    function animate(now) {
+        requestAnimationFrame(animate);
+        controls.update();
+        if (needsUpdate && now - lastUpdate > UPDATE_MS) {
+            lastUpdate = now;
+            update();
+        }
+        renderer.render(scene, camera);
+    }
+
+    fetch('index.json').then(r => r.json()).then(data => {
+        index = data;
+        const param = new URLSearchParams(location.search).get('budget');
+        budget = (param ? parseFloat(param) : index.budget_mb) * 1048576;
+        boxes = index.tiles.map(tile => new THREE.Box3(new THREE.Vector3(...tile.low), new THREE.Vector3(...tile.high)));
+
+        const centers = new Float32Array(index.tiles.flatMap(tile => tile.center));
+        const colors = new Float32Array(index.tiles.flatMap(tile => tile.color));
+        const geometry = new THREE.BufferGeometry();
+        geometry.setAttribute('position', new THREE.BufferAttribute(centers, 3));
+        geometry.setAttribute('color', new THREE.BufferAttribute(colors, 3));
+        overview = new THREE.Points(geometry, new THREE.PointsMaterial({
+            size: 6, vertexColors: true, transparent: true, blending: THREE.AdditiveBlending, depthWrite: false
+        }));
+        scene.add(overview);
+
+        if (index.title) {
+            document.title = index.title + ' - Tiled';
+            document.getElementById('title').textContent = index.title;
+        }
+        document.getElementById('counts').innerHTML =
+            `<strong>${index.nodes}</strong> nodes, <strong>${index.edges}</strong> connections`;
+        camera.position.set(0, 0, 2.2 * index.radius);
+        camera.far = 10 * index.radius;
+        camera.updateProjectionMatrix();
+        requestAnimationFrame(animate);
+    });
+    </script>
+</body>
+</html>
+'''